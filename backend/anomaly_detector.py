@@ -0,0 +1,172 @@
+import math
+
+HOUR_MS = 3600 * 1000
+
+
+class DecayingCounter:
+    """
+    Exponentially decayed event count with mean life `tau_ms`: value / tau is an EWMA
+    rate, updated in O(1) per event. Events older than the last update are decayed
+    into the count without moving its clock.
+    """
+
+    __slots__ = ("tau_ms", "value", "updated_ms")
+
+    def __init__(self, tau_ms, value=0.0, updated_ms=0):
+        self.tau_ms = tau_ms
+        self.value = value
+        self.updated_ms = updated_ms
+
+    def at(self, now_ms):
+        """Count decayed to now_ms"""
+        if now_ms <= self.updated_ms:
+            return self.value
+        return self.value * math.exp(-(now_ms - self.updated_ms) / self.tau_ms)
+
+    def add(self, time_ms, weight=1.0):
+        if time_ms >= self.updated_ms:
+            self.value = self.at(time_ms) + weight
+            self.updated_ms = time_ms
+        else:
+            self.value += weight * math.exp(-(self.updated_ms - time_ms) / self.tau_ms)
+
+    def rate_per_hour(self, now_ms):
+        return self.at(now_ms) / self.tau_ms * HOUR_MS
+
+    def to_list(self):
+        return [self.value, self.updated_ms]
+
+
+class ActivityAnomalyDetector:
+    """
+    Streaming detector of unusual regional activity. Per region a short and a long
+    decaying counter; a region is anomalous when its short-window count is far above
+    what the long-term rate, scaled by a global hour-of-day profile, predicts
+    (Poisson z-score), with hysteresis between entering and leaving the state.
+    """
+
+    def __init__(
+        self, short_tau_hours=12.0, long_tau_days=30.0, z_enter=4.0, z_exit=2.0, min_events=5,
+        seasonal_tau_days=90.0
+    ):
+        self.short_tau_ms = short_tau_hours * HOUR_MS
+        self.long_tau_ms = long_tau_days * 24 * HOUR_MS
+        self.seasonal_tau_ms = seasonal_tau_days * 24 * HOUR_MS
+        self.z_enter = z_enter
+        self.z_exit = z_exit
+        self.min_events = min_events
+        self.regions = {}  # region -> {"short", "long", "anomalous_since"}
+        self.hour_of_day = [DecayingCounter(self.seasonal_tau_ms) for _ in range(24)]
+
+    def _region(self, region):
+        state = self.regions.get(region)
+        if state is None:
+            state = self.regions[region] = {
+                "short": DecayingCounter(self.short_tau_ms),
+                "long": DecayingCounter(self.long_tau_ms),
+                "anomalous_since": None
+            }
+        return state
+
+    def seasonal_factor(self, now_ms):
+        """
+        Hour-of-day activity relative to the daily mean, averaged over the hours the
+        short window covers with its decay weights (1.0 until enough is learned)
+        """
+        counts = [c.at(now_ms) for c in self.hour_of_day]
+        total = sum(counts)
+        if total < 24 * self.min_events:
+            return 1.0
+        hour = int(now_ms // HOUR_MS) % 24
+        weighted = weights = 0.0
+        for k in range(int(3 * self.short_tau_ms // HOUR_MS) + 1):
+            w = math.exp(-k * HOUR_MS / self.short_tau_ms)
+            weighted += w * counts[(hour - k) % 24] * 24 / total
+            weights += w
+        return max(weighted / weights, 0.25)
+
+    def score(self, region, now_ms):
+        """(observed short-window count, expected count, z-score) of a region at now_ms"""
+        state = self.regions[region]
+        observed = state["short"].at(now_ms)
+        # Expected count in the short window at the long-term rate, seasonally adjusted
+        expected = state["long"].at(now_ms) * self.short_tau_ms / self.long_tau_ms * self.seasonal_factor(now_ms)
+        expected = max(expected, 0.1)
+        return observed, expected, (observed - expected) / math.sqrt(expected)
+
+    def _transition(self, region, now_ms):
+        state = self.regions[region]
+        observed, expected, z = self.score(region, now_ms)
+        if state["anomalous_since"] is None:
+            if z >= self.z_enter and observed >= self.min_events:
+                state["anomalous_since"] = now_ms
+                return self._event("ANOMALY_STARTED", region, observed, expected, z, now_ms)
+        elif z < self.z_exit:
+            state["anomalous_since"] = None
+            return self._event("ANOMALY_ENDED", region, observed, expected, z, now_ms)
+        return None
+
+    def _event(self, kind, region, observed, expected, z, now_ms):
+        return {
+            "type": kind, "region": region, "recent_count": round(observed, 2),
+            "expected_count": round(expected, 2), "score": round(z, 2), "time": int(now_ms)
+        }
+
+    def observe(self, region, time_ms, now_ms=None):
+        """Counts one new event; returns a transition event or None"""
+        state = self._region(region)
+        state["short"].add(time_ms)
+        state["long"].add(time_ms)
+        self.hour_of_day[int(time_ms // HOUR_MS) % 24].add(time_ms)
+        return self._transition(region, max(now_ms or time_ms, time_ms))
+
+    def tick(self, now_ms):
+        """Re-evaluates every region (anomalies also end when events stop); returns the transitions"""
+        transitions = [self._transition(region, now_ms) for region in list(self.regions)]
+        return [t for t in transitions if t]
+
+    def seed_baseline(self, region, events_per_hour, now_ms):
+        """Starts a region at a steady state of events_per_hour (e.g. from the rollups)"""
+        state = self._region(region)
+        rate_per_ms = events_per_hour / HOUR_MS
+        state["short"] = DecayingCounter(self.short_tau_ms, rate_per_ms * self.short_tau_ms, now_ms)
+        state["long"] = DecayingCounter(self.long_tau_ms, rate_per_ms * self.long_tau_ms, now_ms)
+
+    def current(self, now_ms):
+        """Anomalous regions, most unusual first"""
+        rows = []
+        for region, state in self.regions.items():
+            if state["anomalous_since"] is None:
+                continue
+            observed, expected, z = self.score(region, now_ms)
+            rows.append({
+                "region": region,
+                "recent_count": round(observed, 2),
+                "expected_count": round(expected, 2),
+                "historical_daily_avg": round(state["long"].rate_per_hour(now_ms) * 24, 2),
+                "score": round(z, 2),
+                "anomalous_since": state["anomalous_since"]
+            })
+        return sorted(rows, key=lambda r: r["score"], reverse=True)
+
+    def to_dict(self):
+        return {
+            "regions": {
+                region: {
+                    "short": s["short"].to_list(), "long": s["long"].to_list(),
+                    "anomalous_since": s["anomalous_since"]
+                }
+                for region, s in self.regions.items()
+            },
+            "hour_of_day": [c.to_list() for c in self.hour_of_day]
+        }
+
+    def load_dict(self, data):
+        for region, s in data.get("regions", {}).items():
+            self.regions[region] = {
+                "short": DecayingCounter(self.short_tau_ms, *s["short"]),
+                "long": DecayingCounter(self.long_tau_ms, *s["long"]),
+                "anomalous_since": s.get("anomalous_since")
+            }
+        for counter, (value, updated_ms) in zip(self.hour_of_day, data.get("hour_of_day", [])):
+            counter.value, counter.updated_ms = value, updated_ms
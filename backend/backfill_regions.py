@@ -0,0 +1,41 @@
+import asyncio
+import argparse
+import redis.asyncio as redis
+from config import REDIS_URL, EVENT_CACHE_CHANNEL
+from db_mongo import mongo_handler
+
+async def main():
+    parser = argparse.ArgumentParser(description="Recompute normalized region/city for stored earthquakes")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint and scan from the start")
+    parser.add_argument("--skip-neo4j", action="store_true", help="Only update MongoDB")
+    args = parser.parse_args()
+
+    print("Initializing Mongo...")
+    await mongo_handler.initialize()
+
+    migration = mongo_handler.region_backfill(batch_size=args.batch_size)
+    if args.restart:
+        await migration.config_collection.delete_one({"_id": migration.checkpoint_id})
+
+    state = await migration.run()
+    print(f"MongoDB backfill complete. Scanned {state['scanned']}, modified {state['modified']}")
+
+    # Rollup cells are keyed by region, so renamed regions need a rebuild (run with the worker stopped)
+    if state["modified"]:
+        print("Regions changed, rebuilding analytics rollups...")
+        await mongo_handler.rebuild_rollups()
+
+    if not args.skip_neo4j:
+        from db_neo4j import neo4j_handler
+        total = neo4j_handler.backfill_locations(batch_size=args.batch_size)
+        print(f"Neo4j backfill complete. Re-linked {total} earthquakes")
+        neo4j_handler.close()
+
+    # Cached event details carry the old region/city context
+    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+    await redis_client.publish(EVENT_CACHE_CHANNEL, "*")
+    await redis_client.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
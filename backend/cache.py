@@ -0,0 +1,363 @@
+import time
+import json
+import asyncio
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+import redis.asyncio as aioredis
+
+
+class TTLCache:
+    """
+    In-process LRU cache with a per-entry TTL and request coalescing: concurrent
+    misses on one key share a single loader call. A key invalidated while its load
+    is in flight is not stored, so a stale fetch never outlives the invalidation.
+    """
+
+    def __init__(self, max_entries=2048, ttl_seconds=60.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> Future of the running load
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "loads": 0, "invalidations": 0}
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (self.clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(self, key, loader):
+        """Cached value of key, else the result of `await loader()` (None results are not cached)"""
+        value = self.get(key)
+        if value is not None:
+            self.stats["hits"] += 1
+            return value
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            self.stats["loads"] += 1
+            value = await loader()
+        except Exception as e:
+            future.set_exception(e)
+            # Consume the exception when nobody else was waiting on it
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if value is not None and self._inflight.get(key) is future:
+                self.set(key, value)
+            return value
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def invalidate(self, key):
+        self.stats["invalidations"] += 1
+        self._entries.pop(key, None)
+        # Later callers start a fresh load instead of joining the stale one
+        self._inflight.pop(key, None)
+
+    def clear(self):
+        self.stats["invalidations"] += 1
+        self._entries.clear()
+        self._inflight.clear()
+
+    def hit_ratio(self):
+        total = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+        return (self.stats["hits"] + self.stats["coalesced"]) / total if total else 0.0
+
+    def invalidate_matching(self, pattern):
+        """Invalidates every key matching a glob pattern ("analytics:top_regions:*")"""
+        for key in [k for k in list(self._entries) + list(self._inflight) if fnmatchcase(k, pattern)]:
+            self.invalidate(key)
+
+
+def cache_key(namespace, **params):
+    """
+    Canonical key of a parameterised response: None params dropped, names sorted,
+    numbers normalised (10 == 10.0), so equivalent requests share one entry.
+    """
+    parts = []
+    for name in sorted(params):
+        value = params[name]
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = str(value).lower()
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        parts.append(f"{name}={value}")
+    return ":".join([namespace] + parts)
+
+
+def on_grid(params, steps):
+    """
+    True when every param named in steps is None or a multiple of its step, i.e. the
+    params come from a bounded set of values that can safely key long-lived entries.
+    """
+    for name, step in steps.items():
+        value = params.get(name)
+        if value is not None and abs(value / step - round(value / step)) > 1e-9:
+            return False
+    return True
+
+
+class CacheLayer:
+    """
+    Two-tier response cache for the API handlers: a short-lived in-process L1 in front
+    of Redis (one pool per process). Concurrent computations of a key are deduplicated,
+    and a Redis entry past its TTL is still served for `stale_seconds` while one process
+    (guarded by a Redis lock) recomputes it in the background.
+    """
+
+    def __init__(
+        self, redis_url, l1_max_entries=512, l1_ttl_seconds=5.0, stale_seconds=300,
+        lock_seconds=30, encoder=None, clock=time.time
+    ):
+        self.redis = aioredis.from_url(redis_url, decode_responses=True)
+        self.l1 = TTLCache(l1_max_entries, l1_ttl_seconds)
+        self.stale_seconds = stale_seconds
+        self.lock_seconds = lock_seconds
+        self.encoder = encoder
+        self.clock = clock
+        self._refreshing = {}  # key -> background refresh task
+        self.metrics = {}
+
+    def _metric(self, key):
+        return self.metrics.setdefault(key, {
+            "l1_hits": 0, "hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+            "computes": 0, "compute_ms_total": 0.0, "compute_ms_last": 0.0, "errors": 0
+        })
+
+    async def get_or_compute(self, key, compute, ttl_seconds):
+        """Cached value of key, else the result of `await compute()` stored for ttl_seconds"""
+        metric = self._metric(key)
+        value = self.l1.get(key)
+        if value is not None:
+            metric["l1_hits"] += 1
+            return value
+        if key in self.l1._inflight:
+            metric["coalesced"] += 1
+        return await self.l1.get_or_load(key, lambda: self._load(key, compute, ttl_seconds))
+
+    async def _load(self, key, compute, ttl_seconds):
+        metric = self._metric(key)
+        try:
+            envelope = await self.redis.get(key)
+        except Exception as e:
+            print(f"[Cache] Redis read error for {key}: {e}")
+            metric["errors"] += 1
+            envelope = None
+
+        if envelope:
+            envelope = json.loads(envelope)
+            # Plain values written before the envelope format count as misses
+            if not isinstance(envelope, dict) or "fresh_until" not in envelope or "value" not in envelope:
+                envelope = None
+
+        if envelope:
+            if envelope["fresh_until"] > self.clock():
+                metric["hits"] += 1
+            else:
+                metric["stale_hits"] += 1
+                if key not in self._refreshing:
+                    self._refreshing[key] = asyncio.create_task(self._refresh(key, compute, ttl_seconds))
+            return envelope["value"]
+
+        metric["misses"] += 1
+        return await self._compute_and_store(key, compute, ttl_seconds)
+
+    async def _compute_and_store(self, key, compute, ttl_seconds):
+        metric = self._metric(key)
+        start = time.perf_counter()
+        value = await compute()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        metric["computes"] += 1
+        metric["compute_ms_total"] += elapsed_ms
+        metric["compute_ms_last"] = elapsed_ms
+
+        envelope = {"value": value, "fresh_until": self.clock() + ttl_seconds}
+        try:
+            await self.redis.set(
+                key, json.dumps(envelope, cls=self.encoder), ex=int(ttl_seconds + self.stale_seconds)
+            )
+        except Exception as e:
+            print(f"[Cache] Redis write error for {key}: {e}")
+            metric["errors"] += 1
+        return value
+
+    async def _refresh(self, key, compute, ttl_seconds):
+        try:
+            # One process refreshes, the others keep serving the stale value
+            if await self.redis.set(f"lock:{key}", "1", nx=True, ex=self.lock_seconds):
+                try:
+                    self.l1.set(key, await self._compute_and_store(key, compute, ttl_seconds))
+                finally:
+                    await self.redis.delete(f"lock:{key}")
+        except Exception as e:
+            print(f"[Cache] Background refresh error for {key}: {e}")
+            self._metric(key)["errors"] += 1
+        finally:
+            self._refreshing.pop(key, None)
+
+    def invalidate_local(self, pattern):
+        """Drops matching L1 entries (Redis entries are deleted by the writer)"""
+        self.l1.invalidate_matching(pattern)
+
+    def snapshot(self):
+        """Per-key metrics with the average compute time"""
+        return {
+            key: {**m, "compute_ms_avg": round(m["compute_ms_total"] / m["computes"], 2) if m["computes"] else None}
+            for key, m in sorted(self.metrics.items())
+        }
+
+    async def close(self):
+        await self.redis.aclose()
+
+
+class TimeBucketCache:
+    """
+    Aggregates over arbitrary time ranges composed from cached per-bucket partials.
+    Whole UTC days (whole hours from the day `hourly_horizon_hours` back) are kept in
+    Redis: closed days for `closed_ttl_seconds`, closed hours for `recent_ttl_seconds`
+    (backstops for an invalidation racing the write; late events still arrive for recent
+    hours) and the open bucket for `open_ttl_seconds`. Missing buckets are computed in runs of at most
+    `max_run_buckets`, so one aggregation's result stays bounded. The
+    uneven ends of a range, and the pieces around cut points a merge must not straddle
+    (e.g. "last 30 days"), are aggregated directly on every request.
+    """
+
+    DAY_MS = 24 * 3600 * 1000
+    HOUR_MS = 3600 * 1000
+
+    def __init__(
+        self, redis_client, hourly_horizon_hours=48, open_ttl_seconds=15, recent_ttl_seconds=3600,
+        max_run_buckets=31, closed_ttl_seconds=7 * 86400, clock=time.time
+    ):
+        self.redis = redis_client
+        self.hourly_horizon_ms = int(hourly_horizon_hours * self.HOUR_MS)
+        self.open_ttl_seconds = open_ttl_seconds
+        self.recent_ttl_seconds = recent_ttl_seconds
+        self.max_run_buckets = max_run_buckets
+        self.closed_ttl_seconds = closed_ttl_seconds
+        self.clock = clock
+        self.stats = {"bucket_hits": 0, "bucket_misses": 0, "range_queries": 0, "edge_queries": 0, "errors": 0}
+
+    @staticmethod
+    def key(namespace, bucket_ms, bucket_start, params):
+        # Bucket first, so one event invalidates partial:{size}:{start}:* across namespaces
+        return f"partial:{bucket_ms}:{bucket_start}:{cache_key(namespace, **params)}"
+
+    def plan(self, start_ms, end_ms, now_ms, cuts=()):
+        """
+        ([(bucket start, bucket size)], [(edge start, edge end)]) covering the inclusive
+        range; no bucket or edge crosses a cut point.
+        """
+        hourly_from = (now_ms - self.hourly_horizon_ms) // self.DAY_MS * self.DAY_MS
+        bounds = sorted({int(start_ms), *(int(c) for c in cuts if start_ms < c <= end_ms)})
+        ends = [b - 1 for b in bounds[1:]] + [int(end_ms)]
+
+        buckets, edges = [], []
+        for a, b in zip(bounds, ends):
+            t = a
+            while t <= b:
+                size = self.DAY_MS if t < hourly_from else self.HOUR_MS
+                bucket = t - t % size
+                bucket_end = bucket + size - 1
+                if bucket == t and bucket_end <= b:
+                    buckets.append((bucket, size))
+                else:
+                    edges.append((t, min(bucket_end, b)))
+                t = min(bucket_end, b) + 1
+        return buckets, edges
+
+    async def compose(self, namespace, start_ms, end_ms, compute, cuts=(), now_ms=None, store=True, **params):
+        """
+        [(segment start, segment end, partial)] of the non-empty segments of the range.
+        `await compute(range_start, range_end, bucket_ms)` returns {bucket start: partial}
+        for every non-empty bucket of the range (one entry keyed by range_start when
+        bucket_ms is None); params identify the filters the partials were computed with.
+        With store=False (one-off filters) nothing is cached: each piece between cut
+        points is aggregated directly.
+        """
+        now_ms = int(self.clock() * 1000) if now_ms is None else now_ms
+        if store:
+            buckets, edges = self.plan(start_ms, end_ms, now_ms, cuts)
+        else:
+            bounds = sorted({int(start_ms), *(int(c) for c in cuts if start_ms < c <= end_ms)})
+            buckets, edges = [], list(zip(bounds, [b - 1 for b in bounds[1:]] + [int(end_ms)]))
+        keys = [self.key(namespace, size, start, params) for start, size in buckets]
+
+        cached = [None] * len(keys)
+        if keys:
+            try:
+                cached = await self.redis.mget(keys)
+            except Exception as e:
+                print(f"[PartialCache] Redis read error: {e}")
+                self.stats["errors"] += 1
+
+        segments, missing = [], []
+        for (start, size), key, value in zip(buckets, keys, cached):
+            if value is None:
+                missing.append((start, size, key))
+                continue
+            self.stats["bucket_hits"] += 1
+            partial = json.loads(value)
+            if partial is not None:
+                segments.append((start, start + size - 1, partial))
+        self.stats["bucket_misses"] += len(missing)
+
+        # Contiguous missing buckets of one size are computed by a single grouped aggregation
+        runs = []
+        for start, size, key in missing:
+            run = runs[-1] if runs else None
+            if run and len(run) < self.max_run_buckets and run[-1][1] == size and run[-1][0] + size == start:
+                runs[-1].append((start, size, key))
+            else:
+                runs.append([(start, size, key)])
+
+        async def fill(run):
+            size = run[0][1]
+            self.stats["range_queries"] += 1
+            computed = await compute(run[0][0], run[-1][0] + size - 1, size)
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for start, _, key in run:
+                        if start + size > now_ms:
+                            ttl = self.open_ttl_seconds
+                        else:
+                            ttl = self.recent_ttl_seconds if size == self.HOUR_MS else self.closed_ttl_seconds
+                        pipe.set(key, json.dumps(computed.get(start)), ex=ttl)
+                    await pipe.execute()
+            except Exception as e:
+                print(f"[PartialCache] Redis write error: {e}")
+                self.stats["errors"] += 1
+            return [(start, start + size - 1, computed[start]) for start, _, _ in run if computed.get(start) is not None]
+
+        async def edge(a, b):
+            self.stats["edge_queries"] += 1
+            partial = (await compute(a, b, None)).get(a)
+            return [(a, b, partial)] if partial is not None else []
+
+        for result in await asyncio.gather(*[fill(run) for run in runs], *[edge(a, b) for a, b in edges]):
+            segments.extend(result)
+        return sorted(segments, key=lambda segment: segment[0])
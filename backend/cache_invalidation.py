@@ -0,0 +1,87 @@
+# Redis cache keys of the API, and which MongoDB changes make them stale.
+# Keys ending in "*" cover every parameterised variant (cache.cache_key, e.g. top_regions:limit=10).
+
+MAG_DIST = "analytics:mag_dist"
+MAG_TRENDS = "analytics:mag_trends"
+DEPTH_MAG = "analytics:depth_mag"
+TOP_REGIONS = "analytics:top_regions:*"
+RISK_SCORES = "analytics:risk_scores"
+UNUSUAL_ACTIVITY = "analytics:unusual_activity"
+AFTERSHOCKS = "analytics:aftershocks:*"
+CASCADES = "analytics:cascades:*"
+DISTRIBUTIONS = "analytics:distributions*"
+DASHBOARD = "analytics:dashboard*"
+CLUSTERS = "clusters:all"
+# Time-bucket partials (cache.TimeBucketCache): partial:{bucket ms}:{bucket start}:{namespace}...
+PARTIALS = "partial:*"
+DAY_MS = 24 * 3600 * 1000
+HOUR_MS = 3600 * 1000
+
+# Every key derived from the earthquake catalog (Neo4j sequences are linked on the same ingest)
+EARTHQUAKE_KEYS = {
+    MAG_DIST, MAG_TRENDS, DEPTH_MAG, TOP_REGIONS, RISK_SCORES, UNUSUAL_ACTIVITY, AFTERSHOCKS, CASCADES,
+    DISTRIBUTIONS, DASHBOARD
+}
+
+# Everything the catalog invalidator manages, flushed when changes may have been missed
+CATALOG_KEYS = EARTHQUAKE_KEYS | {CLUSTERS, PARTIALS}
+
+# Keys affected by an update of one earthquake field; other fields (cluster_id, url, ...) affect none
+EARTHQUAKE_FIELD_KEYS = {
+    "time": {MAG_TRENDS, RISK_SCORES, UNUSUAL_ACTIVITY, TOP_REGIONS, AFTERSHOCKS, CASCADES, DASHBOARD},
+    "magnitude": {MAG_DIST, DEPTH_MAG, RISK_SCORES, AFTERSHOCKS, CASCADES, DISTRIBUTIONS, DASHBOARD},
+    "depth": {DEPTH_MAG, DISTRIBUTIONS, DASHBOARD},
+    "place": {DEPTH_MAG},
+    "region": {TOP_REGIONS, RISK_SCORES, UNUSUAL_ACTIVITY, DISTRIBUTIONS, DASHBOARD},
+    "latitude": {AFTERSHOCKS, CASCADES, DASHBOARD},
+    "longitude": {AFTERSHOCKS, CASCADES, DASHBOARD},
+}
+
+# Fields the heatmap and dashboard partials are computed from
+PARTIAL_FIELDS = {"time", "magnitude", "depth", "place", "region", "latitude", "longitude"}
+
+
+def partial_cache_keys(time_ms):
+    """Patterns of the day and hour partials holding an event at time_ms (every partial when unknown)"""
+    if time_ms is None:
+        return {PARTIALS}
+    time_ms = int(time_ms)
+    return {
+        f"partial:{DAY_MS}:{time_ms - time_ms % DAY_MS}:*",
+        f"partial:{HOUR_MS}:{time_ms - time_ms % HOUR_MS}:*"
+    }
+
+
+def affected_cache_keys(change):
+    """Cache keys made stale by one change event on the earthquakes/earthquakes_raw/clusters collections"""
+    collection = change.get("ns", {}).get("coll")
+    if collection == "clusters":
+        return {CLUSTERS}
+
+    # Time of the event after the write (deletes have none)
+    time_ms = (change.get("fullDocument") or {}).get("time")
+
+    if change.get("operationType") != "update" or collection != "earthquakes":
+        # Inserts, replaces and deletes, and raw-collection writes in time-series mode (no field detail)
+        return set(EARTHQUAKE_KEYS) | partial_cache_keys(time_ms)
+
+    keys = set()
+    description = change.get("updateDescription", {})
+    fields = {field.split(".")[0] for field in list(description.get("updatedFields", {})) + description.get("removedFields", [])}
+    for field in fields:
+        keys |= EARTHQUAKE_FIELD_KEYS.get(field, set())
+    if fields & PARTIAL_FIELDS:
+        # A changed time leaves a stale copy in the old bucket, which the update does not name
+        keys |= partial_cache_keys(None if "time" in fields else time_ms)
+    return keys
+
+
+async def delete_cache_keys(redis_client, keys):
+    """Deletes the keys, expanding "*" patterns with SCAN; returns the number removed"""
+    names = []
+    for key in keys:
+        if key.endswith("*"):
+            names.extend([name async for name in redis_client.scan_iter(match=key)])
+        else:
+            names.append(key)
+    return await redis_client.delete(*names) if names else 0
@@ -2,17 +2,38 @@ import numpy as np
 from sklearn.cluster import DBSCAN
 from datetime import datetime
 import pandas as pd
+import hashlib
+import json
 from db_mongo import mongo_handler
-from config import CLUSTERING_DISTANCE_KM, CLUSTERING_TIME_WINDOW_HOURS, CLUSTERING_MIN_SAMPLES
+from config import (
+    CLUSTERING_DISTANCE_KM, CLUSTERING_TIME_WINDOW_HOURS, CLUSTERING_MIN_SAMPLES,
+    CLUSTERING_LOOKBACK_DAYS, CLUSTERING_SWEEP_EPS_FACTOR,
+    CLUSTERING_MODE, CLUSTERING_TILE_SIZE_EPS, CLUSTERING_TILE_WORKERS
+)
+from clustering_hierarchy import ReachabilityHierarchy
+from tiled_clustering import TiledDBSCAN
+from region_normalizer import place_label
 import asyncio
 
+HOUR_MS = 3600 * 1000
+STREAM_CHUNK_SIZE = 10000
+CLUSTERING_FIELDS = {
+    "_id": 0, "id": 1, "latitude": 1, "longitude": 1,
+    "time": 1, "magnitude": 1, "depth": 1, "place": 1
+}
+
 class ClusteringEngine:
-    def __init__(self):
-        self.db = mongo_handler
+    def __init__(self, db=None):
+        # Any object with MongoHandler's clustering methods works as a data source
+        self.db = db or mongo_handler
         # Default fallback if DB config is missing
         self.default_eps_km = CLUSTERING_DISTANCE_KM
         self.default_time_hours = CLUSTERING_TIME_WINDOW_HOURS
         self.default_min_samples = CLUSTERING_MIN_SAMPLES
+        self.fetch_limit = 5000
+        # "global" clusters the newest fetch_limit events in one DBSCAN run,
+        # "tiled" streams the full window and clusters it tile by tile
+        self.mode = CLUSTERING_MODE
 
     async def get_config(self):
         """Fetch dynamic config from DB or use defaults."""
@@ -36,7 +57,7 @@ class ClusteringEngine:
         1. Convert (Lat, Lon) -> (X, Y, Z) on Earth sphere? No, DBSCAN needs specific distance.
         2. Proj: Lat * 111km, Lon * 111km * cos(Lat).
         """
-        if not earthquakes:
+        if earthquakes is None or len(earthquakes) == 0:
             return None, None
 
         df = pd.DataFrame(earthquakes)
@@ -77,103 +98,90 @@ class ClusteringEngine:
         
         return df, coords
 
-    async def run_clustering(self, recent_only=False):
+    @staticmethod
+    def _cache_key(config, watermark, scope):
         """
-        Main method to run the clustering process.
+        Hash of the normalized config, the catalog watermark (newest event time and write version)
+        and the query scope (time window / bbox) a result set was computed for.
         """
-        config = await self.get_config()
+        normalized = {
+            "eps_km": round(float(config["eps_km"]), 3),
+            "time_window_hours": round(float(config["time_window_hours"]), 3),
+            "min_samples": int(config["min_samples"]),
+            "watermark": watermark,
+            "scope": {k: v for k, v in sorted(scope.items()) if v is not None}
+        }
+        payload = json.dumps(normalized, sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _dbscan_labels(self, coords, config):
         eps_km = config["eps_km"]
         time_window = config["time_window_hours"]
         min_samples = config["min_samples"]
 
-        # 1. Fetch data
-        # For full re-clustering, we might fetch last 30 days
-        #For incremental, we'd need a more complex merging strategy.
-        # Let's start with "Re-cluster Active Window" (e.g. last 7 days)
-        # 7 days = 168 hours. ST-DBSCAN with 48h window needs meaningful history.
-        
-        lookback_days = 7
-        start_time = int((datetime.now().timestamp() - (lookback_days * 24 * 3600)) * 1000)
-        
-        quakes = await self.db.get_earthquakes(start_time=start_time, limit=5000)
-        if not quakes:
-            print("[Clustering] No earthquakes to cluster.")
-            return
-
-        df, coords = self._prepare_data(quakes)
-        if df is None:
-            return
-
         # 3. Scale Features for DBSCAN
-        # We want: 
+        # We want:
         # - dist(p1, p2) <= eps implies spatial_dist <= eps_km AND time_diff <= time_window
         # This is essentially Chebyshev distance if we scale correctly.
         # Scale spatial to 1.0 = eps_km
         # Scale temporal to 1.0 = time_window
-        
+
         X = np.column_stack((
             coords["lat_km"] / eps_km,
             coords["lon_km"] / eps_km,
             coords["hours_rel"] / time_window
         ))
-        
+
         # 4. Run DBSCAN
-        # metric='chebyshev' means max(|x1-x2|, |y1-y2|, ...). 
+        # metric='chebyshev' means max(|x1-x2|, |y1-y2|, ...).
         # With scaled vars, distance <= 1.0 ensures all dimensions are within limits.
-        db = DBSCAN(eps=1.0, min_samples=min_samples, metric='chebyshev')
-        labels = db.fit_predict(X)
-        
+        if self.mode == "tiled":
+            # Same labels as the global run; neighbor lists exist for one query chunk per in-flight tile
+            db = TiledDBSCAN(
+                min_samples=min_samples,
+                tile_size=CLUSTERING_TILE_SIZE_EPS,
+                max_workers=CLUSTERING_TILE_WORKERS
+            )
+        else:
+            db = DBSCAN(eps=1.0, min_samples=min_samples, metric='chebyshev')
+        return db.fit_predict(X)
+
+    def _summarize(self, df, labels, config):
+        """
+        Turn DBSCAN labels into a compact result set: assignments grouped by
+        stable cluster ID, noise event IDs and cluster metadata.
+        """
         # 5. Process Results
+        # -1 is Noise in DBSCAN. Noise events get cluster_id = None.
+        # DBSCAN labels are arbitrary (0, 1, 2) and change between runs, so each
+        # cluster gets a stable ID derived from its earliest event.
         df["cluster_id"] = labels
-        
-        # -1 is Noise in DBSCAN. We set cluster_id = None for noise
-        # Or keep it as -1? Let's use string IDs for valid clusters, None for noise.
-        
-        updates = []
-        clusters_metadata = {}
-        
-        for idx, row in df.iterrows():
-            cluster_label = row["cluster_id"]
-            eq_id = row["id"]
-            
-            if cluster_label != -1:
-                # Generate a stable-ish cluster ID? 
-                # DBSCAN labels are arbitrary (0, 1, 2). 
-                # If we re-run, 0 might become 1.
-                # A heuristic: Cluster ID = "cluster_{date}_{min_event_id}" 
-                # For now, let's just use "gen_{run_timestamp}_{label}" to ensure unique sessions,
-                # but this breaks persistence.
-                # Better: Use the ID of the 'core' event or earliest event in cluster.
-                pass
-        
+
         # Group by label to find stable IDs
         grouped = df[df["cluster_id"] != -1].groupby("cluster_id")
-        
-        valid_cluster_map = {} # label -> stable_id
-        
-        print(f"[Clustering] Found {len(grouped)} potential clusters using eps={eps_km}km, min_samples={min_samples}")
-        
+
+        assignments = {} # stable_id -> [event ids]
+        clusters_metadata = []
+
+        print(f"[Clustering] Found {len(grouped)} potential clusters using eps={config['eps_km']}km, min_samples={config['min_samples']}")
+
         for label, group in grouped:
-            # Stable ID = 'cl_{earliest_time}_{lat}_{lon}'
+            # Stable ID = 'cl_{earliest event id}'
             earliest = group.loc[group["time"].idxmin()]
-            # Create a deterministic hash/ID based on the main event
             stable_id = f"cl_{earliest['id']}"
-            valid_cluster_map[label] = stable_id
-            
+            assignments[stable_id] = group["id"].tolist()
+
             # Compute Metadata
             center_lat = group["latitude"].mean()
             center_lon = group["longitude"].mean()
             avg_mag = group["magnitude"].mean()
             count = len(group)
-            
-            # Extract representative region (from largest earthquake)
+
+            # Representative region (from largest earthquake), e.g. "10km SSW of X, CA" -> "X, California"
             largest_eq = group.loc[group["magnitude"].idxmax()]
-            region = largest_eq.get("place", "Unknown Region")
-            # Try to clean up region name (e.g. "10km SSW of X" -> "X")
-            if " of " in region:
-                region = region.split(" of ")[1]
+            region = place_label(largest_eq.get("place"))
 
-            clusters_metadata[stable_id] = {
+            clusters_metadata.append({
                 "cluster_id": stable_id,
                 "created_at": int(datetime.now().timestamp() * 1000),
                 "centroid": {
@@ -185,37 +193,217 @@ class ClusteringEngine:
                 "region": region,
                 "start_time": int(group["time"].min()),
                 "end_time": int(group["time"].max())
-            }
-            # print(f"[Clustering] Cluster {stable_id}: {count} events, Region: {region}")
+            })
+
+        return {
+            "config": config,
+            "assignments": assignments,
+            "noise": df.loc[df["cluster_id"] == -1, "id"].tolist(),
+            "clusters": clusters_metadata
+        }
+
+    async def _fetch(self, **query):
+        """
+        Fetch the events to cluster. Global mode keeps the newest `fetch_limit`
+        events; tiled mode streams the whole window in projected batches, kept as
+        typed column arrays (no per-event dicts beyond one batch).
+        """
+        if self.mode != "tiled":
+            return await self.db.get_earthquakes(limit=self.fetch_limit, **query)
+
+        columns, batch = {field: [] for field, keep in CLUSTERING_FIELDS.items() if keep}, []
+
+        def flush():
+            for field, parts in columns.items():
+                # Missing numbers become NaN and are dropped by _prepare_data
+                dtype = object if field in ("id", "place") else np.float64
+                parts.append(np.array([doc.get(field) for doc in batch], dtype=dtype))
+            batch.clear()
+
+        async for doc in self.db.iter_earthquakes(projection=CLUSTERING_FIELDS, **query):
+            batch.append(doc)
+            if len(batch) >= STREAM_CHUNK_SIZE:
+                flush()
+        if batch:
+            flush()
+        if not columns["id"]:
+            return None
+        return pd.DataFrame({field: np.concatenate(parts) for field, parts in columns.items()})
+
+    def _active_scope(self):
+        """
+        Query scope of the active window (last 7 days).
+        The window start is floored to the hour so repeated runs share cache entries.
+        """
+        lookback_ms = CLUSTERING_LOOKBACK_DAYS * 24 * HOUR_MS
+        start_time = (int(datetime.now().timestamp() * 1000) - lookback_ms) // HOUR_MS * HOUR_MS
+        return {"start_time": start_time}
+
+    async def _load_hierarchy(self, watermark, scope):
+        """Return the persisted hierarchy if it was built on the same data."""
+        doc = await self.db.get_clustering_hierarchy()
+        if not doc or doc.get("watermark") != watermark or doc.get("scope") != scope:
+            return None
+        return ReachabilityHierarchy.from_document(doc)
+
+    async def _build_hierarchy(self, df, coords, config, eps_min, eps_max, watermark, scope):
+        hierarchy = ReachabilityHierarchy.build(
+            df, coords, eps_min, eps_max, config["time_window_hours"], config["min_samples"]
+        )
+        persisted = await self.db.set_clustering_hierarchy(
+            {**hierarchy.to_document(), "watermark": watermark, "scope": scope}
+        )
+        if persisted:
+            print(f"[Clustering] Persisted reachability hierarchy for eps {eps_min:.1f}-{eps_max:.1f}km")
+        return hierarchy
+
+    async def _cluster_with_cache(self, config, scope, persist_hierarchy=False, **query):
+        """
+        Return (result, cache_hit) for the given config and query scope.
+        Result sets are memoized by config hash + data watermark, so flipping
+        back to a recently used preset skips the fetch and DBSCAN entirely.
+        For the active window, an eps change within the persisted hierarchy's
+        range is relabeled from the hierarchy instead of re-running DBSCAN.
+        """
+        watermark = await self.db.get_catalog_watermark()
+        if watermark is None:
+            return None, False
+
+        cache_key = self._cache_key(config, watermark, scope)
+        cached = await self.db.get_cached_clustering(cache_key)
+        if cached:
+            print(f"[Clustering] Cache hit for config {config} (watermark={watermark})")
+            return cached, True
+
+        hierarchy = await self._load_hierarchy(watermark, scope) if persist_hierarchy else None
+        if hierarchy and hierarchy.covers(config["eps_km"], config["time_window_hours"], config["min_samples"]):
+            print(f"[Clustering] Relabeling from persisted hierarchy at eps={config['eps_km']}km")
+            df = pd.DataFrame(hierarchy.to_frame_columns())
+            result = self._summarize(df, hierarchy.labels_at(config["eps_km"]), config)
+        else:
+            quakes = await self._fetch(**query)
+            df, coords = self._prepare_data(quakes)
+            if df is None:
+                return None, False
+
+            result = self._summarize(df, self._dbscan_labels(coords, config), config)
+            # The hierarchy is kept in a single document, so it is only built for capped global runs
+            if persist_hierarchy and self.mode != "tiled":
+                eps_km = config["eps_km"]
+                await self._build_hierarchy(
+                    df, coords, config,
+                    eps_km / CLUSTERING_SWEEP_EPS_FACTOR, eps_km * CLUSTERING_SWEEP_EPS_FACTOR,
+                    watermark, scope
+                )
+
+        await self.db.set_cached_clustering(
+            cache_key, {**result, "watermark": watermark, "scope": scope}
+        )
+        return result, False
+
+    async def sweep(self, eps_min, eps_max, steps=20, include_labels=True):
+        """
+        Cluster counts (and optionally labels) for a range of eps values over the
+        active window. The neighbor structure is computed once and persisted,
+        so later sweeps and config changes within the range need no recompute.
+        The hierarchy is one in-memory structure and one document, so the sweep always
+        covers the newest `fetch_limit` events, also in tiled mode.
+        """
+        config = await self.get_config()
+        scope = self._active_scope()
+        if self.mode == "tiled":
+            # Keyed apart from the full window, so run_clustering never relabels from it
+            scope = {**scope, "limit": self.fetch_limit}
+        watermark = await self.db.get_catalog_watermark()
+        if watermark is None:
+            return {"ids": [], "steps": []}
+
+        hierarchy = await self._load_hierarchy(watermark, scope)
+        if not hierarchy or not hierarchy.covers(eps_max, config["time_window_hours"], config["min_samples"]):
+            quakes = await self.db.get_earthquakes(limit=self.fetch_limit, start_time=scope["start_time"])
+            df, coords = self._prepare_data(quakes)
+            if df is None:
+                return {"ids": [], "steps": []}
+            hierarchy = await self._build_hierarchy(df, coords, config, eps_min, eps_max, watermark, scope)
+
+        eps_values = np.linspace(eps_min, eps_max, max(int(steps), 1))
+        return {
+            "config": config,
+            "ids": hierarchy.ids if include_labels else [],
+            "steps": hierarchy.sweep(eps_values, include_labels=include_labels)
+        }
+
+    async def run_clustering(self, recent_only=False):
+        """
+        Main method to run the clustering process.
+        """
+        config = await self.get_config()
+
+        # Re-cluster the active window (last 7 days).
+        # ST-DBSCAN with a 48h window needs meaningful history.
+        scope = self._active_scope()
+        result, _ = await self._cluster_with_cache(
+            config, scope, persist_hierarchy=True, **scope
+        )
+        if result is None:
+            print("[Clustering] No earthquakes to cluster.")
+            return
 
         # Prepare bulk updates
-        updates = []
-        for idx, row in df.iterrows():
-            label = row["cluster_id"]
-            if label != -1:
-                stable_id = valid_cluster_map[label]
-                updates.append((row["id"], stable_id))
-            else:
-                 # Mark noise as null cluster_id
-                updates.append((row["id"], None))
-        
+        updates = [
+            (eq_id, stable_id)
+            for stable_id, eq_ids in result["assignments"].items()
+            for eq_id in eq_ids
+        ]
+        # Mark noise as null cluster_id
+        updates.extend((eq_id, None) for eq_id in result["noise"])
+        clusters_metadata = result["clusters"]
+
         # 6. Write to DB
         # Always clear old clusters first to prevent stale data accumulation
         await self.db.clear_clusters()
-        
+
         # Also clear Neo4j clusters
         from db_neo4j import neo4j_handler
         neo4j_handler.clear_clusters()
 
         if updates:
             await self.db.update_earthquakes_with_cluster_id(updates)
-            
+
         if clusters_metadata:
-            await self.db.update_clusters(list(clusters_metadata.values()))
+            await self.db.update_clusters(clusters_metadata)
             # Update Neo4j with new clusters
-            neo4j_handler.sync_clusters(list(clusters_metadata.values()))
-            # Update spatial relationships in graph
-            neo4j_handler.create_near_relationships()
-            
+            neo4j_handler.sync_clusters(clusters_metadata)
+            # Update spatial relationships in graph (clustering window only)
+            neo4j_handler.create_near_relationships(start_time=scope["start_time"])
+
         print(f"[Clustering] Completed. Found {len(clusters_metadata)} clusters.")
         return len(clusters_metadata)
+
+    async def run_adhoc(
+        self, start_time=None, end_time=None,
+        north=None, south=None, east=None, west=None,
+        overrides=None
+    ):
+        """
+        Cluster an arbitrary bbox/time window without touching the persisted
+        clusters. Shares the result cache with run_clustering.
+        """
+        config = await self.get_config()
+        config.update({k: v for k, v in (overrides or {}).items() if v is not None})
+
+        scope = {
+            "start_time": start_time, "end_time": end_time,
+            "north": north, "south": south, "east": east, "west": west
+        }
+        result, cache_hit = await self._cluster_with_cache(config, scope, **scope)
+        if result is None:
+            return {"cache_hit": False, "config": config, "clusters": [], "assignments": {}, "noise": []}
+
+        return {
+            "cache_hit": cache_hit,
+            "config": config,
+            "clusters": result["clusters"],
+            "assignments": result["assignments"],
+            "noise": result["noise"]
+        }
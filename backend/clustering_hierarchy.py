@@ -0,0 +1,202 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, minimum_spanning_tree
+from sklearn.neighbors import NearestNeighbors
+
+
+class ReachabilityHierarchy:
+    """
+    Single-linkage hierarchy over DBSCAN mutual reachability distances.
+
+    The neighbor structure is computed once at eps_max. Core distances plus the
+    minimum spanning tree of mutual reachability reproduce DBSCAN's core
+    clusters for any eps <= eps_max, and each point's (min_samples - 1) nearest
+    neighbors are enough to attach border points the same way DBSCAN does.
+    Labels are therefore identical to a fresh DBSCAN run at that eps.
+
+    Distances are the spatial Chebyshev distance in km between events that lie
+    within time_window_hours of each other (the same metric ClusteringEngine
+    feeds to DBSCAN); the time window is fixed for the whole hierarchy.
+    """
+
+    ARRAY_FIELDS = {
+        "latitude": np.float64, "longitude": np.float64, "time": np.int64,
+        "magnitude": np.float64, "core_dist": np.float64,
+        "mst_u": np.int32, "mst_v": np.int32, "mst_w": np.float64,
+        "knn_idx": np.int32, "knn_dist": np.float64
+    }
+
+    def __init__(self, ids, places, arrays, eps_min, eps_max, time_window_hours, min_samples):
+        self.ids = list(ids)
+        self.places = list(places)
+        self.eps_min = float(eps_min)
+        self.eps_max = float(eps_max)
+        self.time_window_hours = float(time_window_hours)
+        self.min_samples = int(min_samples)
+        for name in self.ARRAY_FIELDS:
+            setattr(self, name, arrays[name])
+        k = max(self.min_samples - 1, 0)
+        self.knn_idx = self.knn_idx.reshape(len(self.ids), k)
+        self.knn_dist = self.knn_dist.reshape(len(self.ids), k)
+
+    @classmethod
+    def build(cls, df, coords, eps_min, eps_max, time_window_hours, min_samples):
+        """Build the hierarchy from ClusteringEngine._prepare_data output."""
+        n = len(df)
+        k = max(int(min_samples) - 1, 0)
+        lat_km = coords["lat_km"].to_numpy(dtype=np.float64)
+        lon_km = coords["lon_km"].to_numpy(dtype=np.float64)
+
+        # Scale time so that a Chebyshev radius of eps_max also bounds dt by the time window
+        X = np.column_stack((
+            lat_km,
+            lon_km,
+            coords["hours_rel"].to_numpy(dtype=np.float64) * eps_max / time_window_hours
+        ))
+        neighborhoods = NearestNeighbors(radius=eps_max, metric="chebyshev").fit(X).radius_neighbors(
+            X, return_distance=False
+        )
+
+        rows = np.repeat(np.arange(n), [len(nb) for nb in neighborhoods])
+        cols = np.concatenate(neighborhoods) if n else np.empty(0, dtype=np.int64)
+        keep = rows != cols
+        rows, cols = rows[keep], cols[keep]
+        dist = np.maximum(np.abs(lat_km[rows] - lat_km[cols]), np.abs(lon_km[rows] - lon_km[cols]))
+
+        # Rank every neighbor by distance within its row
+        order = np.lexsort((dist, rows))
+        rows, cols, dist = rows[order], cols[order], dist[order]
+        counts = np.bincount(rows, minlength=n)
+        starts = np.cumsum(counts) - counts
+        rank = np.arange(len(rows)) - starts[rows]
+
+        # DBSCAN counts the point itself, so core distance is the k-th other neighbor
+        core_dist = np.full(n, np.inf)
+        if k == 0:
+            core_dist[:] = 0.0
+        else:
+            at_k = rank == k - 1
+            core_dist[rows[at_k]] = dist[at_k]
+
+        knn_idx = np.full((n, k), -1, dtype=np.int32)
+        knn_dist = np.full((n, k), np.inf)
+        within_k = rank < k
+        knn_idx[rows[within_k], rank[within_k]] = cols[within_k]
+        knn_dist[rows[within_k], rank[within_k]] = dist[within_k]
+
+        # Minimum spanning tree over mutual reachability (upper triangle only)
+        upper = rows < cols
+        u, v = rows[upper], cols[upper]
+        mreach = np.maximum(np.maximum(core_dist[u], core_dist[v]), dist[upper])
+        finite = np.isfinite(mreach)
+        u, v, mreach = u[finite], v[finite], mreach[finite]
+        # Offset weights by 1 because csgraph treats zero entries as missing edges
+        graph = csr_matrix((mreach + 1.0, (u, v)), shape=(n, n))
+        mst = minimum_spanning_tree(graph).tocoo()
+
+        arrays = {
+            "latitude": df["latitude"].to_numpy(dtype=np.float64),
+            "longitude": df["longitude"].to_numpy(dtype=np.float64),
+            "time": df["time"].to_numpy(dtype=np.int64),
+            "magnitude": df["magnitude"].to_numpy(dtype=np.float64),
+            "core_dist": core_dist,
+            "mst_u": mst.row.astype(np.int32),
+            "mst_v": mst.col.astype(np.int32),
+            "mst_w": mst.data - 1.0,
+            "knn_idx": knn_idx,
+            "knn_dist": knn_dist
+        }
+        places = df["place"].fillna("Unknown Region").tolist() if "place" in df else ["Unknown Region"] * n
+        return cls(df["id"].tolist(), places, arrays, eps_min, eps_max, time_window_hours, min_samples)
+
+    def covers(self, eps_km, time_window_hours, min_samples):
+        return (
+            eps_km <= self.eps_max
+            and float(time_window_hours) == self.time_window_hours
+            and int(min_samples) == self.min_samples
+        )
+
+    def labels_at(self, eps_km):
+        """DBSCAN labels (-1 = noise) at the given eps, numbered like sklearn's DBSCAN."""
+        n = len(self.ids)
+        labels = np.full(n, -1, dtype=np.int64)
+        is_core = self.core_dist <= eps_km
+        if not is_core.any():
+            return labels
+
+        linked = self.mst_w <= eps_km
+        graph = csr_matrix(
+            (np.ones(linked.sum()), (self.mst_u[linked], self.mst_v[linked])), shape=(n, n)
+        )
+        _, component = connected_components(graph, directed=False)
+
+        # DBSCAN numbers clusters in order of their lowest-index core point
+        core_idx = np.flatnonzero(is_core)
+        seed_components = np.unique(component[core_idx], return_index=True)
+        seeds = core_idx[seed_components[1]]
+        ranked = seed_components[0][np.argsort(seeds)]
+        label_of_component = np.full(component.max() + 1, -1, dtype=np.int64)
+        label_of_component[ranked] = np.arange(len(ranked))
+        labels[is_core] = label_of_component[component[is_core]]
+
+        # Border points join the earliest-numbered cluster among their core neighbors
+        if self.knn_idx.shape[1]:
+            border = np.flatnonzero(~is_core)
+            neighbors = self.knn_idx[border]
+            reachable = (self.knn_dist[border] <= eps_km) & (neighbors >= 0)
+            reachable &= is_core[np.where(neighbors >= 0, neighbors, 0)]
+            candidate = np.where(reachable, labels[np.where(neighbors >= 0, neighbors, 0)], np.iinfo(np.int64).max)
+            best = candidate.min(axis=1)
+            attached = best != np.iinfo(np.int64).max
+            labels[border[attached]] = best[attached]
+
+        return labels
+
+    def sweep(self, eps_values, include_labels=True):
+        steps = []
+        for eps_km in eps_values:
+            labels = self.labels_at(eps_km)
+            step = {
+                "eps_km": float(eps_km),
+                "n_clusters": int(labels.max() + 1),
+                "n_noise": int((labels == -1).sum())
+            }
+            if include_labels:
+                step["labels"] = labels.tolist()
+            steps.append(step)
+        return steps
+
+    def to_frame_columns(self):
+        """Columns needed by ClusteringEngine to summarize clusters."""
+        return {
+            "id": self.ids,
+            "place": self.places,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "time": self.time,
+            "magnitude": self.magnitude
+        }
+
+    def to_document(self):
+        doc = {
+            "ids": self.ids,
+            "places": self.places,
+            "eps_min": self.eps_min,
+            "eps_max": self.eps_max,
+            "time_window_hours": self.time_window_hours,
+            "min_samples": self.min_samples
+        }
+        for name, dtype in self.ARRAY_FIELDS.items():
+            doc[name] = np.ascontiguousarray(getattr(self, name), dtype=dtype).tobytes()
+        return doc
+
+    @classmethod
+    def from_document(cls, doc):
+        arrays = {
+            name: np.frombuffer(doc[name], dtype=dtype)
+            for name, dtype in cls.ARRAY_FIELDS.items()
+        }
+        return cls(
+            doc["ids"], doc["places"], arrays,
+            doc["eps_min"], doc["eps_max"], doc["time_window_hours"], doc["min_samples"]
+        )
@@ -9,10 +9,40 @@ STREAM_KEY = "earthquake_stream"
 LIVE_CHANNEL = "live_earthquakes"
 EVENT_BUFFER_KEY = "recent_events"
 BUFFER_SIZE = 500
+# Event detail cache (per API process), invalidated by event id over pub/sub ("*" clears it)
+EVENT_CACHE_CHANNEL = "event_cache_invalidation"
+EVENT_CACHE_MAX_ENTRIES = int(os.getenv("EVENT_CACHE_MAX_ENTRIES", 2048))
+EVENT_CACHE_TTL_SECONDS = float(os.getenv("EVENT_CACHE_TTL_SECONDS", 60))
+# Analytics responses in Redis; the worker deletes stale keys on catalog changes, the TTL is a backstop
+ANALYTICS_CACHE_TTL_SECONDS = int(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", 3600))
+ANALYTICS_WINDOW_CACHE_TTL_SECONDS = 600  # sliding "last N hours/days" windows also age without new data
+ANALYTICS_INVALIDATION_DEBOUNCE_SECONDS = float(os.getenv("ANALYTICS_INVALIDATION_DEBOUNCE_SECONDS", 2))
+ANALYTICS_CACHE_CHANNEL = "analytics_cache_invalidation"  # JSON list of invalidated key patterns
+# Response cache layer: in-process L1 in front of Redis; expired Redis entries are
+# served for CACHE_STALE_SECONDS more while one process recomputes them
+CACHE_L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", 512))
+CACHE_L1_TTL_SECONDS = float(os.getenv("CACHE_L1_TTL_SECONDS", 5))
+CACHE_STALE_SECONDS = int(os.getenv("CACHE_STALE_SECONDS", 300))
+# Time-range queries (heatmap, dashboard) composed from cached per-bucket partials:
+# daily buckets, hourly from the day this many hours back
+PARTIAL_CACHE_HOURLY_HORIZON_HOURS = int(os.getenv("PARTIAL_CACHE_HOURLY_HORIZON_HOURS", 48))
+PARTIAL_CACHE_OPEN_TTL_SECONDS = 15  # bucket still receiving events
+PARTIAL_CACHE_CLOSED_TTL_SECONDS = int(os.getenv("PARTIAL_CACHE_CLOSED_TTL_SECONDS", 7 * 86400))
+# Missing buckets computed per aggregation; bounds the dashboard's single $facet document (16 MB)
+PARTIAL_CACHE_MAX_RUN_BUCKETS = int(os.getenv("PARTIAL_CACHE_MAX_RUN_BUCKETS", 31))
+# Recent /earthquakes queries answered from an in-memory index of the last N hours, kept
+# current from LIVE_CHANNEL and fully reloaded from MongoDB every HOT_INDEX_RELOAD_SECONDS
+HOT_INDEX_WINDOW_HOURS = float(os.getenv("HOT_INDEX_WINDOW_HOURS", 168))
+HOT_INDEX_CELL_DEG = 5.0
+HOT_INDEX_RELOAD_SECONDS = int(os.getenv("HOT_INDEX_RELOAD_SECONDS", 600))
 
 # MongoDB Configuration
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "earthquake_db")
+# "standard" (one document per event, raw payload inline) or "timeseries" (time-series
+# collection bucketed by region/network, raw payloads in the cold earthquakes_raw collection)
+EARTHQUAKE_STORAGE_MODE = os.getenv("EARTHQUAKE_STORAGE_MODE", "standard")
+TIMESERIES_GRANULARITY = os.getenv("TIMESERIES_GRANULARITY", "hours")
 
 # Neo4j Configuration
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
@@ -33,6 +63,42 @@ HIGH_RISK_REGIONS = ["California", "CA", "Alaska", "AK", "Japan", "Mexico", "Tur
 CLUSTERING_DISTANCE_KM = float(os.getenv("CLUSTERING_DISTANCE_KM", 50))
 CLUSTERING_TIME_WINDOW_HOURS = float(os.getenv("CLUSTERING_TIME_WINDOW_HOURS", 48))
 CLUSTERING_MIN_SAMPLES = int(os.getenv("CLUSTERING_MIN_SAMPLES", 3))
+CLUSTERING_LOOKBACK_DAYS = 7
+CLUSTERING_CACHE_MAX_ENTRIES = int(os.getenv("CLUSTERING_CACHE_MAX_ENTRIES", 20))
+# The latest run persists a reachability hierarchy covering eps_km / factor .. eps_km * factor
+CLUSTERING_SWEEP_EPS_FACTOR = float(os.getenv("CLUSTERING_SWEEP_EPS_FACTOR", 4))
+# "global" (newest 5000 events, single DBSCAN) or "tiled" (whole window, tiled DBSCAN)
+CLUSTERING_MODE = os.getenv("CLUSTERING_MODE", "global")
+CLUSTERING_TILE_SIZE_EPS = float(os.getenv("CLUSTERING_TILE_SIZE_EPS", 64))  # tile edge in eps_km units
+CLUSTERING_TILE_WORKERS = int(os.getenv("CLUSTERING_TILE_WORKERS", 4))
+
+# Streaming Anomaly Detector (worker): per-region decayed counts, checkpointed to Redis
+ANOMALY_CHANNEL = "activity_anomalies"
+ANOMALY_STATE_KEY = "anomaly:detector"
+ANOMALY_CURRENT_KEY = "anomaly:current"  # current anomalies, read by /analytics/unusual-activity
+ANOMALY_TICK_SECONDS = 60
+ANOMALY_SHORT_TAU_HOURS = float(os.getenv("ANOMALY_SHORT_TAU_HOURS", 12))
+ANOMALY_LONG_TAU_DAYS = float(os.getenv("ANOMALY_LONG_TAU_DAYS", 30))
+ANOMALY_Z_ENTER = float(os.getenv("ANOMALY_Z_ENTER", 4))
+ANOMALY_Z_EXIT = float(os.getenv("ANOMALY_Z_EXIT", 2))
+ANOMALY_MIN_EVENTS = int(os.getenv("ANOMALY_MIN_EVENTS", 5))
+
+# Analytics Rollups
+# Hourly rollups (used for the recent windows) expire after this many days, daily rollups are kept
+ROLLUP_HOURLY_RETENTION_DAYS = int(os.getenv("ROLLUP_HOURLY_RETENTION_DAYS", 45))
+ROLLUP_DEPTH_BINS_KM = [0, 10, 30, 70, 150, 300]  # lower bounds of the depth bins
+
+# Distribution Sketches
+# Fixed-bin magnitude/depth histograms per region: (lower, upper, bin width)
+SKETCH_MAGNITUDE_BINS = (-2.0, 10.0, 0.1)
+SKETCH_DEPTH_BINS_KM = (0.0, 700.0, 5.0)
+SCATTER_SAMPLE_PER_STRATUM = int(os.getenv("SCATTER_SAMPLE_PER_STRATUM", 200))  # events per integer magnitude
+
+# Heatmap Tile Pyramid
+# Grid cell edge (degrees) of each pyramid level, coarsest first
+HEATMAP_CELL_SIZES_DEG = [4.0, 2.0, 1.0, 0.5, 0.25, 0.1]
+HEATMAP_CELLS_PER_MAP_TILE = 16  # target resolution: cells across one 256px web map tile
+HEATMAP_MAX_CELLS = int(os.getenv("HEATMAP_MAX_CELLS", 20000))
 
 # --- LOCAL DEV OVERRIDE ---
 # NOTE: Removed automatic overrides that replaced Docker service hostnames with
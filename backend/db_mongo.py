@@ -1,9 +1,27 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import UpdateOne, ReplaceOne
-from config import MONGO_URI, MONGO_DB_NAME
-from datetime import datetime, timedelta
+from pymongo import UpdateOne, UpdateMany, ReplaceOne
+from pymongo.errors import DocumentTooLarge, OperationFailure
+from bson.int64 import Int64
+from config import (
+    MONGO_URI, MONGO_DB_NAME, EARTHQUAKE_STORAGE_MODE, TIMESERIES_GRANULARITY,
+    CLUSTERING_CACHE_MAX_ENTRIES,
+    ROLLUP_HOURLY_RETENTION_DAYS, ROLLUP_DEPTH_BINS_KM,
+    HEATMAP_CELL_SIZES_DEG, HEATMAP_CELLS_PER_MAP_TILE, HEATMAP_MAX_CELLS,
+    SKETCH_MAGNITUDE_BINS, SKETCH_DEPTH_BINS_KM, SCATTER_SAMPLE_PER_STRATUM
+)
+from pymongo import ReturnDocument
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional, Tuple, Any
 import asyncio
+import math
+import base64
+import json
+import re
+import numpy as np
+from region_normalizer import split_place
+from sketches import FixedBins, merge_histograms, magnitude_stratum, sample_priority
+import partial_aggregates
+import heapq
 
 
 class DatabaseConnection:
@@ -14,10 +32,21 @@ class DatabaseConnection:
         self._database = self._client[db_name]
         self._collections = {
             'earthquakes': self._database['earthquakes'],
+            'earthquakes_raw': self._database['earthquakes_raw'],
             'clusters': self._database['clusters'],
-            'config': self._database['config']
+            'config': self._database['config'],
+            'clustering_cache': self._database['clustering_cache'],
+            'clustering_hierarchy': self._database['clustering_hierarchy'],
+            'rollup_hourly': self._database['rollup_hourly'],
+            'rollup_daily': self._database['rollup_daily'],
+            'heatmap_tiles': self._database['heatmap_tiles'],
+            'distribution_sketches': self._database['distribution_sketches'],
+            'scatter_sample': self._database['scatter_sample']
         }
     
+    def get_database(self):
+        return self._database
+    
     def get_collection(self, name: str):
         return self._collections.get(name, self._database[name])
     
@@ -29,12 +58,19 @@ class IndexManager:
     """Handles all index creation and management"""
     
     @staticmethod
-    async def setup_indexes(collection):
+    async def setup_indexes(collection, unique_ids: bool = True):
+        # Time-series collections do not support unique indexes, their ingest path dedupes by id
         index_configs = [
             ([("location", "2dsphere")], {}),
-            ([("id", 1)], {"unique": True}),
-            ([("time", -1)], {}),
-            ([("cluster_id", 1)], {})
+            ([("id", 1)], {"unique": True} if unique_ids else {}),
+            # Compound indexes for the common /earthquakes filter shapes (all sorted by time)
+            ([("time", -1), ("magnitude", 1)], {}),
+            ([("cluster_id", 1), ("time", -1)], {}),
+            ([("time", -1), ("id", -1)], {}),
+            # Covering indexes for the analytics pipelines
+            ([("magnitude", 1)], {}),
+            ([("region", 1), ("time", 1), ("magnitude", 1)], {}),
+            ([("city", 1)], {})
         ]
         
         for keys, options in index_configs:
@@ -42,43 +78,339 @@ class IndexManager:
         
         print("[MongoDB] All indexes initialized successfully")
     
+    @staticmethod
+    async def setup_raw_index(collection):
+        await collection.create_index([("id", 1)], unique=True)
+    
     @staticmethod
     async def setup_cluster_index(collection):
         await collection.create_index([("cluster_id", 1)], unique=True)
+    
+    @staticmethod
+    async def setup_clustering_cache_index(collection):
+        await collection.create_index([("last_used", 1)])
+    
+    @staticmethod
+    async def setup_rollup_indexes(collection, expiring: bool = False):
+        # Unique key of a rollup cell, also the $merge key of the rebuild
+        await collection.create_index(
+            [("bucket", 1), ("region", 1), ("mag_bin", 1), ("depth_bin", 1)], unique=True
+        )
+        if expiring:
+            await collection.create_index([("expires_at", 1)], expireAfterSeconds=0)
+    
+    @staticmethod
+    async def setup_heatmap_tile_index(collection):
+        await collection.create_index([("z", 1), ("day", 1), ("cx", 1), ("cy", 1)], unique=True)
+    
+    @staticmethod
+    async def setup_scatter_sample_indexes(collection):
+        await collection.create_index([("id", 1)], unique=True)
+        await collection.create_index([("stratum", 1), ("priority", 1)])
+
+
+class SchemaManager:
+    """Canonical earthquake document schema, enforced with a JSON-schema validator"""
+    
+    EARTHQUAKE_SCHEMA = {
+        "$jsonSchema": {
+            "bsonType": "object",
+            "required": ["id", "time", "latitude", "longitude", "location"],
+            "properties": {
+                "id": {"bsonType": "string"},
+                "time": {"bsonType": "long"},
+                "magnitude": {"bsonType": ["double", "null"]},
+                "depth": {"bsonType": ["double", "null"]},
+                "latitude": {"bsonType": "double", "minimum": -90, "maximum": 90},
+                "longitude": {"bsonType": "double", "minimum": -180, "maximum": 180},
+                "location": {
+                    "bsonType": "object",
+                    "required": ["type", "coordinates"],
+                    "properties": {
+                        "type": {"enum": ["Point"]},
+                        "coordinates": {
+                            "bsonType": "array",
+                            "minItems": 2,
+                            "maxItems": 2,
+                            "items": {"bsonType": "double"}
+                        }
+                    }
+                },
+                "region": {"bsonType": ["string", "null"]},
+                "city": {"bsonType": ["string", "null"]}
+            }
+        }
+    }
+    
+    @staticmethod
+    async def apply_earthquake_validator(database, collection_name: str = "earthquakes") -> None:
+        # "moderate" leaves untyped legacy documents writable until the migration rewrites them
+        options = {
+            "validator": SchemaManager.EARTHQUAKE_SCHEMA,
+            "validationLevel": "moderate",
+            "validationAction": "error"
+        }
+        try:
+            await database.command("collMod", collection_name, **options)
+        except OperationFailure as e:
+            if e.code != 26:  # NamespaceNotFound
+                raise
+            await database.create_collection(collection_name, **options)
+        print(f"[MongoDB] Schema validator applied to {collection_name}")
+    
+    @staticmethod
+    def untyped_query() -> Dict:
+        """Matches documents that do not satisfy the canonical schema"""
+        return {"$nor": [SchemaManager.EARTHQUAKE_SCHEMA]}
+
+
+class StorageManager:
+    """
+    Optional time-series layout of the earthquake catalog: measurements bucketed by
+    (region, network) with columnar compression, raw USGS payloads in a cold collection.
+    """
+    
+    TIME_FIELD = "ts"
+    META_FIELD = "meta"
+    # Storage-only fields, hidden from API reads
+    HIDDEN_FIELDS = {"ts": 0, "meta": 0}
+    
+    @staticmethod
+    async def collection_type(database, name: str) -> Optional[str]:
+        """"collection", "timeseries", "view" or None if it does not exist"""
+        cursor = await database.list_collections(filter={"name": name})
+        infos = await cursor.to_list(length=1)
+        return infos[0].get("type") if infos else None
+    
+    @staticmethod
+    async def ensure_timeseries_collection(database, name: str, granularity: str = TIMESERIES_GRANULARITY) -> bool:
+        """Creates the time-series collection, False if a standard collection is in the way"""
+        kind = await StorageManager.collection_type(database, name)
+        if kind is None:
+            await database.create_collection(name, timeseries={
+                "timeField": StorageManager.TIME_FIELD,
+                "metaField": StorageManager.META_FIELD,
+                "granularity": granularity
+            })
+            print(f"[MongoDB] Created time-series collection {name}")
+        elif kind != "timeseries":
+            print(f"[MongoDB] WARNING: {name} is a standard collection, run migrate_storage.py first")
+            return False
+        return True
+    
+    @staticmethod
+    def network(doc: Dict) -> Optional[str]:
+        """Contributing network: properties.net of the raw payload, else the id prefix (us7000abcd -> us)"""
+        try:
+            net = json.loads(doc["raw_json"])["properties"].get("net")
+            if net:
+                return net
+        except (KeyError, TypeError, ValueError):
+            pass
+        match = re.match(r"[a-z]+", str(doc.get("id", "")))
+        return match.group(0) if match else None
+    
+    @staticmethod
+    def split_document(doc: Dict) -> Tuple[Dict, Optional[Dict]]:
+        """(measurement document, cold raw document or None) of a prepared earthquake"""
+        measurement = {k: v for k, v in doc.items() if k not in ("_id", "raw_json")}
+        measurement[StorageManager.TIME_FIELD] = datetime.fromtimestamp(int(doc["time"]) / 1000, tz=timezone.utc)
+        measurement[StorageManager.META_FIELD] = {
+            "region": doc.get("region"),
+            "network": StorageManager.network(doc)
+        }
+        raw = None
+        if doc.get("raw_json") is not None:
+            raw = {"id": doc["id"], "time": doc["time"], "raw_json": doc["raw_json"]}
+        return measurement, raw
+    
+    @staticmethod
+    def hide_fields(projection: Optional[Dict]) -> Dict:
+        """Adds the storage-only fields to an exclusion projection (inclusion projections never select them)"""
+        if projection is None:
+            return dict(StorageManager.HIDDEN_FIELDS)
+        if any(v for k, v in projection.items() if k != "_id"):
+            return projection
+        return {**projection, **StorageManager.HIDDEN_FIELDS}
+
+
+class BatchMigration:
+    """
+    Rewrites documents in place in _id order, one bulk write per batch.
+    Progress is checkpointed in the config collection so an interrupted run resumes
+    after the last completed batch.
+    """
+    
+    def __init__(
+        self, name: str, collection, config_collection, transform, query: Optional[Dict] = None,
+        batch_size: int = 1000, projection: Optional[Dict] = None
+    ):
+        self.checkpoint_id = f"migration:{name}"
+        self.collection = collection
+        self.config_collection = config_collection
+        self.transform = transform
+        self.query = query or {}
+        self.batch_size = batch_size
+        self.projection = projection
+    
+    async def run(self) -> Dict:
+        state = await self.config_collection.find_one({"_id": self.checkpoint_id}) or {}
+        if state.get("done"):
+            print(f"[Migration] {self.checkpoint_id} already completed")
+            return state
+        
+        last_id = state.get("last_id")
+        scanned, modified = state.get("scanned", 0), state.get("modified", 0)
+        if last_id is not None:
+            print(f"[Migration] Resuming {self.checkpoint_id} after _id {last_id}")
+        
+        while True:
+            query = dict(self.query)
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            cursor = self.collection.find(query, projection=self.projection)
+            batch = await cursor.sort("_id", 1).limit(self.batch_size).to_list(self.batch_size)
+            if not batch:
+                break
+            
+            operations = []
+            for doc in batch:
+                update = self.transform(doc)
+                if update:
+                    operations.append(UpdateOne({"_id": doc["_id"]}, update))
+            if operations:
+                result = await self.collection.bulk_write(operations, ordered=False)
+                modified += result.modified_count
+            
+            last_id = batch[-1]["_id"]
+            scanned += len(batch)
+            await self.config_collection.update_one(
+                {"_id": self.checkpoint_id},
+                {"$set": {"last_id": last_id, "scanned": scanned, "modified": modified}},
+                upsert=True
+            )
+            print(f"[Migration] {self.checkpoint_id}: scanned {scanned}, modified {modified}")
+        
+        state = {"last_id": last_id, "scanned": scanned, "modified": modified, "done": True}
+        await self.config_collection.update_one({"_id": self.checkpoint_id}, {"$set": state}, upsert=True)
+        return state
+
+
+class TimeSeriesMigration:
+    """
+    Copies a standard earthquake collection into the time-series layout in _id order,
+    checkpointed like BatchMigration. Each batch first deletes its ids from the target,
+    so a batch interrupted after its insert is simply redone.
+    """
+    
+    def __init__(self, source, target, raw_collection, config_collection, batch_size: int = 1000):
+        self.checkpoint_id = "migration:timeseries_storage_v1"
+        self.source = source
+        self.target = target
+        self.raw_collection = raw_collection
+        self.config_collection = config_collection
+        self.batch_size = batch_size
+    
+    async def run(self) -> Dict:
+        state = await self.config_collection.find_one({"_id": self.checkpoint_id}) or {}
+        if state.get("done"):
+            print(f"[Migration] {self.checkpoint_id} already completed")
+            return state
+        
+        last_id = state.get("last_id")
+        copied = state.get("copied", 0)
+        if last_id is not None:
+            print(f"[Migration] Resuming {self.checkpoint_id} after _id {last_id}")
+        
+        while True:
+            query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+            batch = await self.source.find(query).sort("_id", 1).limit(self.batch_size).to_list(self.batch_size)
+            if not batch:
+                break
+            
+            measurements, raw_docs = [], []
+            for doc in batch:
+                if doc.get("time") is None:
+                    continue  # no timeField value, cannot be stored in a time-series collection
+                measurement, raw = StorageManager.split_document(doc)
+                measurements.append(measurement)
+                if raw:
+                    raw_docs.append(ReplaceOne({"id": raw["id"]}, raw, upsert=True))
+            
+            if measurements:
+                await self.target.delete_many({"id": {"$in": [m["id"] for m in measurements]}})
+                await self.target.insert_many(measurements, ordered=False)
+            if raw_docs:
+                await self.raw_collection.bulk_write(raw_docs, ordered=False)
+            
+            last_id = batch[-1]["_id"]
+            copied += len(measurements)
+            await self.config_collection.update_one(
+                {"_id": self.checkpoint_id},
+                {"$set": {"last_id": last_id, "copied": copied}},
+                upsert=True
+            )
+            print(f"[Migration] {self.checkpoint_id}: copied {copied}")
+        
+        state = {"last_id": last_id, "copied": copied, "done": True}
+        await self.config_collection.update_one({"_id": self.checkpoint_id}, {"$set": state}, upsert=True)
+        return state
 
 
 class DataTransformer:
     """Transforms and validates earthquake data"""
     
+    # Canonical storage types (the worker receives every stream field as a string)
+    DOUBLE_FIELDS = ('magnitude', 'latitude', 'longitude', 'depth')
+    
     @staticmethod
     def prepare_earthquake_data(raw_data: Dict) -> Dict:
         transformed = raw_data.copy()
         
         # Convert numeric fields
-        numeric_fields = {
-            'magnitude': float,
-            'latitude': float,
-            'longitude': float,
-            'depth': float
-        }
-        
-        for field, converter in numeric_fields.items():
-            if field in transformed and transformed[field] not in (None, ""):
-                transformed[field] = converter(transformed[field])
+        for field in DataTransformer.DOUBLE_FIELDS:
+            if field in transformed:
+                if transformed[field] in (None, ""):
+                    transformed[field] = None
+                else:
+                    transformed[field] = float(transformed[field])
         
-        # Convert timestamp
-        if "time" in transformed and transformed[time] not in (None, ""):
-            transformed["time"] = int(transformed["time"])
+        # Convert timestamp (explicit int64, small values would otherwise be stored as int32)
+        if "time" in transformed and transformed["time"] not in (None, ""):
+            transformed["time"] = Int64(int(float(transformed["time"])))
         
         # Create GeoJSON structure
-        if "latitude" in transformed and "longitude" in transformed:
+        if transformed.get("latitude") is not None and transformed.get("longitude") is not None:
             transformed["location"] = {
                 "type": "Point",
                 "coordinates": [transformed["longitude"], transformed["latitude"]]
             }
         
+        if "place" in transformed:
+            transformed["region"], transformed["city"] = split_place(transformed["place"])
+        
         return transformed
     
+    @staticmethod
+    def typed_update(doc: Dict) -> Optional[Dict]:
+        """$set rewriting the typed fields of a stored document, None if they cannot be converted"""
+        fields = ('time', 'place') + DataTransformer.DOUBLE_FIELDS
+        try:
+            prepared = DataTransformer.prepare_earthquake_data(
+                {field: doc[field] for field in fields if field in doc}
+            )
+        except (TypeError, ValueError):
+            return None
+        return {"$set": prepared} if prepared else None
+    
+    @staticmethod
+    def location_update(doc: Dict) -> Optional[Dict]:
+        """$set of the normalized region/city of a stored document, None if already current"""
+        region, city = split_place(doc.get("place"))
+        if doc.get("region") == region and doc.get("city") == city and "city" in doc:
+            return None
+        return {"$set": {"region": region, "city": city}}
+    
     @staticmethod
     def clean_document_id(doc: Dict) -> Dict:
         if doc and "_id" in doc:
@@ -111,7 +443,8 @@ class QueryBuilder:
         mag_min=None, mag_max=None,
         start_time=None, end_time=None,
         depth_min=None, depth_max=None,
-        north=None, south=None, east=None, west=None
+        north=None, south=None, east=None, west=None,
+        cluster_id=None
     ) -> Dict:
         query = {}
         
@@ -133,81 +466,192 @@ class QueryBuilder:
         query.update(depth_filter)
         
         # Bounding box
-        if north is not None or south is not None:
-            lat_filter = {}
-            if north is not None:
-                lat_filter["$lte"] = float(north)
-            if south is not None:
-                lat_filter["$gte"] = float(south)
-            query["latitude"] = lat_filter
-        
-        if east is not None or west is not None:
-            lon_filter = {}
-            if east is not None:
-                lon_filter["$lte"] = float(east)
-            if west is not None:
-                lon_filter["$gte"] = float(west)
-            query["longitude"] = lon_filter
+        query.update(QueryBuilder.build_bbox_filter(north, south, east, west))
+        
+        if cluster_id is not None:
+            query["cluster_id"] = cluster_id
+        
+        return query
+    
+    # Max longitude span of one polygon piece, keeps every piece well inside a hemisphere
+    BBOX_PIECE_MAX_DEG = 90.0
+    # Vertex spacing along parallels (polygon edges are geodesics, not parallels)
+    BBOX_DENSIFY_DEG = 1.0
+    # Outward padding covering the geodesic bulge between vertices; exact bounds are re-checked on latitude/longitude
+    BBOX_PAD_DEG = 0.01
+    
+    @staticmethod
+    def bbox_polygons(north: float, south: float, east: float, west: float) -> List[List[List[float]]]:
+        """
+        GeoJSON polygon rings covering the box. A box with west > east crosses the
+        antimeridian and is split at 180 degrees; wide pieces are split further.
+        """
+        pad = QueryBuilder.BBOX_PAD_DEG
+        top, bottom = min(north + pad, 89.999), max(south - pad, -89.999)
+        
+        if west <= east:
+            spans = [(max(west - pad, -180.0), min(east + pad, 180.0))]
+        else:
+            spans = [(max(west - pad, -180.0), 180.0), (-180.0, min(east + pad, 180.0))]
+        
+        pieces = []
+        for lo, hi in spans:
+            count = max(1, int(np.ceil((hi - lo) / QueryBuilder.BBOX_PIECE_MAX_DEG)))
+            edges = np.linspace(lo, hi, count + 1)
+            pieces.extend(zip(edges[:-1], edges[1:]))
+        
+        rings = []
+        for lo, hi in pieces:
+            steps = max(1, int(np.ceil((hi - lo) / QueryBuilder.BBOX_DENSIFY_DEG)))
+            lons = np.linspace(lo, hi, steps + 1).tolist()
+            ring = [[lon, bottom] for lon in lons] + [[lon, top] for lon in reversed(lons)]
+            ring.append(ring[0])
+            rings.append(ring)
+        return rings
+    
+    @staticmethod
+    def build_bbox_filter(north=None, south=None, east=None, west=None) -> Dict:
+        """
+        $geoWithin on the 2dsphere-indexed location, plus the exact bounds on the scalar
+        fields (evaluated on the fetched candidates only).
+        """
+        if north is None and south is None and east is None and west is None:
+            return {}
+        
+        north = 90.0 if north is None else float(north)
+        south = -90.0 if south is None else float(south)
+        east = 180.0 if east is None else float(east)
+        west = -180.0 if west is None else float(west)
         
+        rings = QueryBuilder.bbox_polygons(north, south, east, west)
+        if len(rings) == 1:
+            geometry = {"type": "Polygon", "coordinates": rings}
+        else:
+            geometry = {"type": "MultiPolygon", "coordinates": [[ring] for ring in rings]}
+        
+        query = {
+            "location": {"$geoWithin": {"$geometry": geometry}},
+            "latitude": {"$gte": south, "$lte": north}
+        }
+        if west <= east:
+            query["longitude"] = {"$gte": west, "$lte": east}
+        else:
+            # Antimeridian crossing: longitude >= west OR longitude <= east
+            query["longitude"] = {"$not": {"$gt": east, "$lt": west}}
         return query
 
 
-class AggregationPipelines:
-    """Contains all aggregation pipeline definitions"""
+    @staticmethod
+    def build_heatmap_query(
+        start_time=None, end_time=None,
+        mag_min=None, mag_max=None,
+        depth_min=None, depth_max=None
+    ) -> Dict:
+        match_conditions = {
+            "latitude": {"$exists": True, "$ne": None},
+            "longitude": {"$exists": True, "$ne": None}
+        }
+        
+        # Add time filter
+        if start_time is not None or end_time is not None:
+            time_filter = {}
+            if start_time:
+                time_filter["$gte"] = int(start_time)
+            if end_time:
+                time_filter["$lte"] = int(end_time)
+            match_conditions["time"] = time_filter
+        
+        # Add magnitude filter
+        mag_filter = QueryBuilder.build_range_filter("magnitude", mag_min, mag_max)
+        if mag_filter:
+            match_conditions.update(mag_filter)
+        
+        # Add depth filter
+        depth_filter = QueryBuilder.build_range_filter("depth", depth_min, depth_max)
+        if depth_filter:
+            match_conditions.update(depth_filter)
+        
+        return match_conditions
+
+
+class PageCursor:
+    """Opaque continuation token for keyset pagination over the (time desc, id desc) order"""
+    
+    SORT = [("time", -1), ("id", -1)]
     
     @staticmethod
-    def heatmap_pipeline(
-        match_conditions: Dict,
-        weight_by: str = "magnitude"
-    ) -> List[Dict]:
-        weight_expressions = {
-            "count": {"$sum": 1},
-            "energy": {"$sum": {"$pow": [10, {"$divide": [{"$ifNull": ["$magnitude", 0]}, 2]}]}},
-            "depth": {"$sum": {"$divide": [1, {"$add": [{"$ifNull": ["$depth", 0]}, 1]}]}},
-            "magnitude": {"$sum": {"$ifNull": ["$magnitude", 0]}}
+    def encode(doc: Dict) -> str:
+        raw = json.dumps([int(doc["time"]), str(doc["id"])], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+    
+    @staticmethod
+    def decode(token: str) -> Tuple[int, str]:
+        """Raises ValueError for malformed tokens"""
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            time_ms, event_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return int(time_ms), str(event_id)
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {token}") from e
+    
+    @staticmethod
+    def apply(query: Dict, token: Optional[str]) -> Dict:
+        """Restrict query to rows strictly after the cursor position"""
+        if not token:
+            return query
+        time_ms, event_id = PageCursor.decode(token)
+        # The top-level time bound becomes index bounds, the $or only filters ties
+        after = {
+            "time": {"$lte": time_ms},
+            "$or": [{"time": {"$lt": time_ms}}, {"id": {"$lt": event_id}}]
         }
+        return {"$and": [query, after]} if query else after
+
+
+class FieldProfiles:
+    """Named response projections for earthquake queries, pushed down into Mongo"""
+    
+    MAP_FIELDS = ["id", "latitude", "longitude", "magnitude", "depth", "time"]
+    PROFILES = {
+        "map": MAP_FIELDS,
+        "summary": MAP_FIELDS + ["place", "region", "cluster_id", "url"],
+        "full": None
+    }
+    # Keyset pagination needs these on every row
+    REQUIRED_FIELDS = ["id", "time"]
+    
+    @staticmethod
+    def projection(fields: Optional[str]) -> Optional[Dict]:
+        """
+        Projection for a profile name or a comma-separated field list, None for full documents.
+        Raises ValueError for unknown profiles or invalid field names.
+        """
+        if not fields or fields == "full":
+            return None
         
-        weight_expr = weight_expressions.get(weight_by, weight_expressions["magnitude"])
+        if fields in FieldProfiles.PROFILES:
+            names = FieldProfiles.PROFILES[fields]
+        else:
+            names = [name.strip() for name in fields.split(",") if name.strip()]
+            invalid = [name for name in names if not name.replace("_", "").isalnum() or name.startswith("_")]
+            if not names or invalid:
+                raise ValueError(f"Invalid fields: {fields}")
         
-        return [
-            {"$match": match_conditions},
-            {
-                "$project": {
-                    "lat": {"$round": [{"$toDouble": "$latitude"}, 1]},
-                    "lon": {"$round": [{"$toDouble": "$longitude"}, 1]},
-                    "magnitude": {"$toDouble": "$magnitude"},
-                    "depth": {"$toDouble": "$depth"},
-                    "place": 1
-                }
-            },
-            {
-                "$group": {
-                    "_id": {"lat": "$lat", "lon": "$lon"},
-                    "weight": weight_expr,
-                    "count": {"$sum": 1},
-                    "avg_mag": {"$avg": "$magnitude"},
-                    "sample_place": {"$first": "$place"}
-                }
-            },
-            {
-                "$project": {
-                    "_id": 0,
-                    "lat": "$_id.lat",
-                    "lon": "$_id.lon",
-                    "weight": 1,
-                    "count": 1,
-                    "avg_mag": {"$round": [{"$ifNull": ["$avg_mag", 0]}, 1]},
-                    "region": "$sample_place"
-                }
-            },
-            {"$sort": {"weight": -1}},
-            {"$limit": 500}
-        ]
+        projection = {"_id": 0}
+        for name in FieldProfiles.REQUIRED_FIELDS + names:
+            projection[name] = 1
+        return projection
+
+
+class AggregationPipelines:
+    """Contains all aggregation pipeline definitions"""
     
     @staticmethod
     def magnitude_distribution_pipeline() -> List[Dict]:
+        # Sorting on the indexed field lets the planner answer this from the magnitude index alone
         return [
-            {"$project": {"magnitude": {"$toDouble": "$magnitude"}}},
+            {"$sort": {"magnitude": 1}},
+            {"$project": {"_id": 0, "magnitude": 1}},
             {
                 "$bucket": {
                     "groupBy": "$magnitude",
@@ -221,12 +665,14 @@ class AggregationPipelines:
     @staticmethod
     def daily_trends_pipeline() -> List[Dict]:
         return [
+            {"$sort": {"time": 1}},
             {
                 "$project": {
+                    "_id": 0,
                     "date": {
                         "$dateToString": {
                             "format": "%Y-%m-%d",
-                            "date": {"$toDate": {"$toLong": "$time"}}
+                            "date": {"$toDate": "$time"}
                         }
                     }
                 }
@@ -256,8 +702,8 @@ class AggregationPipelines:
             {
                 "$project": {
                     "_id": 0,
-                    "depth": {"$toDouble": "$depth"},
-                    "magnitude": {"$toDouble": "$magnitude"},
+                    "depth": 1,
+                    "magnitude": 1,
                     "place": 1
                 }
             },
@@ -267,48 +713,51 @@ class AggregationPipelines:
     @staticmethod
     def top_regions_pipeline(limit: int) -> List[Dict]:
         return [
-            {
-                "$project": {
-                    "region": {
-                        "$trim": {
-                            "input": {"$arrayElemAt": [{"$split": ["$place", ","]}, -1]}
-                        }
-                    }
-                }
-            },
-            {"$match": {"region": {"$ne": None, "$ne": ""}}},
+            {"$match": {"region": {"$nin": [None, ""]}}},
+            {"$sort": {"region": 1}},
+            {"$project": {"_id": 0, "region": 1}},
             {"$group": {"_id": "$region", "count": {"$sum": 1}}},
             {"$sort": {"count": -1}},
             {"$limit": limit}
         ]
     
+    @staticmethod
+    def region_counts_pipeline(since_ms: int) -> List[Dict]:
+        return [
+            {"$match": {"time": {"$gte": since_ms}, "region": {"$nin": [None, ""]}}},
+            {"$project": {"_id": 0, "region": 1}},
+            {"$group": {"_id": "$region", "count": {"$sum": 1}}}
+        ]
+    
     @staticmethod
     def risk_scores_pipeline(thirty_days_ago_ms: int, limit: int) -> List[Dict]:
         return [
-            {
-                "$project": {
-                    "magnitude": {"$toDouble": "$magnitude"},
-                    "time": {"$toLong": "$time"},
-                    "region": {
-                        "$trim": {
-                            "input": {"$last": {"$split": ["$place", ","]}}
-                        }
-                    }
-                }
-            },
-            {
-                "$group": {
-                    "_id": "$region",
-                    "avg_mag": {"$avg": "$magnitude"},
-                    "max_mag": {"$max": "$magnitude"},
-                    "total_count": {"$sum": 1},
-                    "recent_count": {
-                        "$sum": {
-                            "$cond": [{"$gte": ["$time", thirty_days_ago_ms]}, 1, 0]
-                        }
+            {"$sort": {"region": 1}},
+            {"$project": {"_id": 0, "region": 1, "time": 1, "magnitude": 1}},
+            AggregationPipelines.risk_score_group(thirty_days_ago_ms),
+            *AggregationPipelines.risk_score_stages(limit)
+        ]
+    
+    @staticmethod
+    def risk_score_group(thirty_days_ago_ms: int) -> Dict:
+        return {
+            "$group": {
+                "_id": "$region",
+                "avg_mag": {"$avg": "$magnitude"},
+                "max_mag": {"$max": "$magnitude"},
+                "total_count": {"$sum": 1},
+                "recent_count": {
+                    "$sum": {
+                        "$cond": [{"$gte": ["$time", thirty_days_ago_ms]}, 1, 0]
                     }
                 }
-            },
+            }
+        }
+    
+    @staticmethod
+    def risk_score_stages(limit: int) -> List[Dict]:
+        """Scores per-region {_id, avg_mag, max_mag, recent_count} groups"""
+        return [
             {
                 "$project": {
                     "region": "$_id",
@@ -334,28 +783,31 @@ class AggregationPipelines:
     @staticmethod
     def unusual_activity_pipeline(forty_eight_hours_ago_ms: int, current_time_ms: int) -> List[Dict]:
         return [
-            {
-                "$project": {
-                    "time": {"$toLong": "$time"},
-                    "region": {
-                        "$trim": {
-                            "input": {"$last": {"$split": ["$place", ","]}}
-                        }
-                    }
-                }
-            },
-            {
-                "$group": {
-                    "_id": "$region",
-                    "total_count": {"$sum": 1},
-                    "first_seen": {"$min": "$time"},
-                    "recent_count": {
-                        "$sum": {
-                            "$cond": [{"$gte": ["$time", forty_eight_hours_ago_ms]}, 1, 0]
-                        }
+            {"$sort": {"region": 1}},
+            {"$project": {"_id": 0, "region": 1, "time": 1}},
+            AggregationPipelines.unusual_activity_group(forty_eight_hours_ago_ms),
+            *AggregationPipelines.unusual_activity_stages(current_time_ms)
+        ]
+    
+    @staticmethod
+    def unusual_activity_group(forty_eight_hours_ago_ms: int) -> Dict:
+        return {
+            "$group": {
+                "_id": "$region",
+                "total_count": {"$sum": 1},
+                "first_seen": {"$min": "$time"},
+                "recent_count": {
+                    "$sum": {
+                        "$cond": [{"$gte": ["$time", forty_eight_hours_ago_ms]}, 1, 0]
                     }
                 }
-            },
+            }
+        }
+    
+    @staticmethod
+    def unusual_activity_stages(current_time_ms: int) -> List[Dict]:
+        """Flags per-region {_id, total_count, first_seen, recent_count} groups above 5x their daily average"""
+        return [
             {
                 "$project": {
                     "region": "$_id",
@@ -387,62 +839,554 @@ class AggregationPipelines:
             },
             {"$sort": {"recent_count": -1}}
         ]
-
-
-class EarthquakeRepository:
-    """Handles earthquake-specific database operations"""
-    
-    def __init__(self, collection):
-        self.collection = collection
-    
-    async def upsert(self, data: Dict) -> None:
-        try:
-            prepared_data = DataTransformer.prepare_earthquake_data(data)
-            await self.collection.update_one(
-                {"id": prepared_data["id"]},
-                {"$set": prepared_data},
-                upsert=True
-            )
-        except Exception as e:
-            print(f"[Repo] Insert error for {data.get('id')}: {e}")
     
-    async def find_by_id(self, event_id: str) -> Optional[Dict]:
-        doc = await self.collection.find_one({"id": event_id})
-        return DataTransformer.clean_document_id(doc)
+    # Time-bucketed partials (cache.TimeBucketCache), merged by partial_aggregates
     
-    async def find_with_filters(
-        self, query: Dict, sort_field: str = "time", 
-        sort_order: int = -1, limit: int = 100
-    ) -> List[Dict]:
-        cursor = self.collection.find(query).sort(sort_field, sort_order).limit(limit)
-        results = await cursor.to_list(length=limit)
-        return DataTransformer.clean_documents(results)
+    @staticmethod
+    def time_bucket(range_start: int, bucket_ms: Optional[int]) -> Any:
+        """Start of each event's time bucket, or the range start when the range is a single segment"""
+        if bucket_ms is None:
+            return {"$literal": int(range_start)}
+        return {"$subtract": ["$time", {"$mod": ["$time", bucket_ms]}]}
     
-    async def bulk_update_clusters(self, updates: List[Tuple[str, int]]) -> None:
-        if not updates:
-            return
-        
-        operations = [
-            UpdateOne({"id": eq_id}, {"$set": {"cluster_id": cluster_id}})
-            for eq_id, cluster_id in updates
+    @staticmethod
+    def heatmap_partial_pipeline(match_conditions: Dict, bucket: Any) -> List[Dict]:
+        """Heatmap grid points (0.1 degree) with the sums of every weight mode, per time bucket"""
+        return [
+            {"$match": match_conditions},
+            {
+                "$group": {
+                    "_id": {
+                        "bucket": bucket,
+                        "lat": {"$round": ["$latitude", 1]},
+                        "lon": {"$round": ["$longitude", 1]}
+                    },
+                    **AggregationPipelines.heatmap_cell_sums()
+                }
+            }
         ]
-        
-        if operations:
-            result = await self.collection.bulk_write(operations)
-            print(f"[Repo] Cluster update: {result.modified_count} records")
-    
-    async def aggregate(self, pipeline: List[Dict], limit: int = 500) -> List[Dict]:
-        cursor = self.collection.aggregate(pipeline)
-        return await cursor.to_list(length=limit)
-
-
-class ClusterRepository:
-    """Handles cluster metadata operations"""
     
-    def __init__(self, collection):
-        self.collection = collection
-    
-    async def clear_all(self) -> None:
+    @staticmethod
+    def dashboard_partial_pipeline(match_conditions: Dict, bucket: Any, sample_size: int) -> List[Dict]:
+        """
+        Every analytics chart dataset in one $facet pass, as mergeable per-bucket counts and
+        sums, with the sample_size [r, depth, magnitude] points of smallest random key r per bucket
+        """
+        band = {
+            "$cond": [
+                {"$and": [
+                    {"$isNumber": "$magnitude"},
+                    {"$gte": ["$magnitude", 0]},
+                    {"$lt": ["$magnitude", 10]}
+                ]},
+                {"$floor": "$magnitude"},
+                "Other"
+            ]
+        }
+        return [
+            {"$match": match_conditions},
+            {
+                "$project": {
+                    "_id": 0, "time": 1, "magnitude": 1, "depth": 1, "region": 1,
+                    "bucket": bucket, "r": {"$rand": {}}
+                }
+            },
+            {
+                "$facet": {
+                    "magnitude_distribution": [
+                        {"$group": {"_id": {"bucket": "$bucket", "band": band}, "count": {"$sum": 1}}}
+                    ],
+                    "trends": [
+                        {
+                            "$group": {
+                                "_id": {
+                                    "bucket": "$bucket",
+                                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": {"$toDate": "$time"}}}
+                                },
+                                "count": {"$sum": 1}
+                            }
+                        }
+                    ],
+                    "regions": [
+                        {
+                            "$group": {
+                                "_id": {"bucket": "$bucket", "region": "$region"},
+                                "count": {"$sum": 1},
+                                "mag_sum": {"$sum": "$magnitude"},
+                                "mag_count": {"$sum": {"$cond": [{"$isNumber": "$magnitude"}, 1, 0]}},
+                                "mag_max": {"$max": "$magnitude"},
+                                "first_seen": {"$min": "$time"}
+                            }
+                        }
+                    ],
+                    "samples": [
+                        {
+                            "$group": {
+                                "_id": "$bucket",
+                                "count": {"$sum": 1},
+                                "points": {"$topN": {"n": sample_size, "sortBy": {"r": 1}, "output": ["$r", "$depth", "$magnitude"]}}
+                            }
+                        }
+                    ]
+                }
+            }
+        ]
+    
+    # Heatmap cells: (cx, cy) = floor(lon / cell_deg), floor(lat / cell_deg)
+    
+    @staticmethod
+    def heatmap_cell_sums() -> Dict:
+        """Accumulators of every weight mode, so one cell document serves all of them"""
+        magnitude = {"$ifNull": ["$magnitude", 0]}
+        return {
+            "count": {"$sum": 1},
+            "mag_count": {"$sum": {"$cond": [{"$isNumber": "$magnitude"}, 1, 0]}},
+            "mag_sum": {"$sum": magnitude},
+            "energy_sum": {"$sum": {"$pow": [10, {"$divide": [magnitude, 2]}]}},
+            "depth_sum": {"$sum": {"$divide": [1, {"$add": [{"$ifNull": ["$depth", 0]}, 1]}]}},
+            "sample_place": {"$first": "$place"}
+        }
+    
+    @staticmethod
+    def heatmap_cells_pipeline(match_conditions: Dict, cell_deg: float) -> List[Dict]:
+        """Raw events summed into grid cells, same row shape as heatmap_tiles_pipeline"""
+        return [
+            {"$match": match_conditions},
+            {
+                "$group": {
+                    "_id": {
+                        "cx": {"$floor": {"$divide": ["$longitude", cell_deg]}},
+                        "cy": {"$floor": {"$divide": ["$latitude", cell_deg]}}
+                    },
+                    **AggregationPipelines.heatmap_cell_sums()
+                }
+            }
+        ]
+    
+    @staticmethod
+    def heatmap_tiles_pipeline(match_conditions: Dict) -> List[Dict]:
+        """Pyramid cells of one level summed over days"""
+        sums = {
+            field: {"$sum": f"${field}"}
+            for field in ("count", "mag_count", "mag_sum", "energy_sum", "depth_sum")
+        }
+        return [
+            {"$match": match_conditions},
+            {"$group": {"_id": {"cx": "$cx", "cy": "$cy"}, **sums, "sample_place": {"$first": "$sample_place"}}}
+        ]
+    
+    @staticmethod
+    def sketch_bin_index(field: str, bins: FixedBins) -> Dict:
+        """Same clamped bin index as FixedBins.index, null when the field is not a number"""
+        index = {"$floor": {"$add": [{"$divide": [{"$subtract": [f"${field}", bins.lower]}, bins.width]}, 1e-9]}}
+        return {
+            "$cond": [
+                {"$isNumber": f"${field}"},
+                {"$toInt": {"$min": [bins.count - 1, {"$max": [0, index]}]}},
+                None
+            ]
+        }
+    
+    @staticmethod
+    def sketch_rebuild_pipeline(magnitude_bins: FixedBins, depth_bins: FixedBins) -> List[Dict]:
+        """Event counts per (region, magnitude bin, depth bin); the repository folds them into histograms"""
+        return [
+            {
+                "$project": {
+                    "_id": 0,
+                    "region": {"$ifNull": ["$region", ""]},
+                    "mag": AggregationPipelines.sketch_bin_index("magnitude", magnitude_bins),
+                    "depth": AggregationPipelines.sketch_bin_index("depth", depth_bins)
+                }
+            },
+            {"$group": {"_id": {"region": "$region", "mag": "$mag", "depth": "$depth"}, "count": {"$sum": 1}}}
+        ]
+    
+    @staticmethod
+    def heatmap_tiles_rebuild_pipeline(level: int, cell_deg: float, into: str) -> List[Dict]:
+        day_ms = 24 * 3600 * 1000
+        return [
+            {"$match": {"time": {"$type": "number"}, "latitude": {"$type": "number"}, "longitude": {"$type": "number"}}},
+            {
+                "$group": {
+                    "_id": {
+                        "day": {"$subtract": ["$time", {"$mod": ["$time", day_ms]}]},
+                        "cx": {"$floor": {"$divide": ["$longitude", cell_deg]}},
+                        "cy": {"$floor": {"$divide": ["$latitude", cell_deg]}}
+                    },
+                    **AggregationPipelines.heatmap_cell_sums()
+                }
+            },
+            {
+                "$project": {
+                    "_id": 0, "z": {"$literal": level},
+                    "day": "$_id.day", "cx": {"$toInt": "$_id.cx"}, "cy": {"$toInt": "$_id.cy"},
+                    "count": 1, "mag_count": 1, "mag_sum": 1, "energy_sum": 1, "depth_sum": 1,
+                    "sample_place": 1
+                }
+            },
+            {
+                "$merge": {
+                    "into": into,
+                    "on": ["z", "day", "cx", "cy"],
+                    "whenMatched": "replace",
+                    "whenNotMatched": "insert"
+                }
+            }
+        ]
+    
+    # Rollups: one document per (bucket, region, magnitude bin, depth bin) cell
+    
+    @staticmethod
+    def rollup_bin_fields() -> Dict:
+        """Aggregation expressions computing the same bins as RollupRepository.cell_key"""
+        depth_branches = [
+            {"case": {"$gte": ["$depth", lower]}, "then": lower}
+            for lower in reversed(ROLLUP_DEPTH_BINS_KM)
+        ]
+        return {
+            "region": {"$ifNull": ["$region", ""]},
+            "mag_bin": {
+                "$cond": [
+                    {"$and": [{"$gte": ["$magnitude", 0]}, {"$lt": ["$magnitude", 10]}]},
+                    {"$toInt": {"$floor": "$magnitude"}},
+                    -1
+                ]
+            },
+            "depth_bin": {"$switch": {"branches": depth_branches, "default": -1}}
+        }
+    
+    @staticmethod
+    def rollup_rebuild_pipeline(
+        bucket_ms: int, into: str, expire_after_ms: Optional[int] = None, since_ms: Optional[int] = None
+    ) -> List[Dict]:
+        has_magnitude = {"$cond": [{"$isNumber": "$magnitude"}, 1, 0]}
+        cell = {
+            "bucket": {"$subtract": ["$time", {"$mod": ["$time", bucket_ms]}]},
+            **AggregationPipelines.rollup_bin_fields()
+        }
+        output = {
+            "_id": 0,
+            "bucket": "$_id.bucket",
+            "region": "$_id.region",
+            "mag_bin": "$_id.mag_bin",
+            "depth_bin": "$_id.depth_bin",
+            "count": 1,
+            "mag_count": 1,
+            "mag_sum": 1,
+            "mag_max": 1,
+            "first_time": 1,
+            "last_time": 1
+        }
+        if expire_after_ms is not None:
+            output["expires_at"] = {"$toDate": {"$add": ["$_id.bucket", expire_after_ms]}}
+        
+        time_filter = {"$type": "number"}
+        if since_ms is not None:
+            time_filter["$gte"] = since_ms
+        
+        return [
+            {"$match": {"time": time_filter}},
+            {
+                "$group": {
+                    "_id": cell,
+                    "count": {"$sum": 1},
+                    "mag_count": {"$sum": has_magnitude},
+                    "mag_sum": {"$sum": {"$ifNull": ["$magnitude", 0]}},
+                    "mag_max": {"$max": "$magnitude"},
+                    "first_time": {"$min": "$time"},
+                    "last_time": {"$max": "$time"}
+                }
+            },
+            {"$project": output},
+            {
+                "$merge": {
+                    "into": into,
+                    "on": ["bucket", "region", "mag_bin", "depth_bin"],
+                    "whenMatched": "replace",
+                    "whenNotMatched": "insert"
+                }
+            }
+        ]
+    
+    @staticmethod
+    def rollup_magnitude_distribution_pipeline() -> List[Dict]:
+        """Same {_id: bin | "Other", count} rows as magnitude_distribution_pipeline"""
+        return [
+            {"$group": {"_id": "$mag_bin", "count": {"$sum": "$count"}}},
+            {"$match": {"count": {"$gt": 0}}},
+            {
+                "$project": {
+                    "_id": {"$cond": [{"$eq": ["$_id", -1]}, "Other", "$_id"]},
+                    "count": 1
+                }
+            },
+            {"$sort": {"_id": 1}}
+        ]
+    
+    @staticmethod
+    def rollup_daily_trends_pipeline() -> List[Dict]:
+        return [
+            {"$group": {"_id": "$bucket", "count": {"$sum": "$count"}}},
+            {"$match": {"count": {"$gt": 0}}},
+            {"$sort": {"_id": 1}},
+            {
+                "$project": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": {"$toDate": "$_id"}}},
+                    "count": 1
+                }
+            }
+        ]
+    
+    @staticmethod
+    def rollup_top_regions_pipeline(limit: int) -> List[Dict]:
+        return [
+            {"$match": {"region": {"$nin": [None, ""]}}},
+            {"$group": {"_id": "$region", "count": {"$sum": "$count"}}},
+            {"$match": {"count": {"$gt": 0}}},
+            {"$sort": {"count": -1}},
+            {"$limit": limit}
+        ]
+    
+    @staticmethod
+    def rollup_region_counts_pipeline(since_ms: int) -> List[Dict]:
+        return [
+            {"$match": {"bucket": {"$gte": since_ms}, "region": {"$nin": [None, ""]}}},
+            {"$group": {"_id": "$region", "count": {"$sum": "$count"}}}
+        ]
+    
+    @staticmethod
+    def rollup_recent_union(hourly_collection: str, since_ms: int) -> Dict:
+        """$unionWith stage adding hourly cells of the recent window as {region, recent_count}"""
+        return {
+            "$unionWith": {
+                "coll": hourly_collection,
+                "pipeline": [
+                    {"$match": {"bucket": {"$gte": since_ms}}},
+                    {"$project": {"_id": 0, "region": 1, "recent_count": "$count"}}
+                ]
+            }
+        }
+    
+    @staticmethod
+    def rollup_risk_scores_pipeline(hourly_collection: str, thirty_days_ago_ms: int, limit: int) -> List[Dict]:
+        """Totals from daily cells, the 30-day count from hourly cells (hour granularity)"""
+        return [
+            {"$project": {"_id": 0, "region": 1, "count": 1, "mag_count": 1, "mag_sum": 1, "mag_max": 1}},
+            AggregationPipelines.rollup_recent_union(hourly_collection, thirty_days_ago_ms),
+            {
+                "$group": {
+                    "_id": "$region",
+                    "mag_sum": {"$sum": "$mag_sum"},
+                    "mag_count": {"$sum": "$mag_count"},
+                    "max_mag": {"$max": "$mag_max"},
+                    "total_count": {"$sum": "$count"},
+                    "recent_count": {"$sum": "$recent_count"}
+                }
+            },
+            {"$match": {"total_count": {"$gt": 0}}},
+            {
+                "$addFields": {
+                    "avg_mag": {
+                        "$cond": [
+                            {"$gt": ["$mag_count", 0]},
+                            {"$divide": ["$mag_sum", "$mag_count"]},
+                            None
+                        ]
+                    }
+                }
+            },
+            *AggregationPipelines.risk_score_stages(limit)
+        ]
+    
+    @staticmethod
+    def rollup_unusual_activity_pipeline(
+        hourly_collection: str, forty_eight_hours_ago_ms: int, current_time_ms: int
+    ) -> List[Dict]:
+        return [
+            {"$project": {"_id": 0, "region": 1, "count": 1, "first_time": 1}},
+            AggregationPipelines.rollup_recent_union(hourly_collection, forty_eight_hours_ago_ms),
+            {
+                "$group": {
+                    "_id": "$region",
+                    "total_count": {"$sum": "$count"},
+                    "first_seen": {"$min": "$first_time"},
+                    "recent_count": {"$sum": "$recent_count"}
+                }
+            },
+            {"$match": {"total_count": {"$gt": 0}}},
+            *AggregationPipelines.unusual_activity_stages(current_time_ms)
+        ]
+
+
+class EarthquakeRepository:
+    """Handles earthquake-specific database operations"""
+    
+    # Fields of the replaced document that incrementally maintained views need to retract it
+    TRACKED_FIELDS = {
+        "_id": 0, "time": 1, "magnitude": 1, "depth": 1, "region": 1,
+        "latitude": 1, "longitude": 1, "place": 1
+    }
+    
+    def __init__(self, collection):
+        self.collection = collection
+    
+    async def upsert(self, data: Dict) -> Optional[Tuple[Optional[Dict], Dict]]:
+        """Returns (previous TRACKED_FIELDS or None if new, stored data), None on failure"""
+        try:
+            prepared_data = DataTransformer.prepare_earthquake_data(data)
+            previous = await self.collection.find_one_and_update(
+                {"id": prepared_data["id"]},
+                {"$set": prepared_data},
+                projection=EarthquakeRepository.TRACKED_FIELDS,
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+            return previous, prepared_data
+        except Exception as e:
+            print(f"[Repo] Insert error for {data.get('id')}: {e}")
+            return None
+    
+    async def find_by_id(self, event_id: str) -> Optional[Dict]:
+        doc = await self.collection.find_one({"id": event_id})
+        return DataTransformer.clean_document_id(doc)
+    
+    async def find_latest_time(self) -> Optional[int]:
+        doc = await self.collection.find_one(
+            {}, projection={"_id": 0, "time": 1}, sort=[("time", -1)]
+        )
+        return int(doc["time"]) if doc and doc.get("time") is not None else None
+    
+    async def find_earliest_time(self) -> Optional[int]:
+        doc = await self.collection.find_one(
+            {"time": {"$ne": None}}, projection={"_id": 0, "time": 1}, sort=[("time", 1)]
+        )
+        return int(doc["time"]) if doc else None
+    
+    async def find_with_filters(
+        self, query: Dict, sort_field: str = "time", 
+        sort_order: int = -1, limit: int = 100
+    ) -> List[Dict]:
+        cursor = self.collection.find(query).sort(sort_field, sort_order).limit(limit)
+        results = await cursor.to_list(length=limit)
+        return DataTransformer.clean_documents(results)
+    
+    async def find_page(
+        self, query: Dict, limit: int = 100, cursor: Optional[str] = None,
+        projection: Optional[Dict] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """One keyset page plus the token for the next one (None on the last page)"""
+        results = await self.collection.find(
+            PageCursor.apply(query, cursor), projection=projection
+        ).sort(PageCursor.SORT).limit(limit + 1).to_list(length=limit + 1)
+        
+        next_cursor = PageCursor.encode(results[limit - 1]) if len(results) > limit else None
+        return DataTransformer.clean_documents(results[:limit]), next_cursor
+    
+    async def iter_with_filters(
+        self, query: Dict, projection: Optional[Dict] = None,
+        sort_field: str = "time", sort_order: int = -1, batch_size: int = 1000
+    ):
+        cursor = self.collection.find(query, projection=projection)
+        cursor = cursor.sort(sort_field, sort_order).batch_size(batch_size)
+        async for doc in cursor:
+            yield doc
+    
+    async def bulk_update_clusters(self, updates: List[Tuple[str, int]], chunk_size: int = 1000) -> None:
+        if not updates:
+            return
+        
+        # One UpdateMany per cluster (chunked) instead of one UpdateOne per event
+        ids_by_cluster = {}
+        for eq_id, cluster_id in updates:
+            ids_by_cluster.setdefault(cluster_id, []).append(eq_id)
+        
+        operations = [
+            UpdateMany(
+                {"id": {"$in": eq_ids[i:i + chunk_size]}},
+                {"$set": {"cluster_id": cluster_id}}
+            )
+            for cluster_id, eq_ids in ids_by_cluster.items()
+            for i in range(0, len(eq_ids), chunk_size)
+        ]
+        
+        if operations:
+            result = await self.collection.bulk_write(operations)
+            print(f"[Repo] Cluster update: {result.modified_count} records")
+    
+    async def aggregate(self, pipeline: List[Dict], limit: int = 500) -> List[Dict]:
+        cursor = self.collection.aggregate(pipeline)
+        return await cursor.to_list(length=limit)
+
+
+class TimeSeriesEarthquakeRepository(EarthquakeRepository):
+    """
+    EarthquakeRepository over a time-series collection. Time-series collections have no
+    unique indexes or upserts, so ingest looks the id up first; raw_json lives in the
+    cold collection and is joined back only for single-event reads.
+    """
+    
+    def __init__(self, collection, raw_collection):
+        super().__init__(collection)
+        self.raw_collection = raw_collection
+    
+    async def upsert(self, data: Dict) -> Optional[Tuple[Optional[Dict], Dict]]:
+        try:
+            prepared_data = DataTransformer.prepare_earthquake_data(data)
+            measurement, raw = StorageManager.split_document(prepared_data)
+            previous = await self.collection.find_one(
+                {"id": prepared_data["id"]}, projection=EarthquakeRepository.TRACKED_FIELDS
+            )
+            if previous is None:
+                await self.collection.insert_one(measurement)
+            else:
+                await self.collection.update_one({"id": prepared_data["id"]}, {"$set": measurement})
+            if raw:
+                await self.raw_collection.replace_one({"id": raw["id"]}, raw, upsert=True)
+            return previous, prepared_data
+        except Exception as e:
+            print(f"[Repo] Insert error for {data.get('id')}: {e}")
+            return None
+    
+    async def find_by_id(self, event_id: str) -> Optional[Dict]:
+        doc = await self.collection.find_one({"id": event_id}, projection=StorageManager.HIDDEN_FIELDS)
+        if doc:
+            raw = await self.raw_collection.find_one({"id": event_id}, projection={"_id": 0, "raw_json": 1})
+            if raw:
+                doc["raw_json"] = raw["raw_json"]
+        return DataTransformer.clean_document_id(doc)
+    
+    async def find_with_filters(
+        self, query: Dict, sort_field: str = "time", 
+        sort_order: int = -1, limit: int = 100
+    ) -> List[Dict]:
+        cursor = self.collection.find(query, projection=StorageManager.HIDDEN_FIELDS)
+        results = await cursor.sort(sort_field, sort_order).limit(limit).to_list(length=limit)
+        return DataTransformer.clean_documents(results)
+    
+    async def find_page(
+        self, query: Dict, limit: int = 100, cursor: Optional[str] = None,
+        projection: Optional[Dict] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        return await super().find_page(query, limit, cursor, StorageManager.hide_fields(projection))
+    
+    async def iter_with_filters(
+        self, query: Dict, projection: Optional[Dict] = None,
+        sort_field: str = "time", sort_order: int = -1, batch_size: int = 1000
+    ):
+        async for doc in super().iter_with_filters(
+            query, StorageManager.hide_fields(projection), sort_field, sort_order, batch_size
+        ):
+            yield doc
+
+
+class ClusterRepository:
+    """Handles cluster metadata operations"""
+    
+    def __init__(self, collection):
+        self.collection = collection
+    
+    async def clear_all(self) -> None:
         await self.collection.delete_many({})
         print("[ClusterRepo] All clusters cleared")
     
@@ -471,6 +1415,550 @@ class ClusterRepository:
         return DataTransformer.clean_documents(results)
 
 
+class ClusteringCacheRepository:
+    """Stores memoized clustering result sets with LRU eviction"""
+    
+    def __init__(self, collection, max_entries: int):
+        self.collection = collection
+        self.max_entries = max_entries
+    
+    async def get(self, key: str) -> Optional[Dict]:
+        now_ms = int(datetime.now().timestamp() * 1000)
+        return await self.collection.find_one_and_update(
+            {"_id": key},
+            {"$set": {"last_used": now_ms}}
+        )
+    
+    async def put(self, key: str, entry: Dict) -> None:
+        now_ms = int(datetime.now().timestamp() * 1000)
+        document = {**entry, "_id": key, "created_at": now_ms, "last_used": now_ms}
+        try:
+            await self.collection.replace_one({"_id": key}, document, upsert=True)
+        except DocumentTooLarge:
+            # Very large (tiled) result sets do not fit in one document
+            print(f"[ClusteringCache] Result set too large to cache ({len(entry.get('noise', []))} noise events)")
+            return
+        await self.evict()
+    
+    async def evict(self) -> None:
+        """Drop least recently used entries beyond max_entries"""
+        cursor = self.collection.find(
+            {}, projection={"_id": 1}
+        ).sort("last_used", -1).skip(self.max_entries)
+        stale_keys = [doc["_id"] async for doc in cursor]
+        
+        if stale_keys:
+            await self.collection.delete_many({"_id": {"$in": stale_keys}})
+            print(f"[ClusteringCache] Evicted {len(stale_keys)} entries")
+
+
+class ClusteringHierarchyRepository:
+    """Persists the reachability hierarchy of the latest clustering run"""
+    
+    def __init__(self, collection):
+        self.collection = collection
+    
+    async def get_latest(self) -> Optional[Dict]:
+        return await self.collection.find_one({"_id": "latest"})
+    
+    async def set_latest(self, document: Dict) -> bool:
+        try:
+            await self.collection.replace_one(
+                {"_id": "latest"},
+                {**document, "_id": "latest"},
+                upsert=True
+            )
+        except DocumentTooLarge:
+            print(f"[ClusteringHierarchy] Hierarchy too large to persist ({len(document.get('ids', []))} events)")
+            return False
+        return True
+
+
+class RollupRepository:
+    """
+    Hourly and daily analytics rollups, maintained with $inc upserts at ingestion.
+    Each cell counts the events of one (bucket, region, magnitude bin, depth bin).
+    """
+    
+    HOUR_MS = 3600 * 1000
+    DAY_MS = 24 * HOUR_MS
+    SOURCE_FIELDS = ("time", "magnitude", "depth", "region")
+    
+    def __init__(self, hourly_collection, daily_collection, config_collection, hourly_retention_days: int):
+        self.hourly = hourly_collection
+        self.daily = daily_collection
+        self.config_collection = config_collection
+        self.hourly_retention_ms = hourly_retention_days * self.DAY_MS
+    
+    @staticmethod
+    def cell_key(doc: Dict, bucket_ms: int) -> Optional[Dict]:
+        """Same bins as AggregationPipelines.rollup_bin_fields, None without a time"""
+        time_ms = doc.get("time")
+        if time_ms is None:
+            return None
+        
+        magnitude, depth = doc.get("magnitude"), doc.get("depth")
+        mag_bin = int(math.floor(magnitude)) if magnitude is not None and 0 <= magnitude < 10 else -1
+        depth_bin = -1
+        if depth is not None:
+            depth_bin = max((lower for lower in ROLLUP_DEPTH_BINS_KM if depth >= lower), default=-1)
+        
+        return {
+            "bucket": int(time_ms) - int(time_ms) % bucket_ms,
+            "region": doc.get("region") or "",
+            "mag_bin": mag_bin,
+            "depth_bin": depth_bin
+        }
+    
+    def _cell_updates(self, doc: Dict, sign: int) -> List[Tuple[Any, UpdateOne]]:
+        magnitude = doc.get("magnitude")
+        inc = {
+            "count": sign,
+            "mag_count": sign if magnitude is not None else 0,
+            "mag_sum": sign * (magnitude or 0.0)
+        }
+        
+        updates = []
+        for collection, bucket_ms in ((self.hourly, self.HOUR_MS), (self.daily, self.DAY_MS)):
+            key = self.cell_key(doc, bucket_ms)
+            if key is None:
+                continue
+            update = {"$inc": inc}
+            if sign > 0:
+                # Extremes only grow; a retracted event may leave them slightly stale until the next rebuild
+                update["$min"] = {"first_time": int(doc["time"])}
+                update["$max"] = {"last_time": int(doc["time"])}
+                if magnitude is not None:
+                    update["$max"]["mag_max"] = magnitude
+            if collection is self.hourly:
+                update["$setOnInsert"] = {
+                    "expires_at": datetime.fromtimestamp((key["bucket"] + self.hourly_retention_ms) / 1000, tz=timezone.utc)
+                }
+            updates.append((collection, UpdateOne(key, update, upsert=True)))
+        return updates
+    
+    async def record(self, previous: Optional[Dict], current: Dict) -> None:
+        """Move one event's contribution from its previous cells (if re-ingested) to its current ones"""
+        source = {field: current.get(field) for field in self.SOURCE_FIELDS}
+        if previous is not None:
+            previous = {field: previous.get(field) for field in self.SOURCE_FIELDS}
+            if previous == source:
+                return
+        
+        updates = self._cell_updates(source, 1)
+        if previous is not None:
+            updates += self._cell_updates(previous, -1)
+        
+        for collection in (self.hourly, self.daily):
+            operations = [op for target, op in updates if target is collection]
+            if operations:
+                await collection.bulk_write(operations, ordered=False)
+    
+    async def is_ready(self) -> bool:
+        """Rollups only cover the whole collection after a rebuild; until then analytics read raw data"""
+        return await self.config_collection.find_one({"_id": "rollups"}) is not None
+    
+    async def rebuild(self, source_collection) -> None:
+        """Regenerate both rollups from the raw collection (stop ingestion while this runs)"""
+        await self.config_collection.delete_one({"_id": "rollups"})
+        now_ms = int(datetime.now().timestamp() * 1000)
+        
+        for collection, bucket_ms, expire_after_ms in (
+            (self.hourly, self.HOUR_MS, self.hourly_retention_ms),
+            (self.daily, self.DAY_MS, None)
+        ):
+            since_ms = now_ms - expire_after_ms if expire_after_ms else None
+            await collection.delete_many({})
+            pipeline = AggregationPipelines.rollup_rebuild_pipeline(
+                bucket_ms, collection.name, expire_after_ms, since_ms
+            )
+            await source_collection.aggregate(pipeline).to_list(length=None)
+            total = await collection.count_documents({})
+            print(f"[RollupRepo] Rebuilt {collection.name}: {total} cells")
+        
+        await self.config_collection.replace_one(
+            {"_id": "rollups"}, {"_id": "rollups", "built_at": now_ms}, upsert=True
+        )
+    
+    async def aggregate_daily(self, pipeline: List[Dict], limit: int) -> List[Dict]:
+        return await self.daily.aggregate(pipeline).to_list(length=limit)
+
+
+class HeatmapTileRepository:
+    """
+    Heatmap tile pyramid: per pyramid level, one document per (UTC day, grid cell)
+    holding the sums behind every weight mode. Maintained with $inc upserts at ingestion.
+    """
+    
+    DAY_MS = 24 * 3600 * 1000
+    SOURCE_FIELDS = ("time", "magnitude", "depth", "latitude", "longitude")
+    
+    def __init__(self, collection, config_collection, cell_sizes_deg: List[float]):
+        self.collection = collection
+        self.config_collection = config_collection
+        self.cell_sizes_deg = cell_sizes_deg
+    
+    def level_for_zoom(self, zoom: float) -> int:
+        """Finest level whose cells are still at least the target size for this web map zoom"""
+        target_deg = 360.0 / (2 ** zoom) / HEATMAP_CELLS_PER_MAP_TILE
+        level = 0
+        for index, cell_deg in enumerate(self.cell_sizes_deg):
+            if cell_deg >= target_deg:
+                level = index
+        return level
+    
+    @staticmethod
+    def cell_ranges(cell_deg: float, north: float, south: float, east: float, west: float) -> Tuple[List[Tuple[int, int]], Tuple[int, int]]:
+        """Inclusive cx ranges (two when crossing the antimeridian) and cy range of the cells in view"""
+        cy_range = (math.floor(south / cell_deg), math.floor(north / cell_deg))
+        if west <= east:
+            cx_ranges = [(math.floor(west / cell_deg), math.floor(east / cell_deg))]
+        else:
+            cx_ranges = [
+                (math.floor(west / cell_deg), math.floor(180.0 / cell_deg)),
+                (math.floor(-180.0 / cell_deg), math.floor(east / cell_deg))
+            ]
+        return cx_ranges, cy_range
+    
+    @staticmethod
+    def weights(doc: Dict) -> Dict:
+        magnitude, depth = doc.get("magnitude"), doc.get("depth")
+        return {
+            "count": 1,
+            "mag_count": 1 if magnitude is not None else 0,
+            "mag_sum": magnitude or 0.0,
+            "energy_sum": 10 ** ((magnitude or 0.0) / 2),
+            "depth_sum": 1 / ((depth or 0.0) + 1)
+        }
+    
+    def _cell_updates(self, doc: Dict, sign: int, place: Optional[str] = None) -> List[UpdateOne]:
+        if doc.get("time") is None or doc.get("latitude") is None or doc.get("longitude") is None:
+            return []
+        
+        day = int(doc["time"]) - int(doc["time"]) % self.DAY_MS
+        inc = {field: sign * value for field, value in self.weights(doc).items()}
+        updates = []
+        for level, cell_deg in enumerate(self.cell_sizes_deg):
+            key = {
+                "z": level,
+                "day": day,
+                "cx": math.floor(doc["longitude"] / cell_deg),
+                "cy": math.floor(doc["latitude"] / cell_deg)
+            }
+            update = {"$inc": inc}
+            if sign > 0:
+                update["$setOnInsert"] = {"sample_place": place}
+            updates.append(UpdateOne(key, update, upsert=True))
+        return updates
+    
+    async def record(self, previous: Optional[Dict], current: Dict) -> None:
+        """Move one event's contribution from its previous cells (if re-ingested) to its current ones"""
+        source = {field: current.get(field) for field in self.SOURCE_FIELDS}
+        if previous is not None:
+            previous = {field: previous.get(field) for field in self.SOURCE_FIELDS}
+            if previous == source:
+                return
+        
+        operations = self._cell_updates(source, 1, current.get("place"))
+        if previous is not None:
+            operations += self._cell_updates(previous, -1)
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+    
+    async def is_ready(self) -> bool:
+        return await self.config_collection.find_one({"_id": "heatmap_tiles"}) is not None
+    
+    async def rebuild(self, source_collection) -> None:
+        """Regenerate every pyramid level from the raw collection (stop ingestion while this runs)"""
+        await self.config_collection.delete_one({"_id": "heatmap_tiles"})
+        await self.collection.delete_many({})
+        for level, cell_deg in enumerate(self.cell_sizes_deg):
+            pipeline = AggregationPipelines.heatmap_tiles_rebuild_pipeline(level, cell_deg, self.collection.name)
+            await source_collection.aggregate(pipeline).to_list(length=None)
+        
+        total = await self.collection.count_documents({})
+        print(f"[HeatmapTileRepo] Rebuilt {len(self.cell_sizes_deg)} levels: {total} cells")
+        await self.config_collection.replace_one(
+            {"_id": "heatmap_tiles"},
+            {"_id": "heatmap_tiles", "built_at": int(datetime.now().timestamp() * 1000)},
+            upsert=True
+        )
+    
+    @staticmethod
+    def split_days(start_time: Optional[int], end_time: Optional[int]) -> Tuple[bool, Optional[int], Optional[int], List[Tuple[int, int]]]:
+        """
+        (use tiles, first full day, last full day, partial time ranges to read raw).
+        Whole UTC days inside the range come from the pyramid, the partial days at either end from raw events.
+        """
+        day_ms = HeatmapTileRepository.DAY_MS
+        first_day = None if start_time is None else -(-int(start_time) // day_ms) * day_ms
+        last_day = None if end_time is None else (int(end_time) + 1) // day_ms * day_ms - day_ms
+        
+        if first_day is not None and last_day is not None and first_day > last_day:
+            return False, None, None, [(start_time, end_time)]
+        
+        raw_ranges = []
+        if start_time is not None and start_time < first_day:
+            raw_ranges.append((int(start_time), first_day - 1))
+        if end_time is not None and end_time >= last_day + day_ms:
+            raw_ranges.append((last_day + day_ms, int(end_time)))
+        return True, first_day, last_day, raw_ranges
+    
+    @staticmethod
+    def to_cells(rows: List[Dict], cell_deg: float, weight_by: str) -> List[Dict]:
+        """Merge summed rows per cell and shape them like the heatmap endpoint (cell centers)"""
+        merged = {}
+        for row in rows:
+            key = (int(row["_id"]["cx"]), int(row["_id"]["cy"]))
+            cell = merged.setdefault(key, {"sample_place": row.get("sample_place")})
+            for field in ("count", "mag_count", "mag_sum", "energy_sum", "depth_sum"):
+                cell[field] = cell.get(field, 0) + (row.get(field) or 0)
+        
+        weight_fields = {"count": "count", "magnitude": "mag_sum", "energy": "energy_sum", "depth": "depth_sum"}
+        weight_field = weight_fields.get(weight_by, "mag_sum")
+        cells = []
+        for (cx, cy), cell in merged.items():
+            if cell["count"] <= 0:
+                continue
+            cells.append({
+                "lat": round((cy + 0.5) * cell_deg, 4),
+                "lon": round((cx + 0.5) * cell_deg, 4),
+                "weight": cell[weight_field],
+                "count": cell["count"],
+                "avg_mag": round(cell["mag_sum"] / cell["mag_count"], 1) if cell["mag_count"] else 0,
+                "region": cell["sample_place"]
+            })
+        cells.sort(key=lambda c: c["weight"], reverse=True)
+        return cells
+    
+    async def sum_cells(
+        self, level: int, cx_ranges: List[Tuple[int, int]], cy_range: Tuple[int, int],
+        first_day: Optional[int], last_day: Optional[int]
+    ) -> List[Dict]:
+        match = {
+            "z": level,
+            "cy": {"$gte": cy_range[0], "$lte": cy_range[1]},
+            "$or": [{"cx": {"$gte": lo, "$lte": hi}} for lo, hi in cx_ranges]
+        }
+        if first_day is not None or last_day is not None:
+            match["day"] = {}
+            if first_day is not None:
+                match["day"]["$gte"] = first_day
+            if last_day is not None:
+                match["day"]["$lte"] = last_day
+        
+        cursor = self.collection.aggregate(AggregationPipelines.heatmap_tiles_pipeline(match))
+        return await cursor.to_list(length=None)
+
+
+class DistributionSketchRepository:
+    """
+    Fixed-bin magnitude and depth histograms, one document per region plus one for
+    all regions, maintained with $inc upserts at ingestion. Histograms are sparse
+    {bin index: count} maps and merge by addition.
+    """
+    
+    ALL = "__all__"
+    SOURCE_FIELDS = ("magnitude", "depth", "region")
+    
+    def __init__(self, collection, config_collection, magnitude_bins: FixedBins, depth_bins: FixedBins):
+        self.collection = collection
+        self.config_collection = config_collection
+        self.magnitude_bins = magnitude_bins
+        self.depth_bins = depth_bins
+    
+    def _updates(self, doc: Dict, sign: int) -> List[UpdateOne]:
+        inc = {"count": sign}
+        mag_index = self.magnitude_bins.index(doc.get("magnitude"))
+        if mag_index is not None:
+            inc[f"magnitude.{mag_index}"] = sign
+        depth_index = self.depth_bins.index(doc.get("depth"))
+        if depth_index is not None:
+            inc[f"depth.{depth_index}"] = sign
+        return [
+            UpdateOne({"_id": key}, {"$inc": inc}, upsert=True)
+            for key in (doc.get("region") or "", self.ALL)
+        ]
+    
+    async def record(self, previous: Optional[Dict], current: Dict) -> None:
+        """Move one event's contribution from its previous bins (if re-ingested) to its current ones"""
+        source = {field: current.get(field) for field in self.SOURCE_FIELDS}
+        if previous is not None:
+            previous = {field: previous.get(field) for field in self.SOURCE_FIELDS}
+            if previous == source:
+                return
+        
+        operations = self._updates(source, 1)
+        if previous is not None:
+            operations += self._updates(previous, -1)
+        await self.collection.bulk_write(operations, ordered=False)
+    
+    async def is_ready(self) -> bool:
+        return await self.config_collection.find_one({"_id": "distribution_sketches"}) is not None
+    
+    async def rebuild(self, source_collection) -> None:
+        """Regenerate every histogram from the raw collection (stop ingestion while this runs)"""
+        await self.config_collection.delete_one({"_id": "distribution_sketches"})
+        pipeline = AggregationPipelines.sketch_rebuild_pipeline(self.magnitude_bins, self.depth_bins)
+        
+        docs = {}
+        async for row in source_collection.aggregate(pipeline):
+            for key in (row["_id"]["region"], self.ALL):
+                doc = docs.setdefault(key, {"_id": key, "count": 0, "magnitude": {}, "depth": {}})
+                doc["count"] += row["count"]
+                for field in ("magnitude", "depth"):
+                    index = row["_id"][field]
+                    if index is not None:
+                        doc[field][str(index)] = doc[field].get(str(index), 0) + row["count"]
+        
+        await self.collection.delete_many({})
+        if docs:
+            await self.collection.insert_many(list(docs.values()))
+        print(f"[SketchRepo] Rebuilt histograms for {len(docs) - 1} regions")
+        await self.config_collection.replace_one(
+            {"_id": "distribution_sketches"},
+            {"_id": "distribution_sketches", "built_at": int(datetime.now().timestamp() * 1000)},
+            upsert=True
+        )
+    
+    async def get(self, regions: Optional[List[str]] = None) -> Optional[Dict]:
+        """Histograms of all regions, or the merged histograms of the given ones"""
+        if not regions:
+            return await self.collection.find_one({"_id": self.ALL})
+        docs = await self.collection.find({"_id": {"$in": regions}}).to_list(length=len(regions))
+        if not docs:
+            return None
+        return {
+            "count": sum(doc.get("count", 0) for doc in docs),
+            "magnitude": merge_histograms(*(doc.get("magnitude") for doc in docs)),
+            "depth": merge_histograms(*(doc.get("depth") for doc in docs))
+        }
+    
+    def magnitude_bands(self, doc: Optional[Dict]) -> Dict[int, int]:
+        """Event counts per integer magnitude band (magnitude_stratum) of a histogram document"""
+        bands = {}
+        for index, count in ((doc or {}).get("magnitude") or {}).items():
+            band = magnitude_stratum(self.magnitude_bins.bin_lower(int(index)))
+            bands[band] = bands.get(band, 0) + count
+        return bands
+
+
+class ScatterSampleRepository:
+    """
+    Stratified bottom-k sample for the depth/magnitude scatter: per integer magnitude
+    band, the k events with the smallest sample_priority(id). The priority is fixed per
+    id, so re-ingestion is idempotent and a rebuild yields the same sample. A stratum
+    holds fewer than k members only while it has fewer than k events: a revision that
+    removes a member refills the slot from the source collection.
+    """
+    
+    SOURCE_FIELDS = ("magnitude", "depth", "time")
+    
+    def __init__(self, collection, config_collection, source_collection, per_stratum: int):
+        self.collection = collection
+        self.config_collection = config_collection
+        self.source_collection = source_collection
+        self.per_stratum = per_stratum
+    
+    @staticmethod
+    def sample_doc(doc: Dict) -> Optional[Dict]:
+        if doc.get("magnitude") is None or doc.get("depth") is None:
+            return None
+        return {
+            "id": doc["id"], "stratum": magnitude_stratum(doc["magnitude"]),
+            "priority": sample_priority(doc["id"]),
+            "magnitude": doc["magnitude"], "depth": doc["depth"], "time": doc.get("time")
+        }
+    
+    async def record(self, previous: Optional[Dict], current: Dict) -> None:
+        source = {field: current.get(field) for field in self.SOURCE_FIELDS}
+        if previous is not None:
+            if {field: previous.get(field) for field in self.SOURCE_FIELDS} == source:
+                return
+            removed = await self.collection.find_one_and_delete({"id": current["id"]})
+            if removed is not None:
+                # Otherwise the short stratum would admit the next event whatever its priority
+                await self.refill(removed["stratum"])
+                if await self.collection.find_one({"id": current["id"]}, projection={"_id": 1}):
+                    return
+        
+        doc = self.sample_doc(current)
+        if doc is None:
+            return
+        # Priority of the k-th member; the event joins only if it ranks below it
+        cutoff = await self.collection.find(
+            {"stratum": doc["stratum"]}, projection={"_id": 0, "priority": 1}
+        ).sort("priority", 1).skip(self.per_stratum - 1).limit(1).to_list(length=1)
+        if cutoff and doc["priority"] >= cutoff[0]["priority"]:
+            return
+        
+        await self.collection.replace_one({"id": doc["id"]}, doc, upsert=True)
+        if cutoff:
+            await self.collection.find_one_and_delete({"stratum": doc["stratum"]}, sort=[("priority", -1)])
+    
+    async def refill(self, stratum: int) -> None:
+        """
+        Admit the stratum's best non-member from the source collection. Scans the
+        stratum's events, but only runs when a revision touches one of its k members.
+        """
+        if stratum == -1:
+            band = {"$or": [{"magnitude": {"$lt": 0}}, {"magnitude": {"$gte": 10}}]}
+        else:
+            band = {"magnitude": {"$gte": stratum, "$lt": stratum + 1}}
+        members = {
+            doc["id"] for doc in await self.collection.find(
+                {"stratum": stratum}, projection={"_id": 0, "id": 1}
+            ).to_list(length=None)
+        }
+        cursor = self.source_collection.find(
+            {"magnitude": {"$type": "number"}, "depth": {"$type": "number"}, **band},
+            projection={"_id": 0, "id": 1, "magnitude": 1, "depth": 1, "time": 1}
+        ).batch_size(5000)
+        best = None
+        async for event in cursor:
+            if event["id"] in members:
+                continue
+            priority = sample_priority(event["id"])
+            if best is None or priority < best[0]:
+                best = (priority, event)
+        if best is not None:
+            await self.collection.replace_one({"id": best[1]["id"]}, self.sample_doc(best[1]), upsert=True)
+    
+    async def is_ready(self) -> bool:
+        return await self.config_collection.find_one({"_id": "scatter_sample"}) is not None
+    
+    async def rebuild(self, source_collection) -> None:
+        """Regenerate the sample in one pass over the raw collection (stop ingestion while this runs)"""
+        await self.config_collection.delete_one({"_id": "scatter_sample"})
+        heaps = {}  # stratum -> max-heap of (-priority, doc) holding the k smallest priorities
+        cursor = source_collection.find(
+            {"magnitude": {"$type": "number"}, "depth": {"$type": "number"}},
+            projection={"_id": 0, "id": 1, "magnitude": 1, "depth": 1, "time": 1}
+        ).batch_size(5000)
+        async for event in cursor:
+            doc = self.sample_doc(event)
+            heap = heaps.setdefault(doc["stratum"], [])
+            if len(heap) < self.per_stratum:
+                heapq.heappush(heap, (-doc["priority"], doc["id"], doc))
+            elif doc["priority"] < -heap[0][0]:
+                heapq.heapreplace(heap, (-doc["priority"], doc["id"], doc))
+        
+        docs = [doc for heap in heaps.values() for _, _, doc in heap]
+        await self.collection.delete_many({})
+        if docs:
+            await self.collection.insert_many(docs)
+        print(f"[ScatterSampleRepo] Rebuilt sample: {len(docs)} events in {len(heaps)} strata")
+        await self.config_collection.replace_one(
+            {"_id": "scatter_sample"},
+            {"_id": "scatter_sample", "built_at": int(datetime.now().timestamp() * 1000)},
+            upsert=True
+        )
+    
+    async def find_all(self) -> List[Dict]:
+        cursor = self.collection.find({}, projection={"_id": 0, "priority": 0}).sort("priority", 1)
+        return await cursor.to_list(length=None)
+
+
 class ConfigRepository:
     """Handles configuration storage and watching"""
     
@@ -481,6 +1969,13 @@ class ConfigRepository:
         doc = await self.collection.find_one({"_id": "clustering_params"})
         return doc or {}
     
+    async def bump_catalog_version(self) -> None:
+        await self.collection.update_one({"_id": "catalog_version"}, {"$inc": {"value": 1}}, upsert=True)
+    
+    async def get_catalog_version(self) -> int:
+        doc = await self.collection.find_one({"_id": "catalog_version"})
+        return int(doc["value"]) if doc else 0
+    
     async def set_clustering_params(self, params: Dict) -> None:
         await self.collection.update_one(
             {"_id": "clustering_params"},
@@ -508,43 +2003,173 @@ class ConfigRepository:
 class MongoHandler:
     """Main handler orchestrating all MongoDB operations"""
     
+    # Event fields clustering results depend on
+    CLUSTERING_INPUT_FIELDS = ("time", "latitude", "longitude", "magnitude", "depth", "place")
+    
     def __init__(self):
         self.db_connection = DatabaseConnection(MONGO_URI, MONGO_DB_NAME)
+        self.storage_mode = EARTHQUAKE_STORAGE_MODE
         
-        self.earthquake_repo = EarthquakeRepository(
-            self.db_connection.get_collection('earthquakes')
-        )
+        if self.storage_mode == "timeseries":
+            self.earthquake_repo = TimeSeriesEarthquakeRepository(
+                self.db_connection.get_collection('earthquakes'),
+                self.db_connection.get_collection('earthquakes_raw')
+            )
+        else:
+            self.earthquake_repo = EarthquakeRepository(
+                self.db_connection.get_collection('earthquakes')
+            )
         self.cluster_repo = ClusterRepository(
             self.db_connection.get_collection('clusters')
         )
         self.config_repo = ConfigRepository(
             self.db_connection.get_collection('config')
         )
+        self.clustering_cache_repo = ClusteringCacheRepository(
+            self.db_connection.get_collection('clustering_cache'),
+            CLUSTERING_CACHE_MAX_ENTRIES
+        )
+        self.clustering_hierarchy_repo = ClusteringHierarchyRepository(
+            self.db_connection.get_collection('clustering_hierarchy')
+        )
+        self.rollup_repo = RollupRepository(
+            self.db_connection.get_collection('rollup_hourly'),
+            self.db_connection.get_collection('rollup_daily'),
+            self.db_connection.get_collection('config'),
+            ROLLUP_HOURLY_RETENTION_DAYS
+        )
+        self.heatmap_tile_repo = HeatmapTileRepository(
+            self.db_connection.get_collection('heatmap_tiles'),
+            self.db_connection.get_collection('config'),
+            HEATMAP_CELL_SIZES_DEG
+        )
+        self.sketch_repo = DistributionSketchRepository(
+            self.db_connection.get_collection('distribution_sketches'),
+            self.db_connection.get_collection('config'),
+            FixedBins(*SKETCH_MAGNITUDE_BINS),
+            FixedBins(*SKETCH_DEPTH_BINS_KM)
+        )
+        self.scatter_sample_repo = ScatterSampleRepository(
+            self.db_connection.get_collection('scatter_sample'),
+            self.db_connection.get_collection('config'),
+            self.db_connection.get_collection('earthquakes'),
+            SCATTER_SAMPLE_PER_STRATUM
+        )
     
     async def initialize(self):
         """Setup indexes and prepare collections"""
-        await IndexManager.setup_indexes(
-            self.db_connection.get_collection('earthquakes')
+        if self.storage_mode == "timeseries":
+            await StorageManager.ensure_timeseries_collection(self.db_connection.get_database(), 'earthquakes')
+            await IndexManager.setup_indexes(
+                self.db_connection.get_collection('earthquakes'), unique_ids=False
+            )
+            await IndexManager.setup_raw_index(
+                self.db_connection.get_collection('earthquakes_raw')
+            )
+        else:
+            await IndexManager.setup_indexes(
+                self.db_connection.get_collection('earthquakes')
+            )
+            await SchemaManager.apply_earthquake_validator(self.db_connection.get_database())
+        await IndexManager.setup_clustering_cache_index(
+            self.db_connection.get_collection('clustering_cache')
+        )
+        await IndexManager.setup_rollup_indexes(
+            self.db_connection.get_collection('rollup_hourly'), expiring=True
+        )
+        await IndexManager.setup_rollup_indexes(
+            self.db_connection.get_collection('rollup_daily')
+        )
+        await IndexManager.setup_heatmap_tile_index(
+            self.db_connection.get_collection('heatmap_tiles')
+        )
+        await IndexManager.setup_scatter_sample_indexes(
+            self.db_connection.get_collection('scatter_sample')
         )
     
     # Earthquake operations
     async def get_event(self, event_id: str) -> Optional[Dict]:
         return await self.earthquake_repo.find_by_id(event_id)
     
-    async def insert_earthquake(self, data: Dict) -> None:
-        await self.earthquake_repo.upsert(data)
+    async def insert_earthquake(self, data: Dict) -> Optional[Tuple[Optional[Dict], Dict]]:
+        """(previous version or None if new, stored document), None on failure"""
+        result = await self.earthquake_repo.upsert(data)
+        if result is None:
+            return None
+        
+        previous, stored = result
+        try:
+            # Inserts, revisions and late events alike invalidate clustering results
+            if previous is None or any(previous.get(f) != stored.get(f) for f in self.CLUSTERING_INPUT_FIELDS):
+                await self.config_repo.bump_catalog_version()
+        except Exception as e:
+            print(f"[Repo] Catalog version error for {data.get('id')}: {e}")
+        try:
+            await self.rollup_repo.record(previous, stored)
+            await self.heatmap_tile_repo.record(previous, stored)
+            await self.sketch_repo.record(previous, stored)
+            await self.scatter_sample_repo.record(previous, stored)
+        except Exception as e:
+            print(f"[Repo] Rollup update error for {data.get('id')}: {e}")
+        return result
     
     async def get_earthquakes(
         self, mag_min=None, mag_max=None, start_time=None, end_time=None,
         depth_min=None, depth_max=None, north=None, south=None, 
-        east=None, west=None, limit=100
+        east=None, west=None, limit=100, cluster_id=None
     ) -> List[Dict]:
         query = QueryBuilder.build_earthquake_query(
             mag_min, mag_max, start_time, end_time,
-            depth_min, depth_max, north, south, east, west
+            depth_min, depth_max, north, south, east, west,
+            cluster_id=cluster_id
         )
         return await self.earthquake_repo.find_with_filters(query, limit=limit)
     
+    async def get_earthquakes_page(
+        self, cursor: Optional[str] = None, limit: int = 100,
+        fields: Optional[str] = None, **filters
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Keyset-paginated variant of get_earthquakes, newest first, projected to a field profile"""
+        query = QueryBuilder.build_earthquake_query(**filters)
+        return await self.earthquake_repo.find_page(
+            query, limit=limit, cursor=cursor,
+            projection=FieldProfiles.projection(fields)
+        )
+    
+    async def get_latest_event_time(self) -> Optional[int]:
+        return await self.earthquake_repo.find_latest_time()
+    
+    async def get_catalog_watermark(self) -> Optional[Dict]:
+        """
+        Identifies the catalog state clustering results were computed on: the newest
+        event time plus a version bumped by every write to a clustering input field.
+        None while the catalog is empty.
+        """
+        latest = await self.earthquake_repo.find_latest_time()
+        if latest is None:
+            return None
+        return {"latest_time": latest, "version": await self.config_repo.get_catalog_version()}
+    
+    async def get_earliest_event_time(self) -> Optional[int]:
+        return await self.earthquake_repo.find_earliest_time()
+    
+    async def iter_earthquakes(
+        self, projection: Optional[Dict] = None, batch_size: int = 1000,
+        mag_min=None, mag_max=None, start_time=None, end_time=None,
+        depth_min=None, depth_max=None, north=None, south=None,
+        east=None, west=None, cluster_id=None
+    ):
+        """Stream filtered earthquakes (newest first) without materializing the result."""
+        query = QueryBuilder.build_earthquake_query(
+            mag_min, mag_max, start_time, end_time,
+            depth_min, depth_max, north, south, east, west,
+            cluster_id=cluster_id
+        )
+        async for doc in self.earthquake_repo.iter_with_filters(
+            query, projection=projection, batch_size=batch_size
+        ):
+            yield doc
+    
     async def update_earthquakes_with_cluster_id(self, updates: List[Tuple[str, int]]) -> None:
         await self.earthquake_repo.bulk_update_clusters(updates)
     
@@ -558,6 +2183,19 @@ class MongoHandler:
     async def get_clusters(self) -> List[Dict]:
         return await self.cluster_repo.find_all()
     
+    # Clustering result cache
+    async def get_cached_clustering(self, key: str) -> Optional[Dict]:
+        return await self.clustering_cache_repo.get(key)
+    
+    async def set_cached_clustering(self, key: str, entry: Dict) -> None:
+        await self.clustering_cache_repo.put(key, entry)
+    
+    async def get_clustering_hierarchy(self) -> Optional[Dict]:
+        return await self.clustering_hierarchy_repo.get_latest()
+    
+    async def set_clustering_hierarchy(self, document: Dict) -> bool:
+        return await self.clustering_hierarchy_repo.set_latest(document)
+    
     # Configuration operations
     async def get_clustering_config(self) -> Dict:
         return await self.config_repo.get_clustering_params()
@@ -568,45 +2206,114 @@ class MongoHandler:
     async def watch_config_changes(self, callback) -> None:
         await self.config_repo.watch_changes(callback)
     
+    async def watch_catalog_changes(self, callback) -> None:
+        """Calls callback(change) for every write to the earthquakes and clusters collections"""
+        # Time-series collections have no change streams; their ingest also writes earthquakes_raw
+        earthquakes = 'earthquakes_raw' if self.storage_mode == "timeseries" else 'earthquakes'
+        pipeline = [
+            {
+                "$match": {
+                    "ns.coll": {"$in": [earthquakes, 'clusters']},
+                    "operationType": {"$in": ["insert", "update", "replace", "delete"]}
+                }
+            },
+            {"$project": {"ns": 1, "operationType": 1, "updateDescription": 1, "fullDocument.time": 1}}
+        ]
+        
+        # The event time locates the cached time-bucket partials a write makes stale
+        async with self.db_connection.get_database().watch(pipeline, full_document="updateLookup") as stream:
+            print("[MongoDB] Catalog change watcher started")
+            async for change in stream:
+                await callback(change)
+    
     # Analytics and aggregations
-    async def get_heatmap_data(
-        self, start_time: int = None, end_time: int = None,
+    async def get_heatmap_partials(
+        self, range_start: int, range_end: int, bucket_ms: Optional[int],
+        mag_min: float = None, mag_max: float = None,
+        depth_min: float = None, depth_max: float = None
+    ) -> Dict[int, List[list]]:
+        """Heatmap cell sums of [range_start, range_end] per time bucket (one bucket when bucket_ms is None)"""
+        match_conditions = QueryBuilder.build_heatmap_query(
+            range_start, range_end, mag_min, mag_max, depth_min, depth_max
+        )
+        bucket = AggregationPipelines.time_bucket(range_start, bucket_ms)
+        pipeline = AggregationPipelines.heatmap_partial_pipeline(match_conditions, bucket)
+        return partial_aggregates.heatmap_partials(await self.earthquake_repo.aggregate(pipeline, limit=None))
+    
+    async def get_heatmap_cells(
+        self, zoom: float, north: float = None, south: float = None,
+        east: float = None, west: float = None,
+        start_time: int = None, end_time: int = None,
         mag_min: float = None, mag_max: float = None,
         depth_min: float = None, depth_max: float = None,
         weight_by: str = "magnitude"
-    ) -> List[Dict]:
-        match_conditions = {
-            "latitude": {"$exists": True, "$ne": None},
-            "longitude": {"$exists": True, "$ne": None}
+    ) -> Tuple[float, List[Dict]]:
+        """
+        (cell size, cells) for every grid cell intersecting the box at the pyramid level
+        matching the zoom. Whole days come from the tile pyramid; partial days and
+        magnitude/depth filtered queries aggregate raw events with the same grid.
+        """
+        tiles = self.heatmap_tile_repo
+        level = tiles.level_for_zoom(zoom)
+        cell_deg = tiles.cell_sizes_deg[level]
+        north = 90.0 if north is None else north
+        south = -90.0 if south is None else south
+        east = 180.0 if east is None else east
+        west = -180.0 if west is None else west
+        cx_ranges, cy_range = HeatmapTileRepository.cell_ranges(cell_deg, north, south, east, west)
+        
+        # Raw events are selected with the cell-aligned box, so edge cells are complete like pyramid cells
+        aligned = {
+            "north": min(90.0, (cy_range[1] + 1) * cell_deg),
+            "south": max(-90.0, cy_range[0] * cell_deg),
+            "west": max(-180.0, cx_ranges[0][0] * cell_deg),
+            "east": min(180.0, (cx_ranges[-1][1] + 1) * cell_deg)
         }
+        if west > east and aligned["west"] <= aligned["east"]:
+            aligned["west"], aligned["east"] = -180.0, 180.0
         
-        # Add time filter
-        if start_time is not None or end_time is not None:
-            time_filter = {}
-            if start_time:
-                time_filter["$gte"] = int(start_time)
-            if end_time:
-                time_filter["$lte"] = int(end_time)
-            match_conditions["time"] = time_filter
+        async def raw_rows(range_start, range_end):
+            match = QueryBuilder.build_earthquake_query(
+                mag_min, mag_max, range_start, range_end, depth_min, depth_max, **aligned
+            )
+            pipeline = AggregationPipelines.heatmap_cells_pipeline(match, cell_deg)
+            return await self.earthquake_repo.aggregate(pipeline, limit=None)
         
-        # Add magnitude filter
-        mag_filter = QueryBuilder.build_range_filter("magnitude", mag_min, mag_max)
-        if mag_filter:
-            match_conditions.update(mag_filter)
+        has_value_filters = any(v is not None for v in (mag_min, mag_max, depth_min, depth_max))
+        use_tiles, first_day, last_day, raw_ranges = HeatmapTileRepository.split_days(start_time, end_time)
         
-        # Add depth filter
-        depth_filter = QueryBuilder.build_range_filter("depth", depth_min, depth_max)
-        if depth_filter:
-            match_conditions.update(depth_filter)
+        if has_value_filters or not use_tiles or not await tiles.is_ready():
+            rows = await raw_rows(start_time, end_time)
+        else:
+            rows = await tiles.sum_cells(level, cx_ranges, cy_range, first_day, last_day)
+            for range_start, range_end in raw_ranges:
+                rows += await raw_rows(range_start, range_end)
         
-        pipeline = AggregationPipelines.heatmap_pipeline(match_conditions, weight_by)
-        return await self.earthquake_repo.aggregate(pipeline)
+        in_view = [
+            row for row in rows
+            if cy_range[0] <= row["_id"]["cy"] <= cy_range[1]
+            and any(lo <= row["_id"]["cx"] <= hi for lo, hi in cx_ranges)
+        ]
+        cells = HeatmapTileRepository.to_cells(in_view, cell_deg, weight_by)
+        return cell_deg, cells[:HEATMAP_MAX_CELLS]
     
     async def get_magnitude_distribution(self) -> List[Dict]:
+        if await self.sketch_repo.is_ready():
+            counts = self.sketch_repo.magnitude_bands(await self.sketch_repo.get())
+            return [
+                {"_id": "Other" if band == -1 else band, "count": count}
+                for band, count in sorted(counts.items()) if count > 0
+            ]
+        if await self.rollup_repo.is_ready():
+            pipeline = AggregationPipelines.rollup_magnitude_distribution_pipeline()
+            return await self.rollup_repo.aggregate_daily(pipeline, limit=20)
         pipeline = AggregationPipelines.magnitude_distribution_pipeline()
         return await self.earthquake_repo.aggregate(pipeline, limit=20)
     
     async def get_magnitude_trends(self) -> List[Dict]:
+        if await self.rollup_repo.is_ready():
+            pipeline = AggregationPipelines.rollup_daily_trends_pipeline()
+            return await self.rollup_repo.aggregate_daily(pipeline, limit=100)
         pipeline = AggregationPipelines.daily_trends_pipeline()
         return await self.earthquake_repo.aggregate(pipeline, limit=100)
     
@@ -617,26 +2324,148 @@ class MongoHandler:
         return await self.earthquake_repo.aggregate(pipeline, limit=5)
     
     async def get_depth_vs_magnitude(self, limit: int = 1000) -> List[Dict]:
+        """
+        Stratified sample when built: every magnitude band is represented, and `weight`
+        (band population / band sample size) re-weights points to the full catalog.
+        """
+        if await self.scatter_sample_repo.is_ready():
+            sample = await self.scatter_sample_repo.find_all()
+            population = self.sketch_repo.magnitude_bands(await self.sketch_repo.get())
+            sampled = {}
+            for point in sample:
+                sampled[point["stratum"]] = sampled.get(point["stratum"], 0) + 1
+            for point in sample:
+                point["weight"] = round(population.get(point["stratum"], 0) / sampled[point["stratum"]], 3)
+            return sample
         pipeline = AggregationPipelines.depth_magnitude_pipeline(limit)
         return await self.earthquake_repo.aggregate(pipeline, limit=limit)
     
+    async def get_distribution_summary(self, regions: Optional[List[str]] = None) -> Optional[Dict]:
+        """Magnitude/depth histograms and quantiles of the given regions (all regions by default)"""
+        doc = await self.sketch_repo.get(regions)
+        if doc is None:
+            return None
+        quantiles = [0.1, 0.5, 0.9, 0.99]
+        summary = {"regions": regions or "all", "count": doc.get("count", 0)}
+        for field, bins in (("magnitude", self.sketch_repo.magnitude_bins), ("depth", self.sketch_repo.depth_bins)):
+            histogram = doc.get(field) or {}
+            summary[field] = {
+                "bin_width": bins.width,
+                "quantiles": bins.quantiles(histogram, quantiles),
+                "histogram": bins.rows(histogram)
+            }
+        return summary
+    
     async def get_top_regions(self, limit: int = 10) -> List[Dict]:
+        if await self.rollup_repo.is_ready():
+            pipeline = AggregationPipelines.rollup_top_regions_pipeline(limit)
+            return await self.rollup_repo.aggregate_daily(pipeline, limit=limit)
         pipeline = AggregationPipelines.top_regions_pipeline(limit)
         return await self.earthquake_repo.aggregate(pipeline, limit=limit)
     
     async def get_regional_risk_scores(self, limit: int = 10) -> List[Dict]:
         thirty_days_ago = int((datetime.now() - timedelta(days=30)).timestamp() * 1000)
+        if await self.rollup_repo.is_ready():
+            pipeline = AggregationPipelines.rollup_risk_scores_pipeline(
+                self.rollup_repo.hourly.name, thirty_days_ago, limit
+            )
+            return await self.rollup_repo.aggregate_daily(pipeline, limit=limit)
         pipeline = AggregationPipelines.risk_scores_pipeline(thirty_days_ago, limit)
         return await self.earthquake_repo.aggregate(pipeline, limit=limit)
     
+    async def get_region_counts(self, since_ms: int, limit: int = 5000) -> List[Dict]:
+        """Events per region since since_ms as {_id: region, count}"""
+        if await self.rollup_repo.is_ready():
+            pipeline = AggregationPipelines.rollup_region_counts_pipeline(since_ms)
+            return await self.rollup_repo.aggregate_daily(pipeline, limit=limit)
+        pipeline = AggregationPipelines.region_counts_pipeline(since_ms)
+        return await self.earthquake_repo.aggregate(pipeline, limit=limit)
+    
     async def get_unusual_activity_detection(self) -> List[Dict]:
         forty_eight_hours_ago = int((datetime.now() - timedelta(hours=48)).timestamp() * 1000)
         current_time = int(datetime.now().timestamp() * 1000)
+        if await self.rollup_repo.is_ready():
+            pipeline = AggregationPipelines.rollup_unusual_activity_pipeline(
+                self.rollup_repo.hourly.name, forty_eight_hours_ago, current_time
+            )
+            return await self.rollup_repo.aggregate_daily(pipeline, limit=20)
         pipeline = AggregationPipelines.unusual_activity_pipeline(
             forty_eight_hours_ago, current_time
         )
         return await self.earthquake_repo.aggregate(pipeline, limit=20)
     
+    async def get_dashboard_partials(
+        self, range_start: int, range_end: int, bucket_ms: Optional[int],
+        north: float = None, south: float = None, east: float = None, west: float = None,
+        sample_size: int = 1000
+    ) -> Dict[int, Dict]:
+        """Mergeable dashboard aggregates of [range_start, range_end] per time bucket"""
+        match_conditions = QueryBuilder.build_earthquake_query(
+            start_time=range_start, end_time=range_end, north=north, south=south, east=east, west=west
+        )
+        bucket = AggregationPipelines.time_bucket(range_start, bucket_ms)
+        pipeline = AggregationPipelines.dashboard_partial_pipeline(match_conditions, bucket, sample_size)
+        rows = await self.earthquake_repo.aggregate(pipeline, limit=1)
+        return partial_aggregates.dashboard_partials(rows[0])
+    
+    # Maintenance
+    async def rebuild_rollups(self) -> None:
+        """Regenerate the analytics rollups, the heatmap tile pyramid and the distribution sketches"""
+        source = self.db_connection.get_collection('earthquakes')
+        await self.rollup_repo.rebuild(source)
+        await self.heatmap_tile_repo.rebuild(source)
+        await self.sketch_repo.rebuild(source)
+        await self.scatter_sample_repo.rebuild(source)
+    
+    async def ensure_rollups(self) -> None:
+        """Build the rollups once; called by the worker before it starts ingesting"""
+        source = self.db_connection.get_collection('earthquakes')
+        if not await self.rollup_repo.is_ready():
+            print("[MongoDB] Rollups missing, rebuilding from raw collection...")
+            await self.rollup_repo.rebuild(source)
+        if not await self.heatmap_tile_repo.is_ready():
+            print("[MongoDB] Heatmap tiles missing, rebuilding from raw collection...")
+            await self.heatmap_tile_repo.rebuild(source)
+        if not await self.sketch_repo.is_ready():
+            print("[MongoDB] Distribution sketches missing, rebuilding from raw collection...")
+            await self.sketch_repo.rebuild(source)
+        if not await self.scatter_sample_repo.is_ready():
+            print("[MongoDB] Scatter sample missing, rebuilding from raw collection...")
+            await self.scatter_sample_repo.rebuild(source)
+    
+    def schema_migration(self, batch_size: int = 1000) -> BatchMigration:
+        """Resumable rewrite of untyped earthquake documents into the canonical schema"""
+        return BatchMigration(
+            "typed_schema_v1",
+            self.db_connection.get_collection('earthquakes'),
+            self.db_connection.get_collection('config'),
+            DataTransformer.typed_update,
+            query=SchemaManager.untyped_query(),
+            batch_size=batch_size
+        )
+    
+    def region_backfill(self, batch_size: int = 1000) -> BatchMigration:
+        """Resumable recomputation of the stored region/city fields with region_normalizer"""
+        return BatchMigration(
+            "normalized_region_v1",
+            self.db_connection.get_collection('earthquakes'),
+            self.db_connection.get_collection('config'),
+            DataTransformer.location_update,
+            query={"place": {"$exists": True}},
+            batch_size=batch_size,
+            projection={"place": 1, "region": 1, "city": 1}
+        )
+    
+    def timeseries_migration(self, source_name: str, batch_size: int = 1000) -> TimeSeriesMigration:
+        """Resumable copy of a standard earthquake collection into the time-series layout"""
+        return TimeSeriesMigration(
+            self.db_connection.get_collection(source_name),
+            self.db_connection.get_collection('earthquakes'),
+            self.db_connection.get_collection('earthquakes_raw'),
+            self.db_connection.get_collection('config'),
+            batch_size=batch_size
+        )
+    
     def close(self):
         self.db_connection.disconnect()
 
@@ -1,7 +1,10 @@
 from neo4j import GraphDatabase
 from config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+from region_normalizer import split_place, UNKNOWN_REGION
+from geo_utils import bounding_box, near_pairs
 import json
 import os
+import time
 import httpx
 
 
@@ -14,6 +17,108 @@ DEFAULT_RULES = {
 }
 
 
+class GraphSchemaManager:
+    """
+    Versioned graph schema: uniqueness constraints behind every MERGE key, point indexes
+    for proximity lookups, range indexes for time/magnitude filters. Each migration's
+    statements are idempotent (IF NOT EXISTS); the applied version is kept on a
+    :SchemaVersion node so startup only runs what is new.
+    """
+
+    SCHEMA_NAME = "earthquake_graph"
+
+    MIGRATIONS = [
+        (1, "uniqueness constraints on merge keys", [
+            "CREATE CONSTRAINT earthquake_id IF NOT EXISTS FOR (e:Earthquake) REQUIRE e.id IS UNIQUE",
+            "CREATE CONSTRAINT region_name IF NOT EXISTS FOR (r:Region) REQUIRE r.name IS UNIQUE",
+            "CREATE CONSTRAINT city_name IF NOT EXISTS FOR (c:City) REQUIRE c.name IS UNIQUE",
+            "CREATE CONSTRAINT fault_zone_name IF NOT EXISTS FOR (fz:FaultZone) REQUIRE fz.name IS UNIQUE",
+            "CREATE CONSTRAINT cluster_id IF NOT EXISTS FOR (cl:Cluster) REQUIRE cl.id IS UNIQUE",
+        ]),
+        (2, "point and range indexes", [
+            "CREATE POINT INDEX earthquake_location IF NOT EXISTS FOR (e:Earthquake) ON (e.location)",
+            "CREATE POINT INDEX city_location IF NOT EXISTS FOR (c:City) ON (c.location)",
+            "CREATE POINT INDEX fault_zone_location IF NOT EXISTS FOR (fz:FaultZone) ON (fz.location)",
+            "CREATE RANGE INDEX earthquake_time IF NOT EXISTS FOR (e:Earthquake) ON (e.time)",
+            "CREATE RANGE INDEX earthquake_mag IF NOT EXISTS FOR (e:Earthquake) ON (e.mag)",
+        ]),
+        (3, "NEAR edge time index for window pruning", [
+            "CREATE RANGE INDEX near_time IF NOT EXISTS FOR ()-[r:NEAR]-() ON (r.time)",
+            # Edges from the old all-pairs query carry no time; later runs rebuild the window
+            """
+            MATCH ()-[r:NEAR]->() WHERE r.time IS NULL
+            CALL { WITH r DELETE r } IN TRANSACTIONS OF 10000 ROWS
+            """,
+        ]),
+    ]
+
+    VERSION = MIGRATIONS[-1][0]
+
+    GET_VERSION_QUERY = "MATCH (v:SchemaVersion {name: $name}) RETURN v.version AS version"
+
+    SET_VERSION_QUERY = """
+    MERGE (v:SchemaVersion {name: $name})
+    SET v.version = $version, v.description = $description, v.applied_at = timestamp()
+    """
+
+    # Operators that read every node of a label / relationship of a type instead of an index
+    SCAN_OPERATORS = (
+        "AllNodesScan", "NodeByLabelScan",
+        "DirectedRelationshipTypeScan", "UndirectedRelationshipTypeScan",
+        "DirectedAllRelationshipsScan", "UndirectedAllRelationshipsScan"
+    )
+
+    def __init__(self, driver, index_timeout_seconds=300):
+        self.driver = driver
+        self.index_timeout_seconds = index_timeout_seconds
+
+    def current_version(self):
+        with self.driver.session() as session:
+            record = session.run(self.GET_VERSION_QUERY, name=self.SCHEMA_NAME).single()
+            return record["version"] if record else 0
+
+    def ensure(self):
+        """Applies pending migrations in order; returns the resulting schema version"""
+        version = self.current_version()
+        if version >= self.VERSION:
+            return version
+
+        with self.driver.session() as session:
+            for migration_version, description, statements in self.MIGRATIONS:
+                if migration_version <= version:
+                    continue
+                # Schema commands run in their own auto-commit transactions
+                for statement in statements:
+                    session.run(statement).consume()
+                session.run("CALL db.awaitIndexes($timeout)", timeout=self.index_timeout_seconds).consume()
+                session.run(
+                    self.SET_VERSION_QUERY, name=self.SCHEMA_NAME,
+                    version=migration_version, description=description
+                ).consume()
+                version = migration_version
+                print(f"[Neo4j] Schema migration {migration_version} applied: {description}")
+        return version
+
+    def plan_operators(self, query, **params):
+        """(operator, details) of every step of the EXPLAIN plan of a query, without running it"""
+        with self.driver.session() as session:
+            plan = session.run("EXPLAIN " + query, **params).consume().plan
+        operators = []
+        stack = [plan] if plan else []
+        while stack:
+            step = stack.pop()
+            operators.append((step["operatorType"].split("@")[0], str(step.get("args", {}).get("Details", ""))))
+            stack.extend(step.get("children", []))
+        return operators
+
+    def unindexed_scans(self, query, **params):
+        """Label and full-graph scans in a query plan (empty when every lookup is index-backed)"""
+        return [
+            (operator, details) for operator, details in self.plan_operators(query, **params)
+            if operator in self.SCAN_OPERATORS
+        ]
+
+
 class Neo4jHandler:
     SEED_FAULTS = [
         {"name": "San Andreas Fault", "lat": 35.1, "lon": -119.6},
@@ -29,54 +134,89 @@ class Neo4jHandler:
     SET fz.location = point({latitude: f.lat, longitude: f.lon})
     """
 
-    INSERT_EARTHQUAKE_QUERY = """
-    MERGE (r:Region {name: $region_name})
-    MERGE (c:City {name: $city_name})
+    # Batch ingestion: every statement UNWINDs the same $rows (see _ingest_row), all of
+    # them run in one write transaction
+    INSERT_EARTHQUAKES_QUERY = """
+    UNWIND $rows AS row
+    MERGE (r:Region {name: row.region_name})
+    MERGE (c:City {name: row.city_name})
     MERGE (c)-[:LOCATED_IN]->(r)
 
     // Set City location if not exists (using this event as proxy)
-    FOREACH (ignoreMe IN CASE WHEN c.location IS NULL THEN [1] ELSE [] END | 
-        SET c.location = point({latitude: toFloat($lat), longitude: toFloat($lon)})
-    )
+    SET c.location = coalesce(c.location, point({latitude: row.lat, longitude: row.lon}))
 
-    MERGE (e:Earthquake {id: $id})
-    SET e.mag = toFloat($mag),
-        e.time = toInteger($time),
-        e.readable_time = $readable_time,
-        e.place = $place,
-        e.exact_address = $exact_address,
-        e.location = point({latitude: toFloat($lat), longitude: toFloat($lon)})
+    MERGE (e:Earthquake {id: row.id})
+    SET e.mag = row.mag,
+        e.time = row.time,
+        e.readable_time = row.readable_time,
+        e.place = row.place,
+        e.exact_address = row.exact_address,
+        e.location = point({latitude: row.lat, longitude: row.lon})
 
     MERGE (e)-[:OCCURRED_NEAR]->(c)
     MERGE (e)-[:OCCURRED_IN]->(r)
+    """
 
-    // Link to Fault Zone (Rule-based distance)
-    WITH e, c, $fault_limit AS fault_limit
+    # Link to Fault Zone (Rule-based distance); candidates from the FaultZone point index
+    LINK_FAULTS_QUERY = """
+    UNWIND $rows AS row
+    MATCH (e:Earthquake {id: row.id})
     MATCH (fz:FaultZone)
-    WHERE point.distance(e.location, fz.location) < fault_limit 
+    WHERE point.withinBBox(
+        fz.location,
+        point({latitude: row.fault_box.south, longitude: row.fault_box.west}),
+        point({latitude: row.fault_box.north, longitude: row.fault_box.east})
+    )
+    AND point.distance(e.location, fz.location) < $fault_limit
     MERGE (e)-[:ON_FAULTLINE]->(fz)
+    """
 
-    // Link to Affected Cities (Impact Radius)
-    WITH e, $impact_km AS radius
+    # Link to Affected Cities (Impact Radius); candidates from the City point index
+    LINK_AFFECTED_CITIES_QUERY = """
+    UNWIND $rows AS row
+    MATCH (e:Earthquake {id: row.id})
     MATCH (affected_city:City)
-    WHERE point.distance(e.location, affected_city.location) < (radius * 1000)
+    WHERE point.withinBBox(
+        affected_city.location,
+        point({latitude: row.impact_box.south, longitude: row.impact_box.west}),
+        point({latitude: row.impact_box.north, longitude: row.impact_box.east})
+    )
+    AND point.distance(e.location, affected_city.location) < (row.impact_km * 1000)
     MERGE (e)-[rel:AFFECTED_ZONE]->(affected_city)
-    SET rel.radius_km = radius
+    SET rel.radius_km = row.impact_km
     """
 
+    LINK_CLUSTERS_QUERY = """
+    UNWIND $rows AS row
+    WITH row WHERE row.cluster_id IS NOT NULL
+    MATCH (e:Earthquake {id: row.id})
+    MATCH (cl:Cluster {id: row.cluster_id})
+    MERGE (e)-[:BELONGS_TO_CLUSTER]->(cl)
+    """
+
+    # Candidates come from the time range index or the location point index (bounding box
+    # of the rule distance); exact distance and time are only computed for those
     LINK_RELATED_EVENTS_QUERY = """
-    MATCH (new:Earthquake {id: $id})
+    UNWIND $rows AS row
+    MATCH (new:Earthquake {id: row.id})
     MATCH (other:Earthquake)
-    WHERE other.id <> new.id
-    AND other.mag >= $min_mag
-    AND new.location IS NOT NULL AND other.location IS NOT NULL
+    WHERE other.time >= row.aftershock.time_from AND other.time <= row.aftershock.time_to
+    AND point.withinBBox(
+        other.location,
+        point({latitude: row.aftershock.south, longitude: row.aftershock.west}),
+        point({latitude: row.aftershock.north, longitude: row.aftershock.east})
+    )
+    AND other.id <> new.id
+    AND coalesce($positions[other.id], -1) < $positions[row.id]
+    AND other.mag >= $rules.min_main_mag
+    AND new.location IS NOT NULL
 
     WITH new, other, 
          point.distance(new.location, other.location) / 1000 AS dist_km,
          (toInteger(new.time) - toInteger(other.time)) / (1000 * 60 * 60 * 24.0) AS days_diff
 
-    WHERE dist_km <= $max_dist 
-    AND abs(days_diff) <= $max_days 
+    WHERE dist_km <= $rules.max_dist_km 
+    AND abs(days_diff) <= $rules.max_days_diff 
 
     // Determine relationship type dynamically
     FOREACH (_ IN CASE WHEN days_diff > 0 THEN [1] ELSE [] END |
@@ -90,17 +230,26 @@ class Neo4jHandler:
     """
 
     DETECT_CASCADES_QUERY = """
-    MATCH (new:Earthquake {id: $id})-[:ON_FAULTLINE]->(fz1:FaultZone)
-    MATCH (other:Earthquake)-[:ON_FAULTLINE]->(fz2:FaultZone)
-    WHERE fz1 <> fz2 
+    UNWIND $rows AS row
+    MATCH (new:Earthquake {id: row.id})-[:ON_FAULTLINE]->(fz1:FaultZone)
+    MATCH (other:Earthquake)
+    WHERE other.time >= row.cascade.time_from AND other.time <= row.cascade.time_to
+    AND point.withinBBox(
+        other.location,
+        point({latitude: row.cascade.south, longitude: row.cascade.west}),
+        point({latitude: row.cascade.north, longitude: row.cascade.east})
+    )
     AND other.id <> new.id
-    AND other.mag >= $min_mag
+    AND coalesce($positions[other.id], -1) < $positions[row.id]
+    AND other.mag >= $rules.min_other_mag
+    MATCH (other)-[:ON_FAULTLINE]->(fz2:FaultZone)
+    WHERE fz1 <> fz2
 
     WITH new, other, fz1, fz2,
          point.distance(new.location, other.location) / 1000 AS dist_km,
          abs(toInteger(new.time) - toInteger(other.time)) / (1000 * 60 * 60.0) AS hours_diff
 
-    WHERE dist_km <= $max_dist AND hours_diff <= $max_hours
+    WHERE dist_km <= $rules.max_dist_km AND hours_diff <= $rules.max_hours_diff
     MERGE (other)-[r:TRIGGERED]->(new)
     SET r.distance_km = dist_km,
         r.hours_diff = hours_diff,
@@ -108,10 +257,42 @@ class Neo4jHandler:
         r.to_fault = fz1.name
     """
 
+    EARTHQUAKE_PLACES_QUERY = """
+    MATCH (e:Earthquake)
+    WHERE e.id > $last_id AND e.place IS NOT NULL
+    RETURN e.id AS id, e.place AS place
+    ORDER BY e.id
+    LIMIT $limit
+    """
+
+    RELINK_LOCATIONS_QUERY = """
+    UNWIND $rows AS row
+    MATCH (e:Earthquake {id: row.id})
+    OPTIONAL MATCH (e)-[old:OCCURRED_IN|OCCURRED_NEAR]->()
+    DELETE old
+    WITH DISTINCT e, row
+    MERGE (r:Region {name: row.region_name})
+    MERGE (c:City {name: row.city_name})
+    MERGE (c)-[:LOCATED_IN]->(r)
+    SET c.location = coalesce(c.location, e.location)
+    MERGE (e)-[:OCCURRED_NEAR]->(c)
+    MERGE (e)-[:OCCURRED_IN]->(r)
+    """
+
+    DELETE_ORPHAN_LOCATIONS_QUERY = """
+    MATCH (c:City) WHERE NOT ()-[:OCCURRED_NEAR]->(c)
+    DETACH DELETE c
+    WITH count(*) AS ignored
+    MATCH (r:Region) WHERE NOT ()-[:OCCURRED_IN]->(r)
+    DETACH DELETE r
+    """
+
     def __init__(self):
         self.driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
         self.rules = {}
         self._load_rules()
+        self.schema = GraphSchemaManager(self.driver)
+        self.ensure_schema()
         self.seed_faults()
 
     def close(self):
@@ -133,6 +314,13 @@ class Neo4jHandler:
                 return rule["radius_km"]
         return self.rules.get("default_impact_radius", 10)
 
+    def ensure_schema(self):
+        try:
+            self.schema.ensure()
+        except Exception as e:
+            # e.g. duplicate City/Region names left by unconstrained MERGEs; retried on next startup
+            print(f"Error applying Neo4j schema: {e}")
+
     def seed_faults(self):
         try:
             with self.driver.session() as session:
@@ -183,36 +371,65 @@ class Neo4jHandler:
             print(f"Error ingesting faults from GeoJSON: {e}")
 
     def insert_earthquake(self, data):
+        self.insert_earthquakes([data])
+
+    def insert_earthquakes(self, batch):
+        """
+        Node MERGEs, place, fault, affected-city and cluster links, and aftershock/cascade
+        detection for a batch of events in a single managed write transaction (retried
+        by the driver on transient errors such as deadlocks between concurrent MERGEs).
+        """
+        if not batch:
+            return
+        aftershock, cascade = self._rule_set("aftershock_rules"), self._rule_set("cascade_rules")
+        rows = [self._ingest_row(data, aftershock, cascade) for data in batch]
+        fault_limit_m = self._fault_limit_km() * 1000
+        # Batch members only link to those before them, as if inserted one at a time
+        # (otherwise an in-batch pair gets both AFTERSHOCK_OF and FORESHOCK_OF)
+        positions = {row["id"]: i for i, row in enumerate(rows)}
+
+        def ingest(tx):
+            tx.run(self.INSERT_EARTHQUAKES_QUERY, rows=rows).consume()
+            tx.run(self.LINK_FAULTS_QUERY, rows=rows, fault_limit=fault_limit_m).consume()
+            tx.run(self.LINK_AFFECTED_CITIES_QUERY, rows=rows).consume()
+            tx.run(self.LINK_CLUSTERS_QUERY, rows=rows).consume()
+            tx.run(self.LINK_RELATED_EVENTS_QUERY, rows=rows, positions=positions, rules=aftershock).consume()
+            tx.run(self.DETECT_CASCADES_QUERY, rows=rows, positions=positions, rules=cascade).consume()
+
         with self.driver.session() as session:
-            place = data.get("place", "Unknown")
-            region_name, city_name = self._extract_location_details(place)
-
-            mag = float(data.get("magnitude", 0) or 0)
-            impact_km = self.compute_impact_radius(mag)
-            fault_limit_m = self.rules.get("fault_zone_distance_limit_km", 200) * 1000
-
-            session.run(
-                self.INSERT_EARTHQUAKE_QUERY,
-                region_name=region_name,
-                city_name=city_name,
-                id=data["id"],
-                mag=mag,
-                time=data["time"],
-                readable_time=data.get("readable_time", "N/A"),
-                place=place,
-                exact_address=data.get("exact_address", "Unknown"),
-                lat=data["latitude"],
-                lon=data["longitude"],
-                impact_km=impact_km,
-                fault_limit=fault_limit_m,
-            )
-
-            cluster_id = data.get("cluster_id")
-            if cluster_id:
-                self.link_earthquake_to_cluster(data["id"], cluster_id)
-
-            self._link_related_events(session, data)
-            self._detect_cascades(data)  # keeps same behavior as your code (opens its own session)
+            session.execute_write(ingest)
+
+    def _fault_limit_km(self):
+        return self.rules.get("fault_zone_distance_limit_km", 200)
+
+    @staticmethod
+    def _box(data, radius_km):
+        south, west, north, east = bounding_box(float(data["latitude"]), float(data["longitude"]), radius_km)
+        return {"south": south, "west": west, "north": north, "east": east}
+
+    def _ingest_row(self, data, aftershock, cascade):
+        place = data.get("place", "Unknown")
+        region_name, city_name = self._extract_location_details(place)
+        mag = float(data.get("magnitude", 0) or 0)
+        impact_km = self.compute_impact_radius(mag)
+        return {
+            "id": data["id"],
+            "region_name": region_name,
+            "city_name": city_name,
+            "mag": mag,
+            "time": int(data["time"]),
+            "readable_time": data.get("readable_time", "N/A"),
+            "place": place,
+            "exact_address": data.get("exact_address", "Unknown"),
+            "lat": float(data["latitude"]),
+            "lon": float(data["longitude"]),
+            "impact_km": impact_km,
+            "impact_box": self._box(data, impact_km),
+            "fault_box": self._box(data, self._fault_limit_km()),
+            "cluster_id": data.get("cluster_id") or None,
+            "aftershock": self._search_window(data, aftershock["max_dist_km"], int(aftershock["max_days_diff"] * 86400000)),
+            "cascade": self._search_window(data, cascade["max_dist_km"], int(cascade["max_hours_diff"] * 3600000)),
+        }
 
     def sync_clusters(self, clusters):
         query = """
@@ -256,68 +473,119 @@ class Neo4jHandler:
         except Exception as e:
             print(f"Error linking earthquake to cluster in Neo4j: {e}")
 
-    def create_near_relationships(self, max_dist_km=50, max_time_diff_hr=48):
-        query = """
-        MATCH (e1:Earthquake), (e2:Earthquake)
-        WHERE e1.id < e2.id
-        AND e1.location IS NOT NULL AND e2.location IS NOT NULL
-
-        WITH e1, e2,
-             point.distance(e1.location, e2.location) / 1000 AS dist_km,
-             abs(toInteger(e1.time) - toInteger(e2.time)) / (1000 * 3600.0) AS hours_diff
-
-        WHERE dist_km < $max_dist_km AND hours_diff < $max_time_diff_hr
-        MERGE (e1)-[r:NEAR]->(e2)
-        SET r.distance_km = dist_km,
-            r.time_diff_hr = hours_diff
-        """
-        try:
-            with self.driver.session() as session:
-                session.run(query, max_dist_km=max_dist_km, max_time_diff_hr=max_time_diff_hr)
-        except Exception as e:
-            print(f"Error creating NEAR relationships in Neo4j: {e}")
-
-    def _extract_location_details(self, place):
-        if "," not in place:
-            return "Unknown Region", place.strip()
-
-        parts = place.split(",")
-        region = parts[-1].strip()
-        remainder = parts[0]
+    NEAR_WINDOW_QUERY = """
+    MATCH (e:Earthquake)
+    WHERE e.time >= $start_time AND e.time <= $end_time AND e.location IS NOT NULL
+    RETURN e.id AS id, e.location.latitude AS lat, e.location.longitude AS lon, e.time AS time
+    """
 
-        if " of " in remainder:
-            city = remainder.split(" of ")[-1].strip()
-        else:
-            city = remainder.strip()
+    WRITE_NEAR_QUERY = """
+    UNWIND $pairs AS p
+    MATCH (e1:Earthquake {id: p.from_id})
+    MATCH (e2:Earthquake {id: p.to_id})
+    MERGE (e1)-[r:NEAR]->(e2)
+    SET r.distance_km = p.distance_km,
+        r.time_diff_hr = p.time_diff_hr,
+        r.time = p.time,
+        r.run = $run
+    """
 
-        return region, city
+    # Both prunes seek the NEAR.time range index: edges that left the window, and window
+    # edges the latest run did not write (pair no longer within the limits)
+    PRUNE_EXPIRED_NEAR_QUERY = """
+    MATCH ()-[r:NEAR]->()
+    WHERE r.time < $start_time
+    CALL { WITH r DELETE r } IN TRANSACTIONS OF 10000 ROWS
+    """
 
-    def _link_related_events(self, session, data):
-        rules = self.rules.get("aftershock_rules", {})
-        try:
-            session.run(
-                self.LINK_RELATED_EVENTS_QUERY,
-                id=data["id"],
-                min_mag=rules.get("min_main_mag", 5.0),
-                max_dist=rules.get("max_dist_km", 50),
-                max_days=rules.get("max_days_diff", 7),
-            )
-        except Exception as e:
-            print(f"Error linking related events: {e}")
+    PRUNE_STALE_NEAR_QUERY = """
+    MATCH ()-[r:NEAR]->()
+    WHERE r.time >= $start_time AND r.time <= $end_time AND r.run <> $run
+    CALL { WITH r DELETE r } IN TRANSACTIONS OF 10000 ROWS
+    """
 
-    def _detect_cascades(self, data):
-        rules = self.rules.get("cascade_rules", {})
+    def create_near_relationships(
+        self, max_dist_km=50, max_time_diff_hr=48, start_time=None, end_time=None, batch_size=5000
+    ):
+        """
+        NEAR edges between events of the clustering window closer than max_dist_km and
+        max_time_diff_hr. Pairs are generated with a space-time grid hash in NumPy and
+        written in UNWIND batches; stale NEAR edges are pruned.
+        """
+        end_time = int(time.time() * 1000) if end_time is None else int(end_time)
+        start_time = end_time - 7 * 24 * 3600 * 1000 if start_time is None else int(start_time)
+        run = int(time.time() * 1000)
         try:
             with self.driver.session() as session:
-                session.run(
-                    self.DETECT_CASCADES_QUERY,
-                    id=data["id"],
-                    min_mag=rules.get("min_other_mag", 4.0),
-                    max_dist=rules.get("max_dist_km", 200),
-                    max_hours=rules.get("max_hours_diff", 48),
+                rows = session.run(self.NEAR_WINDOW_QUERY, start_time=start_time, end_time=end_time).data()
+                ids = [row["id"] for row in rows]
+                times = [row["time"] for row in rows]
+                i, j, distances, time_diffs = near_pairs(
+                    [row["lat"] for row in rows], [row["lon"] for row in rows], times,
+                    max_dist_km, int(max_time_diff_hr * 3600 * 1000)
                 )
+                pairs = [
+                    {
+                        # Same direction as before: lower id -> higher id
+                        "from_id": min(ids[a], ids[b]), "to_id": max(ids[a], ids[b]),
+                        "distance_km": distance, "time_diff_hr": diff / 3600000.0,
+                        "time": min(times[a], times[b])
+                    }
+                    for a, b, distance, diff in zip(
+                        i.tolist(), j.tolist(), distances.tolist(), time_diffs.tolist()
+                    )
+                ]
+                for k in range(0, len(pairs), batch_size):
+                    session.execute_write(
+                        lambda tx, batch: tx.run(self.WRITE_NEAR_QUERY, pairs=batch, run=run).consume(),
+                        pairs[k:k + batch_size]
+                    )
+                session.run(self.PRUNE_EXPIRED_NEAR_QUERY, start_time=start_time).consume()
+                session.run(self.PRUNE_STALE_NEAR_QUERY, start_time=start_time, end_time=end_time, run=run).consume()
+            print(f"[Neo4j] NEAR: {len(pairs)} pairs among {len(ids)} events in the window")
         except Exception as e:
-            print(f"Error detecting cascades: {e}")
+            print(f"Error creating NEAR relationships in Neo4j: {e}")
+
+    def _extract_location_details(self, place):
+        region, city = split_place(place)
+        return region or UNKNOWN_REGION, city or (place or "").strip() or "Unknown"
+
+    def backfill_locations(self, batch_size=1000):
+        """Re-link every earthquake to its normalized Region/City nodes, in id-ordered batches."""
+        total = 0
+        last_id = ""
+        with self.driver.session() as session:
+            while True:
+                records = session.run(
+                    self.EARTHQUAKE_PLACES_QUERY, last_id=last_id, limit=batch_size
+                ).data()
+                if not records:
+                    break
+
+                rows = []
+                for record in records:
+                    region_name, city_name = self._extract_location_details(record["place"])
+                    rows.append({"id": record["id"], "region_name": region_name, "city_name": city_name})
+                session.run(self.RELINK_LOCATIONS_QUERY, rows=rows)
+
+                total += len(rows)
+                last_id = records[-1]["id"]
+                print(f"[Neo4j] Location backfill: {total} earthquakes re-linked")
+
+            session.run(self.DELETE_ORPHAN_LOCATIONS_QUERY)
+        return total
+
+    def _rule_set(self, name):
+        return {**DEFAULT_RULES[name], **self.rules.get(name, {})}
+
+    @staticmethod
+    def _search_window(data, max_dist_km, max_time_ms):
+        """Index bounds around an event: time range and the bounding box of the rule distance"""
+        event_time = int(data["time"])
+        return {
+            "time_from": event_time - max_time_ms, "time_to": event_time + max_time_ms,
+            **Neo4jHandler._box(data, max_dist_km)
+        }
 
     def get_earthquake_context(self, event_id):
         query = """
@@ -537,12 +805,20 @@ class Neo4jHandler:
             print(f"Error fetching top central quakes: {e}")
             return []
 
+    # Only Earthquake and Cluster nodes carry an id; labelled lookups use their constraints
+    NODE_NEIGHBORS_QUERY = """
+    CALL {
+        MATCH (n:Earthquake {id: $node_id}) RETURN n
+        UNION
+        MATCH (n:Cluster {id: $node_id}) RETURN n
+    }
+    MATCH (n)-[r]-(m)
+    RETURN n, r, m
+    LIMIT 50
+    """
+
     def get_node_neighbors(self, node_id):
-        query = """
-        MATCH (n {id: $node_id})-[r]-(m)
-        RETURN n, r, m
-        LIMIT 50
-        """
+        query = self.NODE_NEIGHBORS_QUERY
         try:
             with self.driver.session() as session:
                 result = session.run(query, node_id=node_id)
@@ -0,0 +1,95 @@
+import math
+import numpy as np
+
+# Mean Earth radius; slightly smaller than the radius Neo4j's point.distance uses, so
+# boxes derived from it always contain the exact-distance circle
+EARTH_RADIUS_KM = 6371.0
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    (south, west, north, east) in degrees of the box containing every point within
+    radius_km of (lat, lon). west > east when the box crosses the antimeridian; boxes
+    reaching a pole span all longitudes.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    south, north = lat - math.degrees(angle), lat + math.degrees(angle)
+    if south <= -90.0 or north >= 90.0:
+        return max(south, -90.0), -180.0, min(north, 90.0), 180.0
+
+    # Widest longitude offset on the circle (reached north of the centre on the northern hemisphere)
+    ratio = math.sin(angle) / math.cos(math.radians(lat))
+    if ratio >= 1.0:
+        return south, -180.0, north, 180.0
+    delta = math.degrees(math.asin(ratio))
+    west, east = lon - delta, lon + delta
+    if west < -180.0:
+        west += 360.0
+    if east > 180.0:
+        east -= 360.0
+    return south, west, north, east
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km, element-wise over NumPy arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def near_pairs(lat, lon, time_ms, max_dist_km, max_time_ms):
+    """
+    (i, j, distance_km, time_diff_ms) of every pair i < j closer than max_dist_km and
+    max_time_ms. Events are hashed into a grid of max_dist_km cubes over 3D unit-sphere
+    coordinates (chord <= arc, so close pairs share or neighbour a cell) times max_time_ms
+    slots; only events in neighbouring cells are compared, with exact distances.
+    """
+    lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    time_ms = np.asarray(time_ms, dtype=np.int64)
+    empty = (np.empty(0, dtype=np.int64),) * 2 + (np.empty(0), np.empty(0, dtype=np.int64))
+    if len(lat) < 2 or max_dist_km <= 0 or max_time_ms <= 0:
+        return empty
+
+    phi, lam = np.radians(lat), np.radians(lon)
+    xyz = EARTH_RADIUS_KM * np.stack([np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)])
+    cells = np.vstack([
+        np.floor(xyz / max_dist_km).astype(np.int64),
+        ((time_ms - time_ms.min()) // max_time_ms)[None, :]
+    ])
+    cells -= cells.min(axis=1, keepdims=True) - 1  # every neighbour offset stays >= 0
+    dims = cells.max(axis=1) + 2
+    strides = np.array([dims[1] * dims[2] * dims[3], dims[2] * dims[3], dims[3], 1], dtype=np.int64)
+    keys = strides @ cells
+
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    left, right, distances, time_diffs = [], [], [], []
+    offsets = np.stack(np.meshgrid(*[[-1, 0, 1]] * 4, indexing="ij"), axis=-1).reshape(-1, 4)
+    for offset in offsets:
+        # Each unordered pair of cells once: the zero offset, and one of every +/- offset pair
+        nonzero = offset[offset != 0]
+        if len(nonzero) and nonzero[0] < 0:
+            continue
+        neighbour = keys + strides @ offset
+        lo = np.searchsorted(sorted_keys, neighbour, side="left")
+        counts = np.searchsorted(sorted_keys, neighbour, side="right") - lo
+        i = np.repeat(np.arange(len(keys)), counts)
+        if not len(i):
+            continue
+        starts = np.repeat(lo - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts)
+        j = order[starts + np.arange(len(i))]
+        if not len(nonzero):
+            keep = i < j
+            i, j = i[keep], j[keep]
+        dt = np.abs(time_ms[i] - time_ms[j])
+        keep = dt < max_time_ms
+        i, j, dt = i[keep], j[keep], dt[keep]
+        d = haversine_km(lat[i], lon[i], lat[j], lon[j])
+        keep = d < max_dist_km
+        left.append(np.minimum(i, j)[keep])
+        right.append(np.maximum(i, j)[keep])
+        distances.append(d[keep])
+        time_diffs.append(dt[keep])
+    if not left:
+        return empty
+    return np.concatenate(left), np.concatenate(right), np.concatenate(distances), np.concatenate(time_diffs)
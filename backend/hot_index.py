@@ -0,0 +1,337 @@
+import sys
+import math
+import time
+import asyncio
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from db_mongo import DataTransformer, FieldProfiles, PageCursor
+
+NUMERIC_FIELDS = ("time", "latitude", "longitude", "magnitude", "depth")
+OBJECT_FIELDS = ("id", "place", "region", "city", "url", "cluster_id")
+HELD_FIELDS = set(NUMERIC_FIELDS) | set(OBJECT_FIELDS)
+# Marks a field the stored document does not have (omitted from responses, like Mongo)
+MISSING = object()
+
+
+def feature_document(feature: Dict) -> Dict:
+    """Prepared earthquake document of a LIVE_CHANNEL USGS feature, with the producer's field defaults"""
+    properties, coordinates = feature["properties"], feature["geometry"]["coordinates"]
+    return DataTransformer.prepare_earthquake_data({
+        "id": str(feature["id"]),
+        "magnitude": float(properties.get("mag") or 0.0),
+        "place": str(properties.get("place") or "Unknown"),
+        "time": int(properties.get("time") or 0),
+        "url": str(properties.get("url") or ""),
+        "longitude": coordinates[0],
+        "latitude": coordinates[1],
+        "depth": coordinates[2]
+    })
+
+
+class WindowColumns:
+    """
+    Struct-of-arrays event store: numeric columns in growable NumPy arrays, strings in
+    lists, rows ordered by arrival. A grid over positions keeps row numbers sorted by
+    cell; rows appended since the last compaction form an unindexed tail that every
+    query scans. Updated or expired rows are only marked dead until the next compaction.
+    """
+
+    def __init__(self, cell_deg: float, capacity: int = 1024):
+        self.cell_deg = cell_deg
+        self.nx = int(math.ceil(360.0 / cell_deg))
+        self.ny = int(math.ceil(180.0 / cell_deg))
+        capacity = max(capacity, 1024)
+        self.numeric = {
+            field: np.empty(capacity, dtype=np.int64 if field == "time" else np.float64)
+            for field in NUMERIC_FIELDS
+        }
+        self.cell = np.empty(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.objects = {field: [] for field in OBJECT_FIELDS}
+        self.size = 0
+        self.dead = 0
+        self.row_of = {}  # event id -> live row
+        self.sorted_rows = np.empty(0, dtype=np.int64)
+        self.sorted_cells = np.empty(0, dtype=np.int32)
+        self.indexed_upto = 0
+
+    def cell_x(self, lon: float) -> int:
+        return min(self.nx - 1, max(0, int(math.floor((lon + 180.0) / self.cell_deg))))
+
+    def cell_y(self, lat: float) -> int:
+        return min(self.ny - 1, max(0, int(math.floor((lat + 90.0) / self.cell_deg))))
+
+    def _grow(self) -> None:
+        capacity = len(self.alive) * 2
+        for field, column in self.numeric.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.numeric[field] = grown
+        for name in ("cell", "alive"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def append(self, doc: Dict) -> None:
+        if self.size == len(self.alive):
+            self._grow()
+        row = self.size
+        self.numeric["time"][row] = int(doc["time"])
+        for field in NUMERIC_FIELDS[1:]:
+            value = doc.get(field)
+            self.numeric[field][row] = np.nan if value is None else float(value)
+        lat, lon = doc.get("latitude"), doc.get("longitude")
+        # -1: no position, never matched by a bounding box (no 2dsphere location either)
+        self.cell[row] = -1 if lat is None or lon is None else self.cell_y(lat) * self.nx + self.cell_x(lon)
+        self.alive[row] = True
+        for field in OBJECT_FIELDS:
+            self.objects[field].append(doc.get(field, MISSING))
+        self.row_of[doc["id"]] = row
+        self.size += 1
+
+    def remove(self, event_id: str) -> None:
+        row = self.row_of.pop(event_id, None)
+        if row is not None:
+            self.alive[row] = False
+            self.dead += 1
+
+    def expire(self, cutoff_ms: int) -> int:
+        """Marks rows older than cutoff_ms dead; returns how many"""
+        expired = np.nonzero(self.alive[:self.size] & (self.numeric["time"][:self.size] < cutoff_ms))[0]
+        ids = self.objects["id"]
+        for row in expired.tolist():
+            self.row_of.pop(ids[row], None)
+        self.alive[expired] = False
+        self.dead += len(expired)
+        return len(expired)
+
+    def compact(self) -> None:
+        """Drops dead rows, orders the rest by time and re-sorts them into the grid"""
+        keep = np.nonzero(self.alive[:self.size])[0]
+        keep = keep[np.argsort(self.numeric["time"][keep], kind="stable")]
+        count = len(keep)
+        for field, column in self.numeric.items():
+            self.numeric[field] = np.concatenate([column[keep], np.empty(max(1024, count // 4), dtype=column.dtype)])
+        self.cell = np.concatenate([self.cell[keep], np.empty(max(1024, count // 4), dtype=np.int32)])
+        self.alive = np.concatenate([np.ones(count, dtype=bool), np.zeros(max(1024, count // 4), dtype=bool)])
+        rows = keep.tolist()
+        for field in OBJECT_FIELDS:
+            column = self.objects[field]
+            self.objects[field] = [column[row] for row in rows]
+        self.size = count
+        self.dead = 0
+        self.row_of = {event_id: row for row, event_id in enumerate(self.objects["id"])}
+        self.sorted_rows = np.argsort(self.cell[:count], kind="stable")
+        self.sorted_cells = self.cell[:count][self.sorted_rows]
+        self.indexed_upto = count
+
+    def since(self, start_ms: Optional[int]) -> np.ndarray:
+        """Rows at or after start_ms (indexed rows are time-ordered), plus the unindexed tail"""
+        lo = 0 if start_ms is None else np.searchsorted(self.numeric["time"][:self.indexed_upto], start_ms, side="left")
+        return np.arange(lo, self.size)
+
+    def candidates(self, north: float, south: float, east: float, west: float) -> np.ndarray:
+        """Rows in the grid cells intersecting the box (plus the unindexed tail), before exact filtering"""
+        if west <= east:
+            x_ranges = [(self.cell_x(west), self.cell_x(east))]
+        else:
+            x_ranges = [(self.cell_x(west), self.nx - 1), (0, self.cell_x(east))]
+        slices = []
+        for cy in range(self.cell_y(south), self.cell_y(north) + 1):
+            for x0, x1 in x_ranges:
+                lo = np.searchsorted(self.sorted_cells, cy * self.nx + x0, side="left")
+                hi = np.searchsorted(self.sorted_cells, cy * self.nx + x1, side="right")
+                if hi > lo:
+                    slices.append(self.sorted_rows[lo:hi])
+        slices.append(np.arange(self.indexed_upto, self.size))
+        return np.concatenate(slices)
+
+    def memory_bytes(self) -> int:
+        """Approximate footprint: array buffers, list slots, distinct string objects and the id map"""
+        arrays = sum(c.nbytes for c in self.numeric.values()) + self.cell.nbytes + self.alive.nbytes
+        arrays += self.sorted_rows.nbytes + self.sorted_cells.nbytes
+        objects = {}
+        for column in self.objects.values():
+            arrays += 8 * len(column)
+            for value in column:
+                if value is not MISSING:
+                    objects[id(value)] = sys.getsizeof(value)
+        return arrays + sum(objects.values()) + sys.getsizeof(self.row_of)
+
+
+class HotWindowIndex:
+    """
+    The last `window_hours` of the catalog in API process memory. Answers
+    /earthquakes pages (newest first, keyset cursor) for the fields it holds, and
+    only when the answer is provably complete: the query starts inside the covered
+    window, or its page ends inside it (everything outside is older). Otherwise
+    query() returns None and the caller reads MongoDB.
+    """
+
+    COMPACT_TAIL_ROWS = 2048
+
+    def __init__(self, window_hours: float = 168.0, cell_deg: float = 5.0, clock=time.time):
+        self.window_ms = int(window_hours * 3600 * 1000)
+        self.cell_deg = cell_deg
+        self.clock = clock
+        self.columns = WindowColumns(cell_deg)
+        self.covered_from_ms = None  # every stored event at or after this time is held
+        self.ready = False
+        self._pending = None  # live events received while a reload is reading MongoDB
+        self.stats = {"hits": 0, "fallbacks": 0, "live_events": 0, "reloads": 0}
+
+    @staticmethod
+    def projection() -> Dict:
+        return {"_id": 0, **{field: 1 for field in HELD_FIELDS}}
+
+    def _apply(self, doc: Dict, columns: WindowColumns, covered_from_ms: int) -> None:
+        if doc.get("id") is None or doc.get("time") is None:
+            return
+        columns.remove(doc["id"])
+        if int(doc["time"]) >= covered_from_ms:
+            columns.append(doc)
+        if columns.size - columns.indexed_upto > self.COMPACT_TAIL_ROWS or columns.dead > columns.size // 4 + 1024:
+            columns.compact()
+
+    def upsert(self, doc: Dict) -> None:
+        """Adds or replaces one prepared earthquake document"""
+        self.stats["live_events"] += 1
+        if self._pending is not None:
+            self._pending.append(doc)
+        if self.ready:
+            self._apply(doc, self.columns, self.covered_from_ms)
+
+    def build(self, docs: List[Dict], covered_from_ms: int) -> WindowColumns:
+        columns = WindowColumns(self.cell_deg, int(len(docs) * 1.25))
+        for doc in docs:
+            if doc.get("id") is not None and doc.get("time") is not None and int(doc["time"]) >= covered_from_ms:
+                columns.remove(doc["id"])
+                columns.append(doc)
+        columns.compact()
+        return columns
+
+    async def reload(self, fetch) -> None:
+        """Replaces the contents with `await fetch(covered_from_ms)` documents, built off the event loop"""
+        covered_from_ms = int(self.clock() * 1000) - self.window_ms
+        self._pending = []
+        try:
+            docs = await fetch(covered_from_ms)
+            columns = await asyncio.to_thread(self.build, docs, covered_from_ms)
+        finally:
+            pending, self._pending = self._pending, None
+        for doc in pending:
+            self._apply(doc, columns, covered_from_ms)
+        self.columns, self.covered_from_ms, self.ready = columns, covered_from_ms, True
+        self.stats["reloads"] += 1
+        print(f"[HotIndex] Loaded {columns.size} events since {covered_from_ms}")
+
+    def evict(self, now_ms: Optional[int] = None) -> None:
+        """Moves the covered window forward, dropping the events that left it"""
+        if not self.ready:
+            return
+        cutoff = int(self.clock() * 1000 if now_ms is None else now_ms) - self.window_ms
+        if cutoff <= self.covered_from_ms:
+            return
+        self.columns.expire(cutoff)
+        self.covered_from_ms = cutoff
+        if self.columns.dead > self.columns.size // 4 + 1024:
+            self.columns.compact()
+
+    def query(
+        self, mag_min=None, mag_max=None, start_time=None, end_time=None,
+        depth_min=None, depth_max=None, north=None, south=None, east=None, west=None,
+        cluster_id=None, cursor: Optional[str] = None, limit: int = 100, fields: Optional[str] = None
+    ) -> Optional[Tuple[List[Dict], Optional[str]]]:
+        """
+        (rows, next cursor) like MongoHandler.get_earthquakes_page, or None to fall back.
+        Raises ValueError for invalid fields or cursors, like the MongoDB path.
+        """
+        projection = FieldProfiles.projection(fields)
+        names = [name for name in projection or {} if name != "_id"]
+        if (
+            not self.ready or projection is None or cluster_id is not None
+            or any(name not in HELD_FIELDS for name in names)
+            or (end_time is not None and int(end_time) < self.covered_from_ms)
+        ):
+            self.stats["fallbacks"] += 1
+            return None
+
+        columns = self.columns
+        numeric, ids = columns.numeric, columns.objects["id"]
+        bbox = not (north is None and south is None and east is None and west is None)
+        if not bbox:
+            rows = columns.since(None if start_time is None else int(start_time))
+        else:
+            north = 90.0 if north is None else float(north)
+            south = -90.0 if south is None else float(south)
+            east = 180.0 if east is None else float(east)
+            west = -180.0 if west is None else float(west)
+            rows = columns.candidates(north, south, east, west)
+        rows = rows[columns.alive[rows]]
+
+        times = numeric["time"][rows]
+        mask = np.ones(len(rows), dtype=bool)
+        for field, low, high in (("magnitude", mag_min, mag_max), ("depth", depth_min, depth_max)):
+            if low is not None:
+                mask &= numeric[field][rows] >= float(low)
+            if high is not None:
+                mask &= numeric[field][rows] <= float(high)
+        if start_time is not None:
+            mask &= times >= int(start_time)
+        if end_time is not None:
+            mask &= times <= int(end_time)
+        if bbox:
+            lat, lon = numeric["latitude"][rows], numeric["longitude"][rows]
+            mask &= (lat >= south) & (lat <= north)
+            mask &= ((lon >= west) & (lon <= east)) if west <= east else ((lon >= west) | (lon <= east))
+        if cursor:
+            cursor_time, cursor_id = PageCursor.decode(cursor)
+            ties = mask & (times == cursor_time)
+            mask &= times < cursor_time
+            for i in np.nonzero(ties)[0].tolist():
+                mask[i] = ids[rows[i]] < cursor_id
+        rows, times = rows[mask], times[mask]
+
+        # Top limit + 1 by (time desc, id desc): partition on time, sort only the ties at the edge
+        wanted = limit + 1
+        if len(rows) > wanted:
+            threshold = np.partition(times, len(times) - wanted)[len(times) - wanted]
+            rows = rows[times >= threshold]
+        top = sorted(rows.tolist(), key=lambda row: (numeric["time"][row], ids[row]), reverse=True)[:wanted]
+
+        complete = (start_time is not None and int(start_time) >= self.covered_from_ms) or (
+            len(top) == wanted and numeric["time"][top[-1]] >= self.covered_from_ms
+        )
+        if not complete:
+            self.stats["fallbacks"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        page = top[:limit]
+        next_cursor = None
+        if len(top) > limit:
+            next_cursor = PageCursor.encode({"time": numeric["time"][page[-1]], "id": ids[page[-1]]})
+        return self._documents(page, names), next_cursor
+
+    def _documents(self, page: List[int], names: List[str]) -> List[Dict]:
+        columns = {}
+        for name in names:
+            if name in self.columns.numeric:
+                values = self.columns.numeric[name][page].tolist()
+                # NaN (value != value) stands for a null field
+                columns[name] = values if name == "time" else [None if v != v else v for v in values]
+            else:
+                column = self.columns.objects[name]
+                columns[name] = [column[row] for row in page]
+        return [
+            {name: values[i] for name, values in columns.items() if values[i] is not MISSING}
+            for i in range(len(page))
+        ]
+
+    def snapshot(self) -> Dict:
+        return {
+            **self.stats, "ready": self.ready, "events": len(self.columns.row_of),
+            "covered_from": self.covered_from_ms
+        }
@@ -1,20 +1,95 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from typing import Optional
 from contextlib import asynccontextmanager
 import asyncio
+import time
 import redis.asyncio as redis
 import os
+import io
+import csv
 import json
-from config import REDIS_URL, LIVE_CHANNEL, ALERT_CHANNEL
+import numpy as np
+from config import (
+    REDIS_URL, LIVE_CHANNEL, ALERT_CHANNEL,
+    EVENT_CACHE_CHANNEL, EVENT_CACHE_MAX_ENTRIES, EVENT_CACHE_TTL_SECONDS,
+    ANALYTICS_CACHE_TTL_SECONDS, ANALYTICS_WINDOW_CACHE_TTL_SECONDS, ANALYTICS_CACHE_CHANNEL,
+    CACHE_L1_MAX_ENTRIES, CACHE_L1_TTL_SECONDS, CACHE_STALE_SECONDS,
+    PARTIAL_CACHE_HOURLY_HORIZON_HOURS, PARTIAL_CACHE_OPEN_TTL_SECONDS, PARTIAL_CACHE_MAX_RUN_BUCKETS,
+    PARTIAL_CACHE_CLOSED_TTL_SECONDS,
+    HOT_INDEX_WINDOW_HOURS, HOT_INDEX_CELL_DEG, HOT_INDEX_RELOAD_SECONDS,
+    ANOMALY_CHANNEL, ANOMALY_CURRENT_KEY
+)
 from socket_manager import manager
 from db_mongo import mongo_handler
 from db_neo4j import neo4j_handler
 from utils import MongoJSONEncoder
 from clustering import ClusteringEngine
+from cache import TTLCache, CacheLayer, TimeBucketCache, cache_key, on_grid
+from partial_aggregates import merge_heatmap, merge_dashboard
+from hot_index import HotWindowIndex, feature_document
 
 # Global Clustering Engine
 clustering_engine = ClusteringEngine()
 
+# Merged Mongo + Neo4j detail responses, invalidated by the worker over EVENT_CACHE_CHANNEL
+event_cache = TTLCache(EVENT_CACHE_MAX_ENTRIES, EVENT_CACHE_TTL_SECONDS)
+
+# Analytics/cluster responses: in-process L1 over Redis, Redis keys deleted by the worker,
+# L1 entries dropped over ANALYTICS_CACHE_CHANNEL
+cache_layer = CacheLayer(
+    REDIS_URL, CACHE_L1_MAX_ENTRIES, CACHE_L1_TTL_SECONDS, CACHE_STALE_SECONDS, encoder=MongoJSONEncoder
+)
+
+# Time-range responses composed from per-bucket partials in Redis (same pool as the cache layer)
+partial_cache = TimeBucketCache(
+    cache_layer.redis, PARTIAL_CACHE_HOURLY_HORIZON_HOURS, PARTIAL_CACHE_OPEN_TTL_SECONDS, ANALYTICS_CACHE_TTL_SECONDS,
+    max_run_buckets=PARTIAL_CACHE_MAX_RUN_BUCKETS, closed_ttl_seconds=PARTIAL_CACHE_CLOSED_TTL_SECONDS
+)
+# Filter values that may key partials: anything finer is aggregated directly, so arbitrary
+# floats cannot grow the partial keyspace
+PARTIAL_PARAM_STEPS = {
+    "mag_min": 0.1, "mag_max": 0.1, "depth_min": 1, "depth_max": 1,
+    "north": 1, "south": 1, "east": 1, "west": 1
+}
+
+# Last HOT_INDEX_WINDOW_HOURS of the catalog in memory for /earthquakes; live events arrive
+# over LIVE_CHANNEL, cluster_id and revisions with the periodic (or "*"-triggered) reloads
+hot_index = HotWindowIndex(HOT_INDEX_WINDOW_HOURS, HOT_INDEX_CELL_DEG)
+hot_index_reload = asyncio.Event()
+
+async def load_hot_window(covered_from_ms):
+    return [
+        doc async for doc in mongo_handler.iter_earthquakes(
+            projection=HotWindowIndex.projection(), batch_size=5000, start_time=covered_from_ms
+        )
+    ]
+
+async def run_hot_index():
+    """Keeps the hot window loaded: evicts every minute, reloads periodically or on request"""
+    last_reload = None
+    while True:
+        if last_reload is None or hot_index_reload.is_set() or time.time() - last_reload >= HOT_INDEX_RELOAD_SECONDS:
+            hot_index_reload.clear()
+            try:
+                await hot_index.reload(load_hot_window)
+            except Exception as e:
+                print(f"[HotIndex] Reload failed: {e}")
+            last_reload = time.time()
+        hot_index.evict()
+        try:
+            await asyncio.wait_for(hot_index_reload.wait(), timeout=60)
+        except asyncio.TimeoutError:
+            pass
+
+async def partial_range(start_time, end_time, now_ms):
+    """Inclusive time range of a request (open ends: first event / now), None if the catalog is empty"""
+    if start_time is None:
+        start_time = await mongo_handler.get_earliest_event_time()
+        if start_time is None:
+            return None
+    return int(start_time), int(now_ms if end_time is None else end_time)
+
 # Redis Subscriber Background Task
 async def redis_connector():
     """
@@ -24,10 +99,30 @@ async def redis_connector():
     pubsub = redis_client.pubsub()
     await pubsub.subscribe(LIVE_CHANNEL)
     await pubsub.subscribe(ALERT_CHANNEL)
+    await pubsub.subscribe(ANOMALY_CHANNEL)
+    await pubsub.subscribe(EVENT_CACHE_CHANNEL)
+    await pubsub.subscribe(ANALYTICS_CACHE_CHANNEL)
     
     try:
         async for message in pubsub.listen():
-            if message["type"] == "message":
+            if message["type"] != "message":
+                continue
+            if message["channel"] == EVENT_CACHE_CHANNEL:
+                if message["data"] == "*":
+                    event_cache.clear()
+                    # Clustering runs and backfills rewrite many events at once
+                    hot_index_reload.set()
+                else:
+                    event_cache.invalidate(message["data"])
+            elif message["channel"] == ANALYTICS_CACHE_CHANNEL:
+                for pattern in json.loads(message["data"]):
+                    cache_layer.invalidate_local(pattern)
+            else:
+                if message["channel"] == LIVE_CHANNEL:
+                    try:
+                        hot_index.upsert(feature_document(json.loads(message["data"])))
+                    except (KeyError, TypeError, ValueError, IndexError) as e:
+                        print(f"[HotIndex] Skipping live event: {e}")
                 # Broadcast the raw data to all connected clients
                 await manager.broadcast(message["data"])
     except Exception as e:
@@ -40,8 +135,10 @@ async def lifespan(app: FastAPI):
     # Startup: Initialize Mongo and start the Redis listener
     await mongo_handler.initialize()
     task = asyncio.create_task(redis_connector())
+    hot_index_task = asyncio.create_task(run_hot_index())
     yield
     # Shutdown (task cancellation can be added here if needed)
+    await cache_layer.close()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -57,6 +154,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Heatmap-Cell-Deg", "X-Heatmap-Fields"],
 )
 
 @app.get("/")
@@ -67,8 +165,11 @@ def read_root():
 async def get_clusters():
     """
     Get all active clusters.
+    Cached until the clusters change.
     """
-    return await mongo_handler.get_clusters()
+    return await cache_layer.get_or_compute(
+        cache_key("clusters:all"), mongo_handler.get_clusters, ANALYTICS_CACHE_TTL_SECONDS
+    )
 
 @app.get("/clusters/{cluster_id}")
 async def get_cluster_detail(cluster_id: str):
@@ -104,10 +205,55 @@ async def set_clustering_config(params: dict):
     
     return {"status": "updated", "config": new_config, "message": "Clustering config saved. Watcher will trigger re-clustering."}
 
+@app.get("/clustering/sweep")
+async def sweep_clustering(
+    eps_min: float = Query(5.0, gt=0),
+    eps_max: float = Query(200.0, gt=0),
+    steps: int = Query(20, ge=1, le=200),
+    include_labels: bool = Query(True)
+):
+    """
+    Cluster counts and per-event labels for a range of eps_km values over the active window.
+    Labels are aligned with the returned `ids`; -1 marks noise.
+    The neighbor structure is computed once and persisted with the latest run,
+    so the UI can scrub eps without a recompute per step.
+    """
+    if eps_min > eps_max:
+        raise HTTPException(status_code=400, detail="eps_min must not exceed eps_max")
+    return await clustering_engine.sweep(eps_min, eps_max, steps, include_labels)
+
+@app.get("/clustering/adhoc")
+async def run_adhoc_clustering(
+    start_time: Optional[int] = Query(None),
+    end_time: Optional[int] = Query(None),
+    north: Optional[float] = Query(None),
+    south: Optional[float] = Query(None),
+    east: Optional[float] = Query(None),
+    west: Optional[float] = Query(None),
+    eps_km: Optional[float] = Query(None, gt=0),
+    time_window_hours: Optional[float] = Query(None, gt=0),
+    min_samples: Optional[int] = Query(None, ge=1)
+):
+    """
+    Run clustering on an arbitrary bbox/time window without persisting results.
+    Unset parameters fall back to the active clustering config.
+    Results are served from the clustering cache when data has not changed.
+    """
+    return await clustering_engine.run_adhoc(
+        start_time=start_time, end_time=end_time,
+        north=north, south=south, east=east, west=west,
+        overrides={
+            "eps_km": eps_km,
+            "time_window_hours": time_window_hours,
+            "min_samples": min_samples
+        }
+    )
+
 # Force reload for analytics routes - Attempt 2
 
 @app.get("/earthquakes")
 async def get_quakes(
+    response: Response,
     mag_min: Optional[float] = Query(None), 
     mag_max: Optional[float] = Query(None), 
     start_time: Optional[int] = Query(None), 
@@ -119,25 +265,98 @@ async def get_quakes(
     east: Optional[float] = Query(None),
     west: Optional[float] = Query(None),
     cluster_id: Optional[str] = Query(None),
-    limit: int = Query(50)
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value of the previous page"),
+    fields: str = Query("full", description="map | summary | full, or a comma-separated field list"),
+    limit: int = Query(50, ge=1, le=5000)
 ):
     """
-    Fetch filtered earthquakes.
-    Example: /earthquakes?mag_min=5.0&limit=10&north=40&south=30
+    Fetch filtered earthquakes, newest first.
+    Example: /earthquakes?mag_min=5.0&limit=10&north=40&south=30&fields=map
+    A box with west > east crosses the antimeridian (e.g. west=170&east=-170).
+    When more rows exist, the X-Next-Cursor response header holds the token for the next page.
     """
-    quakes = await mongo_handler.get_earthquakes(
-        mag_min, mag_max, start_time, end_time, 
-        depth_min, depth_max, 
-        north, south, east, west, 
-        limit
+    filters = dict(
+        mag_min=mag_min, mag_max=mag_max, start_time=start_time, end_time=end_time,
+        depth_min=depth_min, depth_max=depth_max,
+        north=north, south=south, east=east, west=west,
+        cluster_id=cluster_id
     )
+    try:
+        # Served from memory when the recent window provably holds the whole page
+        page = hot_index.query(cursor=cursor, limit=limit, fields=fields, **filters)
+        if page is None:
+            page = await mongo_handler.get_earthquakes_page(cursor=cursor, limit=limit, fields=fields, **filters)
+        quakes, next_cursor = page
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Filter by cluster_id if provided (could be moved to mongo_handler for efficiency)
-    if cluster_id:
-        quakes = [q for q in quakes if q.get("cluster_id") == cluster_id]
-        
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return quakes
 
+EXPORT_CSV_FIELDS = [
+    "id", "time", "magnitude", "depth", "latitude", "longitude",
+    "place", "region", "cluster_id", "url"
+]
+
+@app.get("/earthquakes/export")
+async def export_quakes(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    mag_min: Optional[float] = Query(None), 
+    mag_max: Optional[float] = Query(None), 
+    start_time: Optional[int] = Query(None), 
+    end_time: Optional[int] = Query(None), 
+    depth_min: Optional[float] = Query(None),
+    depth_max: Optional[float] = Query(None),
+    north: Optional[float] = Query(None),
+    south: Optional[float] = Query(None),
+    east: Optional[float] = Query(None),
+    west: Optional[float] = Query(None),
+    cluster_id: Optional[str] = Query(None),
+    batch_size: int = Query(1000, ge=100, le=10000)
+):
+    """
+    Stream every matching earthquake as NDJSON or CSV, newest first.
+    Rows are written as cursor batches arrive, so memory stays flat for any result size.
+    Example: /earthquakes/export?format=csv&start_time=1700000000000
+    """
+    filters = dict(
+        mag_min=mag_min, mag_max=mag_max, start_time=start_time, end_time=end_time,
+        depth_min=depth_min, depth_max=depth_max,
+        north=north, south=south, east=east, west=west,
+        cluster_id=cluster_id
+    )
+    projection = {"_id": 0, "raw_json": 0, "location": 0}
+    
+    async def rows():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_FIELDS, extrasaction="ignore")
+        if export_format == "csv":
+            writer.writeheader()
+        
+        pending = 0
+        async for doc in mongo_handler.iter_earthquakes(projection=projection, batch_size=batch_size, **filters):
+            if export_format == "csv":
+                writer.writerow(doc)
+            else:
+                buffer.write(json.dumps(doc, cls=MongoJSONEncoder) + "\n")
+            pending += 1
+            if pending >= batch_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        
+        if buffer.tell():
+            yield buffer.getvalue()
+    
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="earthquakes.{export_format}"'}
+    )
+
 @app.get("/earthquakes/heatmap")
 async def get_heatmap(
     start_time: Optional[int] = Query(None),
@@ -156,16 +375,73 @@ async def get_heatmap(
       - "count": number of events
       - "energy": sum of 10^mag (seismic energy proxy)
       - "depth": inverse depth weighted (shallower = hotter)
+    Composed from cached per-day/per-hour partials, so any time range reuses them.
+    """
+    time_range = await partial_range(start_time, end_time, int(time.time() * 1000))
+    if time_range is None:
+        return []
+    
+    async def compute(range_start, range_end, bucket_ms):
+        return await mongo_handler.get_heatmap_partials(
+            range_start, range_end, bucket_ms, mag_min, mag_max, depth_min, depth_max
+        )
+    
+    filters = {"mag_min": mag_min, "mag_max": mag_max, "depth_min": depth_min, "depth_max": depth_max}
+    segments = await partial_cache.compose(
+        "heatmap", *time_range, compute, store=on_grid(filters, PARTIAL_PARAM_STEPS), **filters
+    )
+    return merge_heatmap(segments, weight_by)
+
+HEATMAP_BINARY_FIELDS = ["lat", "lon", "weight", "count", "avg_mag"]
+
+@app.get("/earthquakes/heatmap/tiles")
+async def get_heatmap_tiles(
+    zoom: float = Query(..., ge=0, le=22),
+    north: Optional[float] = Query(None, ge=-90, le=90),
+    south: Optional[float] = Query(None, ge=-90, le=90),
+    east: Optional[float] = Query(None, ge=-180, le=180),
+    west: Optional[float] = Query(None, ge=-180, le=180),
+    start_time: Optional[int] = Query(None),
+    end_time: Optional[int] = Query(None),
+    mag_min: Optional[float] = Query(None),
+    mag_max: Optional[float] = Query(None),
+    depth_min: Optional[float] = Query(None),
+    depth_max: Optional[float] = Query(None),
+    weight_by: str = Query("magnitude", pattern="^(magnitude|count|energy|depth)$"),
+    output_format: str = Query("json", alias="format", pattern="^(json|binary)$")
+):
     """
-    return await mongo_handler.get_heatmap_data(
-        start_time=start_time,
-        end_time=end_time,
-        mag_min=mag_min,
-        mag_max=mag_max,
-        depth_min=depth_min,
-        depth_max=depth_max,
+    Heatmap cells in view for a web map zoom level, from the precomputed tile pyramid.
+    Every cell intersecting the box is returned at the resolution matching the zoom
+    (west > east crosses the antimeridian).
+    format=binary returns little-endian float32 rows of lat, lon, weight, count, avg_mag
+    (cell centers), with the cell size in the X-Heatmap-Cell-Deg header.
+    """
+    if north is not None and south is not None and south > north:
+        raise HTTPException(status_code=400, detail="south must not exceed north")
+    
+    cell_deg, cells = await mongo_handler.get_heatmap_cells(
+        zoom, north=north, south=south, east=east, west=west,
+        start_time=start_time, end_time=end_time,
+        mag_min=mag_min, mag_max=mag_max,
+        depth_min=depth_min, depth_max=depth_max,
         weight_by=weight_by
     )
+    
+    if output_format == "binary":
+        rows = np.array(
+            [[cell[field] for field in HEATMAP_BINARY_FIELDS] for cell in cells],
+            dtype="<f4"
+        ).reshape(-1, len(HEATMAP_BINARY_FIELDS))
+        return Response(
+            content=rows.tobytes(),
+            media_type="application/octet-stream",
+            headers={
+                "X-Heatmap-Cell-Deg": str(cell_deg),
+                "X-Heatmap-Fields": ",".join(HEATMAP_BINARY_FIELDS)
+            }
+        )
+    return {"cell_deg": cell_deg, "cells": cells}
 
 @app.get("/neo4j/graph")
 async def get_graph_data(
@@ -203,32 +479,17 @@ async def get_latest_earthquakes(limit: int = 50):
     Fast access for real-time dashboard/playback.
     """
     from config import EVENT_BUFFER_KEY
-    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
     
     # Get top N elements from ZSET (sorted by score/timestamp descending)
-    events_raw = await redis_client.zrevrange(EVENT_BUFFER_KEY, 0, limit - 1)
-    await redis_client.aclose()
+    events_raw = await cache_layer.redis.zrevrange(EVENT_BUFFER_KEY, 0, limit - 1)
     
     events = [json.loads(e) for e in events_raw]
     return events
 
-@app.get("/analytics/magnitude-distribution")
-async def get_mag_dist():
-    """
-    Get earthquake counts grouped by magnitude ranges.
-    Caches results for 10 minutes.
-    """
-    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-    cache_key = "analytics:mag_dist"
-    
-    cached_data = await redis_client.get(cache_key)
-    if cached_data:
-        await redis_client.aclose()
-        return json.loads(cached_data)
-    
-    raw = await mongo_handler.get_magnitude_distribution()
+# Response shapes of the analytics routes, shared with /analytics/dashboard
+def format_mag_dist(items):
     dist = []
-    for item in raw:
+    for item in items:
         bucket_id = item.get("_id")
         if bucket_id == "Other":
             label = "Other"
@@ -237,49 +498,70 @@ async def get_mag_dist():
         else:
             label = str(bucket_id)
         dist.append({"bucket": label, "count": item.get("count", 0)})
-    await redis_client.set(cache_key, json.dumps(dist, cls=MongoJSONEncoder), ex=600)
-    await redis_client.aclose()
     return dist
 
+def format_trends(items):
+    return [{"label": item.get("_id"), "count": item.get("count", 0)} for item in items]
+
+def format_depth_mag(items):
+    return [
+        {"magnitude": d.get("magnitude"), "depth": d.get("depth"), **({"weight": d["weight"]} if "weight" in d else {})}
+        for d in items
+    ]
+
+def format_top_regions(items):
+    return [{"region": item.get("_id"), "count": item.get("count", 0)} for item in items]
+
+@app.get("/analytics/magnitude-distribution")
+async def get_mag_dist():
+    """
+    Get earthquake counts grouped by magnitude ranges.
+    Served from the rollups, cached until the catalog changes.
+    """
+    async def compute():
+        return format_mag_dist(await mongo_handler.get_magnitude_distribution())
+    
+    return await cache_layer.get_or_compute(cache_key("analytics:mag_dist"), compute, ANALYTICS_CACHE_TTL_SECONDS)
+
 @app.get("/analytics/magnitude-trends")
 async def get_mag_trends():
     """
     Get daily earthquake counts to show trends.
-    Caches results for 10 minutes.
+    Served from the rollups, cached until the catalog changes.
     """
-    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-    cache_key = "analytics:mag_trends"
-    
-    cached_data = await redis_client.get(cache_key)
-    if cached_data:
-        await redis_client.aclose()
-        return json.loads(cached_data)
+    async def compute():
+        return format_trends(await mongo_handler.get_magnitude_trends())
     
-    raw = await mongo_handler.get_magnitude_trends()
-    trends = [{"label": item.get("_id"), "count": item.get("count", 0)} for item in raw]
-    await redis_client.set(cache_key, json.dumps(trends, cls=MongoJSONEncoder), ex=600)
-    await redis_client.aclose()
-    return trends
+    return await cache_layer.get_or_compute(cache_key("analytics:mag_trends"), compute, ANALYTICS_CACHE_TTL_SECONDS)
 
 @app.get("/analytics/depth-vs-magnitude")
 async def get_depth_mag():
     """
     Get depth vs magnitude data for scatter plots.
-    Caches results for 1 hour.
+    A magnitude-stratified sample of the whole catalog; `weight` is how many events each point stands for.
+    Cached until the catalog changes.
     """
-    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-    cache_key = "analytics:depth_mag"
+    async def compute():
+        return format_depth_mag(await mongo_handler.get_depth_vs_magnitude())
     
-    cached_data = await redis_client.get(cache_key)
-    if cached_data:
-        await redis_client.aclose()
-        return json.loads(cached_data)
+    return await cache_layer.get_or_compute(cache_key("analytics:depth_mag"), compute, ANALYTICS_CACHE_TTL_SECONDS)
+
+@app.get("/analytics/distributions")
+async def get_distributions(regions: Optional[str] = Query(None, description="Comma-separated regions (default: all)")):
+    """
+    Magnitude and depth histograms with quantiles, from the per-region sketches.
+    Cached until the catalog changes.
+    """
+    region_list = sorted({r.strip() for r in regions.split(",") if r.strip()}) if regions else None
     
-    raw = await mongo_handler.get_depth_vs_magnitude()
-    data = [{"magnitude": d.get("magnitude"), "depth": d.get("depth")} for d in raw]
-    await redis_client.set(cache_key, json.dumps(data, cls=MongoJSONEncoder), ex=3600)
-    await redis_client.aclose()
-    return data
+    async def compute():
+        return await mongo_handler.get_distribution_summary(region_list)
+    
+    key = cache_key("analytics:distributions", regions=",".join(region_list) if region_list else None)
+    summary = await cache_layer.get_or_compute(key, compute, ANALYTICS_CACHE_TTL_SECONDS)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No distribution data for these regions")
+    return summary
 
 @app.get("/analytics/trends")
 async def get_trends_alias():
@@ -299,112 +581,162 @@ async def get_depth_magnitude_alias():
 async def get_top_regions(limit: int = 10):
     """
     Get top regions by earthquake count.
-    Caches results for 10 minutes.
+    Served from the rollups, cached until the catalog changes.
     """
-    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-    cache_key = f"analytics:top_regions:{limit}"
-
-    cached_data = await redis_client.get(cache_key)
-    if cached_data:
-        await redis_client.aclose()
-        return json.loads(cached_data)
-
-    raw = await mongo_handler.get_top_regions(limit=limit)
-    data = [{"region": item.get("_id"), "count": item.get("count", 0)} for item in raw]
-    await redis_client.set(cache_key, json.dumps(data, cls=MongoJSONEncoder), ex=600)
-    await redis_client.aclose()
-    return data
+    async def compute():
+        return format_top_regions(await mongo_handler.get_top_regions(limit=limit))
+    
+    key = cache_key("analytics:top_regions", limit=limit)
+    return await cache_layer.get_or_compute(key, compute, ANALYTICS_CACHE_TTL_SECONDS)
 
 @app.get("/analytics/risk-scores")
 async def get_risk_scores():
     """
     Get 0-100 risk scores for major regions.
-    Caches results for 24 hours.
+    Served from the rollups, cached until the catalog changes.
     """
-    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-    cache_key = "analytics:risk_scores"
-    
-    cached_data = await redis_client.get(cache_key)
-    if cached_data:
-        await redis_client.aclose()
-        return json.loads(cached_data)
-    
-    scores = await mongo_handler.get_regional_risk_scores()
-    await redis_client.set(cache_key, json.dumps(scores, cls=MongoJSONEncoder), ex=86400) # 24h
-    await redis_client.aclose()
-    return scores
+    return await cache_layer.get_or_compute(
+        cache_key("analytics:risk_scores"), mongo_handler.get_regional_risk_scores,
+        ANALYTICS_WINDOW_CACHE_TTL_SECONDS
+    )
 
 @app.get("/analytics/unusual-activity")
 async def get_unusual_activity():
     """
     Identify regions with significantly higher frequency than historical norms.
-    Caches results for 1 hour.
+    Current state of the worker's streaming detector; falls back to the rollups
+    (cached) while the detector is not running.
     """
-    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-    cache_key = "analytics:unusual_activity"
+    current = await cache_layer.redis.get(ANOMALY_CURRENT_KEY)
+    if current is not None:
+        return json.loads(current)
     
-    cached_data = await redis_client.get(cache_key)
-    if cached_data:
-        await redis_client.aclose()
-        return json.loads(cached_data)
+    return await cache_layer.get_or_compute(
+        cache_key("analytics:unusual_activity"), mongo_handler.get_unusual_activity_detection,
+        ANALYTICS_WINDOW_CACHE_TTL_SECONDS
+    )
+
+@app.get("/analytics/dashboard")
+async def get_dashboard(
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    north: Optional[float] = None,
+    south: Optional[float] = None,
+    east: Optional[float] = None,
+    west: Optional[float] = None,
+    limit: int = 10
+):
+    """
+    Every analytics chart dataset (same shapes as the individual routes) for an optional
+    time range and bounding box. Without filters it is assembled from the individual
+    routes (rollups, stratified sample, streaming detector state), each cached on its own;
+    the unfiltered dashboard itself is not cached as one unit.
+    Filtered requests are cached as one unit, composed from cached per-day/per-hour
+    partials (one $facet pass per run of at most PARTIAL_CACHE_MAX_RUN_BUCKETS missing
+    buckets), so new ranges reuse them.
+    """
+    if all(value is None for value in (start_time, end_time, north, south, east, west)):
+        mag_dist, trends, depth_mag, top_regions, risk_scores, unusual_activity = await asyncio.gather(
+            get_mag_dist(), get_mag_trends(), get_depth_mag(), get_top_regions(limit),
+            get_risk_scores(), get_unusual_activity()
+        )
+        return {
+            "magnitude_distribution": mag_dist,
+            "trends": trends,
+            "top_regions": top_regions,
+            "depth_vs_magnitude": depth_mag,
+            "risk_scores": risk_scores[:limit],
+            "unusual_activity": unusual_activity
+        }
+    
+    async def compute():
+        now_ms = int(time.time() * 1000)
+        thirty_days_ago, forty_eight_hours_ago = now_ms - 30 * 86400000, now_ms - 48 * 3600000
+        segments = []
+        time_range = await partial_range(start_time, end_time, now_ms)
+        if time_range is not None:
+            async def partials(range_start, range_end, bucket_ms):
+                return await mongo_handler.get_dashboard_partials(
+                    range_start, range_end, bucket_ms, north, south, east, west, sample_size=1000
+                )
+            
+            # Risk scores and unusual activity count events since these cut points
+            # v2: sample points carry their random key
+            bbox = {"north": north, "south": south, "east": east, "west": west}
+            segments = await partial_cache.compose(
+                "dashboard:v2", *time_range, partials, cuts=(thirty_days_ago, forty_eight_hours_ago),
+                now_ms=now_ms, store=on_grid(bbox, PARTIAL_PARAM_STEPS), **bbox
+            )
+        facets = merge_dashboard(segments, thirty_days_ago, forty_eight_hours_ago, now_ms, limit, limit, 1000)
+        return {
+            "magnitude_distribution": format_mag_dist(facets["magnitude_distribution"]),
+            "trends": format_trends(facets["trends"]),
+            "top_regions": format_top_regions(facets["top_regions"]),
+            "depth_vs_magnitude": format_depth_mag(facets["depth_vs_magnitude"]),
+            "risk_scores": facets["risk_scores"],
+            "unusual_activity": facets["unusual_activity"]
+        }
     
-    anomalies = await mongo_handler.get_unusual_activity_detection()
-    await redis_client.set(cache_key, json.dumps(anomalies, cls=MongoJSONEncoder), ex=3600) # 1h
-    await redis_client.aclose()
-    return anomalies
+    key = cache_key(
+        "analytics:dashboard", start_time=start_time, end_time=end_time,
+        north=north, south=south, east=east, west=west, limit=limit
+    )
+    return await cache_layer.get_or_compute(key, compute, ANALYTICS_WINDOW_CACHE_TTL_SECONDS)
 
 @app.get("/analytics/aftershocks")
 async def get_aftershocks(limit: int = 50):
     """
     Get identified aftershock sequences from Neo4j.
-    Caches results for 10 minutes.
+    Cached until new events are ingested.
     """
-    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-    cache_key = f"analytics:aftershocks:{limit}"
-    
-    cached_data = await redis_client.get(cache_key)
-    if cached_data:
-        await redis_client.aclose()
-        return json.loads(cached_data)
+    async def compute():
+        return await asyncio.to_thread(neo4j_handler.get_aftershock_sequences, limit)
     
-    data = neo4j_handler.get_aftershock_sequences(limit)
-    await redis_client.set(cache_key, json.dumps(data, cls=MongoJSONEncoder), ex=600)
-    await redis_client.aclose()
-    return data
+    key = cache_key("analytics:aftershocks", limit=limit)
+    return await cache_layer.get_or_compute(key, compute, ANALYTICS_CACHE_TTL_SECONDS)
 
 @app.get("/analytics/cascades")
 async def get_cascades(limit: int = 50):
     """
     Get identified cascade (triggered) events from Neo4j.
-    Caches results for 10 minutes.
+    Cached until new events are ingested.
     """
-    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-    cache_key = f"analytics:cascades:{limit}"
-    
-    cached_data = await redis_client.get(cache_key)
-    if cached_data:
-        await redis_client.aclose()
-        return json.loads(cached_data)
+    async def compute():
+        return await asyncio.to_thread(neo4j_handler.get_cascade_events, limit)
     
-    data = neo4j_handler.get_cascade_events(limit)
-    await redis_client.set(cache_key, json.dumps(data, cls=MongoJSONEncoder), ex=600)
-    await redis_client.aclose()
-    return data
+    key = cache_key("analytics:cascades", limit=limit)
+    return await cache_layer.get_or_compute(key, compute, ANALYTICS_CACHE_TTL_SECONDS)
+
+@app.get("/cache/metrics")
+async def get_cache_metrics():
+    """
+    Per-key hit/miss/stale counts and compute times of the response cache (this process).
+    """
+    return {
+        "event_cache": event_cache.stats, "partial_cache": partial_cache.stats,
+        "hot_index": hot_index.snapshot(), "keys": cache_layer.snapshot()
+    }
 
 @app.get("/earthquakes/{event_id}")
 async def get_earthquake_detail(event_id: str):
     """
     Fetch full details: Metadata (Mongo) + Relationships (Neo4j).
+    Cached in-process; concurrent misses share one fetch.
     """
-    # 1. Fetch Core Metadata
-    mongo_data = await mongo_handler.get_event(event_id)
-    if not mongo_data:
-        raise HTTPException(status_code=404, detail="Earthquake not found")
-    
-    # 2. Fetch Graph Context (Cities, Faults)
-    graph_context = neo4j_handler.get_earthquake_context(event_id)
+    async def load():
+        # 1. Fetch Core Metadata
+        mongo_data = await mongo_handler.get_event(event_id)
+        if not mongo_data:
+            return None
+        
+        # 2. Fetch Graph Context (Cities, Faults), off the event loop
+        graph_context = await asyncio.to_thread(neo4j_handler.get_earthquake_context, event_id)
+        return {**mongo_data, "context": graph_context}
     
-    return {**mongo_data, "context": graph_context}
+    detail = await event_cache.get_or_load(event_id, load)
+    if detail is None:
+        raise HTTPException(status_code=404, detail="Earthquake not found")
+    return detail
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -0,0 +1,26 @@
+import asyncio
+import argparse
+from db_mongo import mongo_handler
+
+async def main():
+    parser = argparse.ArgumentParser(description="Rewrite stored earthquakes into the typed schema")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint and scan from the start")
+    args = parser.parse_args()
+
+    print("Initializing Mongo...")
+    await mongo_handler.initialize()
+
+    migration = mongo_handler.schema_migration(batch_size=args.batch_size)
+    if args.restart:
+        await migration.config_collection.delete_one({"_id": migration.checkpoint_id})
+
+    state = await migration.run()
+    print(f"Migration complete. Scanned {state['scanned']}, modified {state['modified']}")
+
+    remaining = await migration.collection.count_documents(migration.query)
+    if remaining:
+        print(f"WARNING: {remaining} documents still do not match the schema (unconvertible values)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+import asyncio
+import argparse
+from db_mongo import mongo_handler, StorageManager
+
+# The standard collection is renamed aside (time-series collections cannot be renamed into place)
+LEGACY_COLLECTION = "earthquakes_standard"
+
+async def main():
+    parser = argparse.ArgumentParser(description="Move the earthquake catalog into the time-series storage mode")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint and copy from the start")
+    args = parser.parse_args()
+
+    if mongo_handler.storage_mode != "timeseries":
+        print("Set EARTHQUAKE_STORAGE_MODE=timeseries (and stop the worker) before migrating.")
+        return
+
+    database = mongo_handler.db_connection.get_database()
+    kind = await StorageManager.collection_type(database, "earthquakes")
+    if kind == "collection":
+        if await StorageManager.collection_type(database, LEGACY_COLLECTION):
+            print(f"Both earthquakes and {LEGACY_COLLECTION} are standard collections, resolve manually.")
+            return
+        print(f"Renaming earthquakes -> {LEGACY_COLLECTION}...")
+        await mongo_handler.db_connection.get_collection("earthquakes").rename(LEGACY_COLLECTION)
+    elif not await StorageManager.collection_type(database, LEGACY_COLLECTION):
+        print("Nothing to migrate.")
+        return
+
+    print("Initializing Mongo...")
+    await mongo_handler.initialize()
+
+    migration = mongo_handler.timeseries_migration(LEGACY_COLLECTION, batch_size=args.batch_size)
+    if args.restart:
+        await migration.config_collection.delete_one({"_id": migration.checkpoint_id})
+
+    state = await migration.run()
+    source_count = await migration.source.count_documents({})
+    target_count = await migration.target.count_documents({})
+    print(f"Migration complete. Copied {state['copied']} ({target_count} stored, {source_count} in source)")
+    print(f"{LEGACY_COLLECTION} was kept; drop it once the new collection is verified.")
+
+    mongo_handler.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
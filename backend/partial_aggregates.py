@@ -0,0 +1,151 @@
+import heapq
+from typing import Dict, List
+
+# Per-time-bucket partial aggregates (cache.TimeBucketCache) and their merges. Partials
+# are plain JSON: summed counts and sums, so any set of disjoint buckets merges exactly.
+
+DAY_MS = 24 * 3600 * 1000
+
+# Row layout of a heatmap partial: [lat, lon, count, mag_count, mag_sum, energy_sum, depth_sum, sample_place]
+HEATMAP_WEIGHT_INDEX = {"count": 2, "magnitude": 4, "energy": 5, "depth": 6}
+
+
+def heatmap_partials(rows: List[Dict]) -> Dict[int, List[list]]:
+    """{bucket: rows} from heatmap_partial_pipeline groups"""
+    partials = {}
+    for row in rows:
+        key = row["_id"]
+        partials.setdefault(int(key["bucket"]), []).append([
+            key["lat"], key["lon"], row["count"], row["mag_count"], row["mag_sum"],
+            row["energy_sum"], row["depth_sum"], row.get("sample_place")
+        ])
+    return partials
+
+
+def merge_heatmap(segments: List[tuple], weight_by: str, limit: int = 500) -> List[Dict]:
+    """Heatmap points of the merged segments, shaped like the /earthquakes/heatmap points"""
+    cells = {}
+    for _, _, rows in segments:
+        for row in rows:
+            cell = cells.get((row[0], row[1]))
+            if cell is None:
+                cells[(row[0], row[1])] = list(row)
+                continue
+            for i in range(2, 7):
+                cell[i] += row[i]
+            if cell[7] is None:
+                cell[7] = row[7]
+
+    index = HEATMAP_WEIGHT_INDEX.get(weight_by, HEATMAP_WEIGHT_INDEX["magnitude"])
+    points = [
+        {
+            "lat": cell[0], "lon": cell[1], "weight": cell[index], "count": cell[2],
+            "avg_mag": round(cell[4] / cell[3], 1) if cell[3] else 0, "region": cell[7]
+        }
+        for cell in cells.values()
+    ]
+    points.sort(key=lambda p: p["weight"], reverse=True)
+    return points[:limit]
+
+
+def dashboard_partials(facets: Dict) -> Dict[int, Dict]:
+    """{bucket: partial} from the dashboard_partial_pipeline facets"""
+    partials = {}
+
+    def partial(bucket):
+        return partials.setdefault(int(bucket), {"magnitude": [], "days": [], "regions": [], "count": 0, "points": []})
+
+    for row in facets["magnitude_distribution"]:
+        band = row["_id"]["band"]
+        partial(row["_id"]["bucket"])["magnitude"].append(["Other" if band == "Other" else int(band), row["count"]])
+    for row in facets["trends"]:
+        partial(row["_id"]["bucket"])["days"].append([row["_id"]["day"], row["count"]])
+    for row in facets["regions"]:
+        partial(row["_id"]["bucket"])["regions"].append([
+            row["_id"].get("region"), row["count"], row["mag_sum"], row["mag_count"],
+            row.get("mag_max"), row.get("first_seen")
+        ])
+    for row in facets["samples"]:
+        target = partial(row["_id"])
+        target["count"] = row["count"]
+        target["points"] = row["points"]
+    return partials
+
+
+def merge_dashboard(
+    segments: List[tuple], thirty_days_ago_ms: int, forty_eight_hours_ago_ms: int, current_time_ms: int,
+    top_limit: int, risk_limit: int, scatter_limit: int
+) -> Dict[str, List]:
+    """
+    Dashboard datasets of the merged segments, in the shapes of the individual analytics routes.
+    Segments never straddle the 30-day and 48-hour cut points, so recent counts are exact.
+    """
+    magnitude, days, regions = {}, {}, {}
+    for start, _, partial in segments:
+        for band, count in partial["magnitude"]:
+            magnitude[band] = magnitude.get(band, 0) + count
+        for day, count in partial["days"]:
+            days[day] = days.get(day, 0) + count
+        for region, count, mag_sum, mag_count, mag_max, first_seen in partial["regions"]:
+            # count, mag_sum, mag_count, mag_max, first_seen, recent 30 days, recent 48 hours
+            merged = regions.setdefault(region, [0, 0.0, 0, None, None, 0, 0])
+            merged[0] += count
+            merged[1] += mag_sum
+            merged[2] += mag_count
+            if mag_max is not None:
+                merged[3] = mag_max if merged[3] is None else max(merged[3], mag_max)
+            if first_seen is not None:
+                merged[4] = first_seen if merged[4] is None else min(merged[4], first_seen)
+            if start >= thirty_days_ago_ms:
+                merged[5] += count
+            if start >= forty_eight_hours_ago_ms:
+                merged[6] += count
+
+    top_regions = sorted(
+        ({"_id": region, "count": r[0]} for region, r in regions.items() if region not in (None, "")),
+        key=lambda row: row["count"], reverse=True
+    )[:top_limit]
+
+    risk_scores = []
+    for region, r in regions.items():
+        avg_mag = r[1] / r[2] if r[2] else None
+        score = 100 if avg_mag is None or r[3] is None else min(100, avg_mag * 10 + r[5] * 2 + r[3] * 5)
+        risk_scores.append({
+            "_id": region, "region": region, "avg_mag": avg_mag, "max_mag": r[3],
+            "recent_count": r[5], "risk_score": score
+        })
+    risk_scores.sort(key=lambda row: row["risk_score"], reverse=True)
+
+    unusual_activity = []
+    for region, r in regions.items():
+        days_history = max(1, (current_time_ms - r[4]) / DAY_MS) if r[4] is not None else 1
+        historical_daily_avg = r[0] / days_history
+        if r[6] > 0 and r[6] > historical_daily_avg * 5:
+            unusual_activity.append({
+                "_id": region, "region": region, "recent_count": r[6],
+                "historical_daily_avg": historical_daily_avg
+            })
+    unusual_activity.sort(key=lambda row: row["recent_count"], reverse=True)
+
+    # Each segment keeps its points of smallest random key, so the scatter_limit smallest
+    # keys across segments are a uniform sample of the merged range
+    sampled = heapq.nsmallest(
+        scatter_limit, (point for _, _, partial in segments for point in partial["points"]),
+        key=lambda point: point[0]
+    )
+
+    return {
+        "magnitude_distribution": [
+            {"_id": band, "count": magnitude[band]}
+            for band in sorted(magnitude, key=lambda b: (b == "Other", b if b != "Other" else 0))
+        ],
+        "trends": [
+            {"_id": day, "count": days[day]}
+            for day in sorted(days, key=lambda d: (d is not None, d or ""))
+        ],
+        "top_regions": top_regions,
+        "depth_vs_magnitude": [{"depth": depth, "magnitude": mag} for _, depth, mag in sampled],
+        "risk_scores": risk_scores[:risk_limit],
+        "unusual_activity": unusual_activity[:20]
+    }
+
@@ -0,0 +1,14 @@
+import asyncio
+from db_mongo import mongo_handler
+
+async def main():
+    print("Initializing Mongo...")
+    await mongo_handler.initialize()
+
+    # Run with the worker stopped: events ingested during the rebuild may be counted twice or not at all
+    print("Rebuilding analytics rollups...")
+    await mongo_handler.rebuild_rollups()
+    print("Rollups rebuilt.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+from typing import Optional, Tuple
+
+# USGS place strings end with a US state / country either spelled out or abbreviated
+# ("10 km NE of Pahala, Hawaii", "5km N of The Geysers, CA", "25 km W of Ensenada, B.C., MX").
+REGION_ALIASES = {
+    "AK": "Alaska",
+    "AL": "Alabama",
+    "AR": "Arkansas",
+    "AZ": "Arizona",
+    "CA": "California",
+    "CO": "Colorado",
+    "CT": "Connecticut",
+    "FL": "Florida",
+    "GA": "Georgia",
+    "HI": "Hawaii",
+    "IA": "Iowa",
+    "ID": "Idaho",
+    "IL": "Illinois",
+    "IN": "Indiana",
+    "KS": "Kansas",
+    "KY": "Kentucky",
+    "LA": "Louisiana",
+    "MA": "Massachusetts",
+    "MD": "Maryland",
+    "ME": "Maine",
+    "MI": "Michigan",
+    "MN": "Minnesota",
+    "MO": "Missouri",
+    "MS": "Mississippi",
+    "MT": "Montana",
+    "NC": "North Carolina",
+    "ND": "North Dakota",
+    "NE": "Nebraska",
+    "NH": "New Hampshire",
+    "NJ": "New Jersey",
+    "NM": "New Mexico",
+    "NV": "Nevada",
+    "NY": "New York",
+    "OH": "Ohio",
+    "OK": "Oklahoma",
+    "OR": "Oregon",
+    "PA": "Pennsylvania",
+    "PR": "Puerto Rico",
+    "RI": "Rhode Island",
+    "SC": "South Carolina",
+    "SD": "South Dakota",
+    "TN": "Tennessee",
+    "TX": "Texas",
+    "UT": "Utah",
+    "VA": "Virginia",
+    "VT": "Vermont",
+    "WA": "Washington",
+    "WI": "Wisconsin",
+    "WV": "West Virginia",
+    "WY": "Wyoming",
+    "MX": "Mexico",
+    "B.C.": "Baja California",
+}
+
+UNKNOWN_REGION = "Unknown Region"
+
+_ALIASES_CASEFOLD = {alias.casefold(): name for alias, name in REGION_ALIASES.items()}
+
+
+def normalize_region(name: Optional[str]) -> Optional[str]:
+    """Canonical region name for a raw region token, None if empty"""
+    if not name:
+        return None
+    cleaned = " ".join(str(name).split())
+    if not cleaned:
+        return None
+    return _ALIASES_CASEFOLD.get(cleaned.casefold(), cleaned)
+
+
+def split_place(place: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    (region, city) of a USGS place string.
+    Region is the last comma-separated part, city the nearest named place before it
+    ("10 km NE of Pahala, Hawaii" -> ("Hawaii", "Pahala")). Places without a comma
+    ("Mid-Atlantic Ridge") are a region on their own.
+    """
+    if not place or not str(place).strip():
+        return None, None
+
+    parts = [part.strip() for part in str(place).split(",")]
+    region = normalize_region(parts[-1])
+    if len(parts) == 1:
+        return region, None
+
+    # "25 km W of Ensenada, B.C., MX": the state part between city and country is dropped
+    remainder = parts[0]
+    city = remainder.split(" of ")[-1].strip() if " of " in remainder else remainder
+    return region, (" ".join(city.split()) or None)
+
+
+def place_label(place: Optional[str]) -> str:
+    """Short human-readable location, "City, Region" when both are known"""
+    region, city = split_place(place)
+    if city and region:
+        return f"{city}, {region}"
+    return city or region or UNKNOWN_REGION
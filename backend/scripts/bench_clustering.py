@@ -0,0 +1,80 @@
+import sys
+import os
+import time
+import json
+import asyncio
+import argparse
+import tracemalloc
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clustering import ClusteringEngine
+from synthetic_catalog import SyntheticCatalog, InMemoryEarthquakeSource
+
+CONFIG = {"eps_km": 50.0, "time_window_hours": 48.0, "min_samples": 3}
+
+def singleton_noise(labels):
+    """Give every noise/background event its own label so ARI does not treat noise as one cluster."""
+    labels = np.asarray(labels).copy()
+    noise = labels == -1
+    labels[noise] = labels.max() + 1 + np.arange(noise.sum())
+    return labels
+
+async def bench_size(n_events, mode, seed):
+    catalog = SyntheticCatalog(seed=seed).generate(n_events)
+    engine = ClusteringEngine(db=InMemoryEarthquakeSource(catalog, CONFIG))
+    engine.mode = mode
+    config = await engine.get_config()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    quakes = await engine.db.get_earthquakes(limit=n_events)
+    df, coords = engine._prepare_data(quakes)
+    prep_secs = time.perf_counter() - start
+    labels = engine._dbscan_labels(coords, config)
+    total_secs = time.perf_counter() - start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    truth = {q["id"]: q["sequence_id"] for q in catalog}
+    expected = singleton_noise([truth[i] for i in df["id"]])
+    straddling = df["id"].map(lambda i: truth[i] >= 0).to_numpy() & (df["longitude"].abs() > 179).to_numpy()
+
+    return {
+        "events": n_events,
+        "mode": mode,
+        "clusters": int(labels.max() + 1),
+        "prep_secs": round(prep_secs, 3),
+        "dbscan_secs": round(total_secs - prep_secs, 3),
+        "peak_mb": round(peak_bytes / 1e6, 1),
+        "ari": round(adjusted_rand_score(expected, singleton_noise(labels)), 4),
+        "antimeridian_events": int(straddling.sum())
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description="Offline clustering benchmark on synthetic catalogs")
+    parser.add_argument("--sizes", default="1000,5000,20000,50000")
+    parser.add_argument("--modes", default="global,tiled")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"Config: {CONFIG}")
+    print(f"{'events':>8} {'mode':>7} {'clusters':>8} {'prep_s':>7} {'dbscan_s':>8} {'peak_mb':>8} {'ari':>7}")
+    for n_events in [int(s) for s in args.sizes.split(",")]:
+        for mode in args.modes.split(","):
+            r = await bench_size(n_events, mode, args.seed)
+            results.append(r)
+            print(f"{r['events']:>8} {r['mode']:>7} {r['clusters']:>8} {r['prep_secs']:>7} "
+                  f"{r['dbscan_secs']:>8} {r['peak_mb']:>8} {r['ari']:>7}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+import sys
+import os
+import time
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_mongo import mongo_handler, IndexManager, DataTransformer, EarthquakeRepository, AggregationPipelines, QueryBuilder
+from synthetic_catalog import SyntheticCatalog
+
+BENCH_COLLECTION = "earthquakes_dashboard_bench"
+REGIONS = ["Alaska", "California", "Japan", "Indonesia", "Chile", "Mexico", "Turkey", "Fiji", "Tonga", "Peru"]
+
+def separate_pipelines(match, thirty_days_ago, forty_eight_hours_ago, now):
+    """The six per-chart raw pipelines an uncached analytics page load runs, each over the filtered set"""
+    def scoped(pipeline):
+        return [{"$match": match}] + pipeline if match else pipeline
+    return [
+        scoped(AggregationPipelines.magnitude_distribution_pipeline()),
+        scoped(AggregationPipelines.daily_trends_pipeline()),
+        scoped(AggregationPipelines.top_regions_pipeline(10)),
+        scoped(AggregationPipelines.depth_magnitude_pipeline(1000)),
+        scoped(AggregationPipelines.risk_scores_pipeline(thirty_days_ago, 10)),
+        scoped(AggregationPipelines.unusual_activity_pipeline(forty_eight_hours_ago, now))
+    ]
+
+async def timed(coro):
+    start = time.perf_counter()
+    await coro
+    return (time.perf_counter() - start) * 1000
+
+async def main():
+    parser = argparse.ArgumentParser(description="Uncached analytics page load: six aggregations vs one $facet")
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    collection = mongo_handler.db_connection.get_database()[BENCH_COLLECTION]
+    await collection.drop()
+    events = SyntheticCatalog(seed=43).generate(args.events, duration_days=args.days)
+    for i in range(0, len(events), 10000):
+        docs = []
+        for j, event in enumerate(events[i:i + 10000], start=i):
+            event["place"] = f"{j % 90 + 1} km NNE of Somewhere, {REGIONS[j % len(REGIONS)]}"
+            docs.append(DataTransformer.prepare_earthquake_data(event))
+        await collection.insert_many(docs, ordered=False)
+    await IndexManager.setup_indexes(collection)
+    repo = EarthquakeRepository(collection)
+
+    now = datetime.now()
+    thirty_days_ago = int((now - timedelta(days=30)).timestamp() * 1000)
+    forty_eight_hours_ago = int((now - timedelta(hours=48)).timestamp() * 1000)
+    now_ms = int(now.timestamp() * 1000)
+    latest = max(e["time"] for e in events)
+    scenarios = {
+        "whole catalog": {},
+        "last 7 days": QueryBuilder.build_earthquake_query(start_time=latest - 7 * 86400000),
+        "pacific box": QueryBuilder.build_earthquake_query(north=60, south=-60, east=-120, west=120)
+    }
+
+    print(f"{args.events} events over {args.days} days, best of {args.repeat} (ms)")
+    print(f"{'scenario':>14} {'6 sequential':>13} {'6 concurrent':>13} {'1 $facet':>9}")
+    try:
+        for name, match in scenarios.items():
+            separate = separate_pipelines(match, thirty_days_ago, forty_eight_hours_ago, now_ms)
+            # The whole scenario as a single segment, the shape a cold filtered request runs
+            facet = AggregationPipelines.dashboard_partial_pipeline(
+                match, AggregationPipelines.time_bucket(0, None), 1000
+            )
+            sequential, concurrent, single = [], [], []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                for pipeline in separate:
+                    await repo.aggregate(pipeline, limit=None)
+                sequential.append((time.perf_counter() - start) * 1000)
+
+                concurrent.append(await timed(asyncio.gather(*[repo.aggregate(p, limit=None) for p in separate])))
+                single.append(await timed(repo.aggregate(facet, limit=1)))
+            print(f"{name:>14} {min(sequential):>13.1f} {min(concurrent):>13.1f} {min(single):>9.1f}")
+    finally:
+        await collection.drop()
+        mongo_handler.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
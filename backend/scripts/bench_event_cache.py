@@ -0,0 +1,89 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import TTLCache
+
+async def run_load(args, use_cache):
+    """Zipf-distributed requests from concurrent clients against a simulated Mongo + Neo4j backend"""
+    rng = np.random.default_rng(args.seed)
+    keys = rng.zipf(args.zipf, args.clients * args.requests) % args.events
+    cache = TTLCache(args.max_entries, args.ttl)
+    backend_calls = 0
+
+    async def fetch(event_id):
+        nonlocal backend_calls
+        backend_calls += 1
+        await asyncio.sleep(args.mongo_ms / 1000)
+        await asyncio.sleep(args.neo4j_ms / 1000)
+        return {"id": event_id, "context": {}}
+
+    async def client(offset):
+        for key in keys[offset::args.clients]:
+            event_id = f"ev{key}"
+            if use_cache:
+                await cache.get_or_load(event_id, lambda: fetch(event_id))
+            else:
+                await fetch(event_id)
+
+    async def invalidator():
+        # Worker upserts of the hottest events (aftershock revisions) at a fixed rate
+        while True:
+            await asyncio.sleep(1 / args.invalidations_per_sec)
+            cache.invalidate(f"ev{int(rng.zipf(args.zipf)) % args.events}")
+
+    start = time.perf_counter()
+    task = asyncio.create_task(invalidator())
+    await asyncio.gather(*(client(i) for i in range(args.clients)))
+    task.cancel()
+    secs = time.perf_counter() - start
+
+    requests = len(keys)
+    return {
+        "cache": use_cache,
+        "requests": requests,
+        "secs": round(secs, 2),
+        "request_qps": round(requests / secs),
+        "backend_qps": round(backend_calls / secs),
+        "backend_calls": backend_calls,
+        "hit_ratio": round(cache.hit_ratio(), 4) if use_cache else 0.0,
+        "stats": cache.stats if use_cache else {}
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description="Hot-key load test of the event detail cache")
+    parser.add_argument("--events", type=int, default=5000, help="Distinct event ids")
+    parser.add_argument("--zipf", type=float, default=1.3, help="Zipf exponent of the key popularity")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per client")
+    parser.add_argument("--mongo-ms", type=float, default=2.0)
+    parser.add_argument("--neo4j-ms", type=float, default=15.0)
+    parser.add_argument("--ttl", type=float, default=60.0)
+    parser.add_argument("--max-entries", type=int, default=2048)
+    parser.add_argument("--invalidations-per-sec", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = [await run_load(args, use_cache=False), await run_load(args, use_cache=True)]
+    print(f"{'cache':>6} {'requests':>9} {'secs':>6} {'req_qps':>8} {'backend_qps':>12} {'hit_ratio':>10}")
+    for r in results:
+        print(f"{str(r['cache']):>6} {r['requests']:>9} {r['secs']:>6} {r['request_qps']:>8} "
+              f"{r['backend_qps']:>12} {r['hit_ratio']:>10}")
+    uncached, cached = results
+    saved = 1 - cached["backend_calls"] / uncached["backend_calls"]
+    print(f"Backend calls saved: {saved:.1%} ({cached['stats']})")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+import sys
+import os
+import time
+import random
+import asyncio
+import argparse
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_mongo import mongo_handler, IndexManager, DataTransformer, EarthquakeRepository, QueryBuilder, FieldProfiles
+from hot_index import HotWindowIndex
+from synthetic_catalog import SyntheticCatalog, DAY_MS
+
+BENCH_COLLECTION = "earthquakes_hot_index_bench"
+REGIONS = ["Alaska", "California", "Japan", "Indonesia", "Chile", "Mexico", "Turkey", "Fiji", "Tonga", "Peru"]
+HOUR_MS = DAY_MS // 24
+
+def map_queries(now_ms, count, seed=45):
+    """Map-style requests: recent time window plus a mix of box, magnitude and depth filters"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        filters = {"start_time": now_ms - rng.choice([1, 6, 24, 72, 168]) * HOUR_MS}
+        if rng.random() < 0.6:
+            filters["mag_min"] = rng.choice([2.5, 4.0, 5.0])
+        if rng.random() < 0.3:
+            filters["depth_max"] = rng.choice([30.0, 70.0, 300.0])
+        if rng.random() < 0.5:
+            south, west = rng.uniform(-60, 40), rng.uniform(-180, 150)
+            filters.update(south=south, north=south + rng.uniform(10, 40), west=west,
+                           east=(west + rng.uniform(20, 120) + 180) % 360 - 180)
+        queries.append((filters, rng.choice([50, 500])))
+    return queries
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+async def main():
+    parser = argparse.ArgumentParser(description="/earthquakes queries: in-memory hot window vs MongoDB")
+    parser.add_argument("--events", type=int, default=100000, help="events inside the 7-day window")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--mongo", action="store_true", help="also time (and compare against) MongoDB")
+    args = parser.parse_args()
+
+    now_ms = int(time.time() * 1000)
+    events = SyntheticCatalog(seed=45).generate(args.events, duration_days=7, end_ms=now_ms)
+    docs = []
+    for i, event in enumerate(events):
+        event["place"] = f"{i % 90 + 1} km NNE of Somewhere, {REGIONS[i % len(REGIONS)]}"
+        event["url"] = f"https://earthquake.usgs.gov/earthquakes/eventpage/{event['id']}"
+        docs.append(DataTransformer.prepare_earthquake_data(event))
+
+    index = HotWindowIndex(window_hours=7 * 24 + 1, clock=lambda: now_ms / 1000)
+    started = time.perf_counter()
+    await index.reload(lambda covered_from_ms: asyncio.sleep(0, result=docs))
+    load_ms = (time.perf_counter() - started) * 1000
+    columns = index.columns
+    scale = 100000 / max(1, columns.size) / 2**20
+    arrays = sum(c.nbytes for c in columns.numeric.values()) + columns.cell.nbytes + columns.sorted_rows.nbytes
+    print(f"{columns.size} events loaded in {load_ms:.0f} ms, ~{columns.memory_bytes() * scale:.1f} MiB per 100k events "
+          f"(numeric columns and grid {arrays * scale:.1f} MiB, the rest strings)")
+
+    queries = map_queries(now_ms, args.queries)
+    timings = []
+    for filters, limit in queries:
+        started = time.perf_counter()
+        index.query(fields="summary", limit=limit, **filters)
+        timings.append((time.perf_counter() - started) * 1e6)
+    print(f"hot index: p50 {percentile(timings, 0.5):.0f} us, p95 {percentile(timings, 0.95):.0f} us "
+          f"({index.stats['hits']} served, {index.stats['fallbacks']} fallbacks)")
+
+    if not args.mongo:
+        return
+    collection = mongo_handler.db_connection.get_database()[BENCH_COLLECTION]
+    await collection.drop()
+    try:
+        for i in range(0, len(docs), 10000):
+            await collection.insert_many([dict(doc) for doc in docs[i:i + 10000]], ordered=False)
+        await IndexManager.setup_indexes(collection)
+        repo = EarthquakeRepository(collection)
+        projection = FieldProfiles.projection("summary")
+        timings, mismatches = [], 0
+        for filters, limit in queries:
+            started = time.perf_counter()
+            rows, _ = await repo.find_page(QueryBuilder.build_earthquake_query(**filters), limit=limit, projection=projection)
+            timings.append((time.perf_counter() - started) * 1e6)
+            served = index.query(fields="summary", limit=limit, **filters)
+            if served is not None and served[0] != rows:
+                mismatches += 1
+        print(f"mongodb:   p50 {percentile(timings, 0.5):.0f} us, p95 {percentile(timings, 0.95):.0f} us "
+              f"({mismatches} result mismatches)")
+    finally:
+        await collection.drop()
+        mongo_handler.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
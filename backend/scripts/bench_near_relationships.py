@@ -0,0 +1,105 @@
+import sys
+import os
+import time
+import argparse
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_neo4j import neo4j_handler
+from geo_utils import near_pairs
+from synthetic_catalog import SyntheticCatalog
+
+# Run against an otherwise empty development graph: both versions link every event in scope
+BENCH_PREFIX = "bench-near-"
+
+LOAD_QUERY = """
+UNWIND $rows AS row
+CREATE (:Earthquake {
+    id: row.id, mag: row.mag, time: row.time,
+    location: point({latitude: row.lat, longitude: row.lon})
+})
+"""
+
+# The all-pairs version this replaced
+LEGACY_NEAR_QUERY = """
+MATCH (e1:Earthquake), (e2:Earthquake)
+WHERE e1.id < e2.id
+AND e1.location IS NOT NULL AND e2.location IS NOT NULL
+
+WITH e1, e2,
+     point.distance(e1.location, e2.location) / 1000 AS dist_km,
+     abs(toInteger(e1.time) - toInteger(e2.time)) / (1000 * 3600.0) AS hours_diff
+
+WHERE dist_km < $max_dist_km AND hours_diff < $max_time_diff_hr
+MERGE (e1)-[r:NEAR]->(e2)
+SET r.distance_km = dist_km,
+    r.time_diff_hr = hours_diff
+"""
+
+COUNT_NEAR_QUERY = """
+MATCH (e:Earthquake)-[r:NEAR]->() WHERE e.id STARTS WITH $prefix RETURN count(r) AS edges
+"""
+
+CLEANUP_QUERY = """
+MATCH (e:Earthquake) WHERE e.id STARTS WITH $prefix
+CALL { WITH e DETACH DELETE e } IN TRANSACTIONS OF 10000 ROWS
+"""
+
+def clear_near(session):
+    session.run("""
+    MATCH (e:Earthquake)-[r:NEAR]->() WHERE e.id STARTS WITH $prefix
+    CALL { WITH r DELETE r } IN TRANSACTIONS OF 10000 ROWS
+    """, prefix=BENCH_PREFIX).consume()
+
+def main():
+    parser = argparse.ArgumentParser(description="NEAR edges: all-pairs Cypher vs grid-hashed pairs + UNWIND writes")
+    parser.add_argument("--sizes", type=str, default="1000,5000,20000,100000")
+    parser.add_argument("--days", type=float, default=7, help="clustering window")
+    parser.add_argument("--legacy-max", type=int, default=20000, help="largest window to also run the all-pairs query on")
+    args = parser.parse_args()
+
+    now_ms = int(time.time() * 1000)
+    start_ms = now_ms - int(args.days * 86400000)
+    print(f"Events over {args.days} days, 50 km / 48 h limits (seconds)")
+    print(f"{'events':>8} {'pairs (numpy)':>14} {'grid+write':>11} {'all-pairs':>10} {'edges':>14}")
+    try:
+        for size in sorted(int(size) for size in args.sizes.split(",")):
+            events = SyntheticCatalog(seed=48).generate(size, duration_days=args.days, end_ms=now_ms)
+            with neo4j_handler.driver.session() as session:
+                session.run(CLEANUP_QUERY, prefix=BENCH_PREFIX).consume()
+                for i in range(0, len(events), 10000):
+                    session.run(LOAD_QUERY, rows=[{
+                        "id": BENCH_PREFIX + event["id"], "mag": event["magnitude"], "time": event["time"],
+                        "lat": event["latitude"], "lon": event["longitude"]
+                    } for event in events[i:i + 10000]]).consume()
+
+                started = time.perf_counter()
+                pairs = near_pairs(
+                    [e["latitude"] for e in events], [e["longitude"] for e in events],
+                    [e["time"] for e in events], 50, 48 * 3600000
+                )
+                numpy_s = time.perf_counter() - started
+
+                started = time.perf_counter()
+                neo4j_handler.create_near_relationships(start_time=start_ms, end_time=now_ms)
+                grid_s = time.perf_counter() - started
+                grid_edges = session.run(COUNT_NEAR_QUERY, prefix=BENCH_PREFIX).single()["edges"]
+
+                legacy = "-"
+                if size <= args.legacy_max:
+                    clear_near(session)
+                    started = time.perf_counter()
+                    session.run(LEGACY_NEAR_QUERY, max_dist_km=50, max_time_diff_hr=48).consume()
+                    legacy = f"{time.perf_counter() - started:.2f}"
+                    legacy_edges = session.run(COUNT_NEAR_QUERY, prefix=BENCH_PREFIX).single()["edges"]
+                    # Distances differ in the last digits (Earth radius), so boundary pairs may flip
+                    grid_edges = f"{grid_edges}/{legacy_edges}"
+                print(f"{size:>8} {len(pairs[0]):>8} {numpy_s:>5.2f}s {grid_s:>11.2f} {legacy:>10} {grid_edges:>14}")
+    finally:
+        with neo4j_handler.driver.session() as session:
+            session.run(CLEANUP_QUERY, prefix=BENCH_PREFIX).consume()
+        neo4j_handler.close()
+
+if __name__ == "__main__":
+    main()
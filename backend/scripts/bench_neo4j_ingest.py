@@ -0,0 +1,63 @@
+import sys
+import os
+import time
+import argparse
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_neo4j import neo4j_handler
+from synthetic_catalog import SyntheticCatalog
+
+BENCH_PREFIX = "bench-ingest-"
+REGIONS = ["Alaska", "California", "Japan", "Indonesia", "Chile", "Mexico", "Turkey", "Fiji", "Tonga", "Peru"]
+
+# Every batch size must build the same graph
+LINK_COUNT_QUERY = """
+MATCH (e:Earthquake)-[r:AFTERSHOCK_OF|FORESHOCK_OF|TRIGGERED]->()
+WHERE e.id STARTS WITH $prefix
+RETURN type(r) AS type, count(r) AS links ORDER BY type
+"""
+
+CLEANUP_QUERY = """
+MATCH (e:Earthquake) WHERE e.id STARTS WITH $prefix
+CALL { WITH e DETACH DELETE e } IN TRANSACTIONS OF 10000 ROWS
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description="Graph ingestion throughput by batch size")
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--batch-sizes", type=str, default="1,100,1000")
+    args = parser.parse_args()
+
+    now_ms = int(time.time() * 1000)
+    events = SyntheticCatalog(seed=49).generate(args.events, duration_days=7, end_ms=now_ms)
+    events.sort(key=lambda event: event["time"])
+    print(f"{args.events} events per run, time order (insert_earthquakes)")
+    print(f"{'batch size':>11} {'seconds':>8} {'events/s':>9}  links")
+    try:
+        for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+            # Same events each run, under fresh ids
+            batch = [{
+                **event, "id": f"{BENCH_PREFIX}{batch_size}-{event['id']}",
+                "place": f"{i % 90 + 1} km NNE of Bench {i % 50}, {REGIONS[i % len(REGIONS)]}"
+            } for i, event in enumerate(events)]
+            started = time.perf_counter()
+            for i in range(0, len(batch), batch_size):
+                neo4j_handler.insert_earthquakes(batch[i:i + batch_size])
+            elapsed = time.perf_counter() - started
+            with neo4j_handler.driver.session() as session:
+                links = ", ".join(
+                    f"{row['type']} {row['links']}"
+                    for row in session.run(LINK_COUNT_QUERY, prefix=BENCH_PREFIX).data()
+                )
+                print(f"{batch_size:>11} {elapsed:>8.1f} {len(batch) / elapsed:>9.0f}  {links}")
+                session.run(CLEANUP_QUERY, prefix=BENCH_PREFIX).consume()
+    finally:
+        with neo4j_handler.driver.session() as session:
+            session.run(CLEANUP_QUERY, prefix=BENCH_PREFIX).consume()
+            session.run("MATCH (c:City) WHERE c.name STARTS WITH 'Bench ' DETACH DELETE c").consume()
+        neo4j_handler.close()
+
+if __name__ == "__main__":
+    main()
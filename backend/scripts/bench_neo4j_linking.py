@@ -0,0 +1,127 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_neo4j import neo4j_handler
+from synthetic_catalog import SyntheticCatalog
+
+BENCH_PREFIX = "bench-link-"
+
+LOAD_QUERY = """
+UNWIND $rows AS row
+CREATE (:Earthquake {
+    id: row.id, mag: row.mag, time: row.time,
+    location: point({latitude: row.lat, longitude: row.lon})
+})
+"""
+
+# Pre-index linking queries: every Earthquake node is compared with the new event
+LEGACY_LINK_QUERY = """
+MATCH (new:Earthquake {id: $id})
+MATCH (other:Earthquake)
+WHERE other.id <> new.id AND other.mag >= $min_mag
+AND new.location IS NOT NULL AND other.location IS NOT NULL
+WITH new, other,
+     point.distance(new.location, other.location) / 1000 AS dist_km,
+     (toInteger(new.time) - toInteger(other.time)) / (1000 * 60 * 60 * 24.0) AS days_diff
+WHERE dist_km <= $max_dist AND abs(days_diff) <= $max_days
+RETURN count(*)
+"""
+
+LEGACY_CASCADE_QUERY = """
+MATCH (new:Earthquake {id: $id})-[:ON_FAULTLINE]->(fz1:FaultZone)
+MATCH (other:Earthquake)-[:ON_FAULTLINE]->(fz2:FaultZone)
+WHERE fz1 <> fz2 AND other.id <> new.id AND other.mag >= $min_mag
+WITH new, other,
+     point.distance(new.location, other.location) / 1000 AS dist_km,
+     abs(toInteger(new.time) - toInteger(other.time)) / (1000 * 60 * 60.0) AS hours_diff
+WHERE dist_km <= $max_dist AND hours_diff <= $max_hours
+RETURN count(*)
+"""
+
+CLEANUP_QUERY = """
+MATCH (e:Earthquake) WHERE e.id STARTS WITH $prefix
+CALL { WITH e DETACH DELETE e } IN TRANSACTIONS OF 10000 ROWS
+"""
+
+def timed_ms(fn, *args, **kwargs):
+    started = time.perf_counter()
+    fn(*args, **kwargs)
+    return (time.perf_counter() - started) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-insert aftershock/cascade linking latency vs graph size")
+    parser.add_argument("--sizes", type=str, default="10000,100000,1000000")
+    parser.add_argument("--events-per-day", type=int, default=1000, help="constant rate, so recent density stays fixed")
+    parser.add_argument("--probes", type=int, default=50)
+    parser.add_argument("--legacy-max", type=int, default=100000, help="largest graph to also time the legacy queries on")
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    now_ms = int(time.time() * 1000)
+    events = SyntheticCatalog(seed=47).generate(sizes[-1], duration_days=sizes[-1] / args.events_per_day, end_ms=now_ms)
+    # Newest first: each graph size is the most recent N events, probes arrive "now"
+    events.sort(key=lambda event: event["time"], reverse=True)
+    rng = np.random.default_rng(47)
+    aftershock, cascade = neo4j_handler._rule_set("aftershock_rules"), neo4j_handler._rule_set("cascade_rules")
+
+    print(f"{args.events_per_day} events/day, {args.probes} probe inserts per size (ms)")
+    print(f"{'graph size':>11} {'insert p50':>11} {'insert p95':>11} {'legacy link+cascade p50':>24}")
+    loaded = 0
+    try:
+        with neo4j_handler.driver.session() as session:
+            for size in sizes:
+                while loaded < size:
+                    batch = events[loaded:min(size, loaded + 10000)]
+                    session.run(LOAD_QUERY, rows=[{
+                        "id": BENCH_PREFIX + event["id"], "mag": event["magnitude"], "time": event["time"],
+                        "lat": event["latitude"], "lon": event["longitude"]
+                    } for event in batch]).consume()
+                    loaded += len(batch)
+
+                inserts, legacy = [], []
+                for i in range(args.probes):
+                    # New events next to recent activity, so the bounded searches find neighbours
+                    anchor = events[int(rng.integers(0, min(size, 5000)))]
+                    probe = {
+                        "id": f"{BENCH_PREFIX}probe-{size}-{i}",
+                        "magnitude": round(float(rng.uniform(3.0, 7.0)), 1),
+                        "time": now_ms + i * 1000,
+                        "place": "10 km N of Benchville, Benchland",
+                        "latitude": anchor["latitude"] + float(rng.normal(0, 0.2)),
+                        "longitude": anchor["longitude"] + float(rng.normal(0, 0.2)),
+                    }
+                    probe["longitude"] = (probe["longitude"] + 180.0) % 360.0 - 180.0
+                    probe["latitude"] = min(89.9, max(-89.9, probe["latitude"]))
+                    inserts.append(timed_ms(neo4j_handler.insert_earthquake, probe))
+                    if size <= args.legacy_max:
+                        legacy.append(
+                            timed_ms(lambda: session.run(
+                                LEGACY_LINK_QUERY, id=probe["id"], min_mag=aftershock["min_main_mag"],
+                                max_dist=aftershock["max_dist_km"], max_days=aftershock["max_days_diff"]
+                            ).consume())
+                            + timed_ms(lambda: session.run(
+                                LEGACY_CASCADE_QUERY, id=probe["id"], min_mag=cascade["min_other_mag"],
+                                max_dist=cascade["max_dist_km"], max_hours=cascade["max_hours_diff"]
+                            ).consume())
+                        )
+                session.run(
+                    "MATCH (e:Earthquake) WHERE e.id STARTS WITH $prefix DETACH DELETE e",
+                    prefix=f"{BENCH_PREFIX}probe-"
+                ).consume()
+                legacy_p50 = f"{np.percentile(legacy, 50):.1f}" if legacy else "-"
+                print(f"{size:>11} {np.percentile(inserts, 50):>11.1f} {np.percentile(inserts, 95):>11.1f} {legacy_p50:>24}")
+    finally:
+        with neo4j_handler.driver.session() as session:
+            session.run(CLEANUP_QUERY, prefix=BENCH_PREFIX).consume()
+            session.run("MATCH (c:City {name: 'Benchville'}) DETACH DELETE c").consume()
+            session.run("MATCH (r:Region {name: 'Benchland'}) DETACH DELETE r").consume()
+        neo4j_handler.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_neo4j import neo4j_handler
+
+BENCH_PREFIX = "bench-prox-"
+
+LOAD_CITIES_QUERY = """
+UNWIND $rows AS row
+CREATE (:City {name: row.name, location: point({latitude: row.lat, longitude: row.lon})})
+"""
+
+# The label-scan version this replaced (read-only count of the same matches)
+LEGACY_AFFECTED_QUERY = """
+MATCH (e:Earthquake {id: $id})
+MATCH (affected_city:City)
+WHERE point.distance(e.location, affected_city.location) < ($impact_km * 1000)
+RETURN count(affected_city) AS cities
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description="Insert latency for M2 vs M7 events on a graph with many cities")
+    parser.add_argument("--cities", type=int, default=100000)
+    parser.add_argument("--probes", type=int, default=30)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(50)
+    now_ms = int(time.time() * 1000)
+    lat = np.degrees(np.arcsin(rng.uniform(-np.sin(np.radians(70)), np.sin(np.radians(70)), args.cities)))
+    lon = rng.uniform(-180, 180, args.cities)
+    print(f"{args.cities} cities, {args.probes} inserts per magnitude (ms)")
+    print(f"{'magnitude':>10} {'radius km':>10} {'insert p50':>11} {'insert p95':>11} {'affected':>9} {'legacy scan p50':>16}")
+    try:
+        with neo4j_handler.driver.session() as session:
+            for i in range(0, args.cities, 10000):
+                session.run(LOAD_CITIES_QUERY, rows=[
+                    {"name": f"{BENCH_PREFIX}city-{k}", "lat": float(lat[k]), "lon": float(lon[k])}
+                    for k in range(i, min(args.cities, i + 10000))
+                ]).consume()
+
+            for magnitude in (2.0, 7.0):
+                radius = neo4j_handler.compute_impact_radius(magnitude)
+                inserts, legacy, affected = [], [], []
+                for i in range(args.probes):
+                    k = int(rng.integers(0, args.cities))
+                    probe = {
+                        "id": f"{BENCH_PREFIX}eq-{magnitude}-{i}", "magnitude": magnitude, "time": now_ms,
+                        "place": "10 km N of Benchville, Benchland",
+                        "latitude": float(lat[k]) + 0.05, "longitude": float(lon[k]) + 0.05
+                    }
+                    started = time.perf_counter()
+                    neo4j_handler.insert_earthquake(probe)
+                    inserts.append((time.perf_counter() - started) * 1000)
+
+                    started = time.perf_counter()
+                    session.run(LEGACY_AFFECTED_QUERY, id=probe["id"], impact_km=radius).consume()
+                    legacy.append((time.perf_counter() - started) * 1000)
+                    affected.append(session.run(
+                        "MATCH (:Earthquake {id: $id})-[r:AFFECTED_ZONE]->() RETURN count(r) AS n", id=probe["id"]
+                    ).single()["n"])
+                print(f"{magnitude:>10} {radius:>10} {np.percentile(inserts, 50):>11.1f} {np.percentile(inserts, 95):>11.1f} "
+                      f"{np.mean(affected):>9.0f} {np.percentile(legacy, 50):>16.1f}")
+    finally:
+        with neo4j_handler.driver.session() as session:
+            for label, key in (("Earthquake", "id"), ("City", "name")):
+                session.run(f"""
+                MATCH (n:{label}) WHERE n.{key} STARTS WITH $prefix
+                CALL {{ WITH n DETACH DELETE n }} IN TRANSACTIONS OF 10000 ROWS
+                """, prefix=BENCH_PREFIX).consume()
+            session.run("MATCH (c:City {name: 'Benchville'}) DETACH DELETE c").consume()
+            session.run("MATCH (r:Region {name: 'Benchland'}) DETACH DELETE r").consume()
+        neo4j_handler.close()
+
+if __name__ == "__main__":
+    main()
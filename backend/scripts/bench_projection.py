@@ -0,0 +1,59 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_mongo import mongo_handler, IndexManager, DataTransformer, EarthquakeRepository, FieldProfiles
+from synthetic_catalog import SyntheticCatalog, usgs_feature
+from utils import MongoJSONEncoder
+
+BENCH_COLLECTION = "earthquakes_projection_bench"
+
+async def main():
+    parser = argparse.ArgumentParser(description="Payload size and serialization time per field profile")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    collection = mongo_handler.db_connection.get_database()[BENCH_COLLECTION]
+    await collection.drop()
+    events = SyntheticCatalog(seed=5).generate(args.rows)
+    docs = []
+    for event in events:
+        event["place"] = "12 km NNE of Somewhere, Alaska"
+        event["url"] = f"https://earthquake.usgs.gov/earthquakes/eventpage/{event['id']}"
+        event["raw_json"] = json.dumps(usgs_feature(event))
+        docs.append(DataTransformer.prepare_earthquake_data(event))
+    await collection.insert_many(docs)
+    await IndexManager.setup_indexes(collection)
+    repo = EarthquakeRepository(collection)
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    print(f"{'profile':>8} {'query_ms':>9} {'serialize_ms':>13} {'bytes':>11} {'bytes/row':>10}")
+    try:
+        for profile in ["map", "summary", "full"]:
+            projection = FieldProfiles.projection(profile)
+            query_secs, serialize_secs = [], []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                rows, _ = await repo.find_page({}, limit=args.rows, projection=projection)
+                query_secs.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                payload = json.dumps(rows, cls=MongoJSONEncoder)
+                serialize_secs.append(time.perf_counter() - start)
+
+            size = len(payload.encode())
+            print(f"{profile:>8} {min(query_secs) * 1000:>9.1f} {min(serialize_secs) * 1000:>13.1f} "
+                  f"{size:>11} {size // max(len(rows), 1):>10}")
+    finally:
+        await collection.drop()
+        mongo_handler.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
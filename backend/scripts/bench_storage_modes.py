@@ -0,0 +1,127 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_mongo import mongo_handler, IndexManager, DataTransformer, StorageManager, FieldProfiles
+from synthetic_catalog import SyntheticCatalog, usgs_feature, DAY_MS
+
+REGIONS = ["Alaska", "California", "Japan", "Indonesia", "Chile", "Mexico", "Turkey", "Fiji", "Tonga", "Peru"]
+NETWORKS = ["ak", "ci", "us", "us", "us", "us", "us", "us", "us", "us"]
+WINDOWS = {"1h": DAY_MS // 24, "1d": DAY_MS, "7d": 7 * DAY_MS}
+
+def prepared_batches(events, batch_size):
+    """Prepared documents (raw_json inline), built lazily so 1M payloads are never held at once"""
+    for i in range(0, len(events), batch_size):
+        batch = []
+        for j, event in enumerate(events[i:i + batch_size], start=i):
+            k = j % len(REGIONS)
+            event["id"] = f"{NETWORKS[k]}{event['id']}"
+            event["place"] = f"{j % 90 + 1} km NNE of Somewhere, {REGIONS[k]}"
+            feature = usgs_feature(event)
+            feature["properties"]["net"] = NETWORKS[k]
+            event["raw_json"] = json.dumps(feature)
+            batch.append(DataTransformer.prepare_earthquake_data(event))
+            del event["raw_json"]
+        yield batch
+
+async def storage_size(collection):
+    stats = await collection.aggregate([{"$collStats": {"storageStats": {}}}]).to_list(length=1)
+    storage = stats[0]["storageStats"] if stats else {}
+    return storage.get("storageSize", 0), storage.get("totalIndexSize", 0)
+
+async def bench_mode(mode, events, args):
+    database = mongo_handler.db_connection.get_database()
+    collection = database[f"earthquakes_bench_{mode}"]
+    raw_collection = database["earthquakes_raw_bench"]
+    await collection.drop()
+    await raw_collection.drop()
+
+    if mode == "timeseries":
+        await StorageManager.ensure_timeseries_collection(database, collection.name)
+        await IndexManager.setup_indexes(collection, unique_ids=False)
+        await IndexManager.setup_raw_index(raw_collection)
+    else:
+        await IndexManager.setup_indexes(collection)
+
+    ingest_secs = 0.0
+    for batch in prepared_batches([dict(e) for e in events], args.batch_size):
+        if mode == "timeseries":
+            split = [StorageManager.split_document(doc) for doc in batch]
+            start = time.perf_counter()
+            await collection.insert_many([m for m, _ in split], ordered=False)
+            await raw_collection.insert_many([r for _, r in split if r], ordered=False)
+        else:
+            start = time.perf_counter()
+            await collection.insert_many(batch, ordered=False)
+        ingest_secs += time.perf_counter() - start
+
+    data_bytes, index_bytes = await storage_size(collection)
+    raw_bytes = raw_index_bytes = 0
+    if mode == "timeseries":
+        raw_bytes, raw_index_bytes = await storage_size(raw_collection)
+
+    # Same windows for both modes
+    rng = np.random.default_rng(args.seed)
+    start_ms, end_ms = min(e["time"] for e in events), max(e["time"] for e in events)
+    projection = FieldProfiles.projection("map")
+    latencies = {}
+    for label, width in WINDOWS.items():
+        secs = []
+        for window_start in rng.integers(start_ms, max(end_ms - width, start_ms + 1), args.queries):
+            query = {"time": {"$gte": int(window_start), "$lte": int(window_start) + width}}
+            start = time.perf_counter()
+            await collection.find(query, projection=projection).sort("time", -1).to_list(length=None)
+            secs.append(time.perf_counter() - start)
+        latencies[label] = round(float(np.median(secs)) * 1000, 1)
+
+    await collection.drop()
+    await raw_collection.drop()
+    return {
+        "mode": mode,
+        "events": len(events),
+        "ingest_per_sec": round(len(events) / ingest_secs),
+        "data_mb": round(data_bytes / 1e6, 1),
+        "index_mb": round(index_bytes / 1e6, 1),
+        "raw_mb": round((raw_bytes + raw_index_bytes) / 1e6, 1),
+        "range_ms": latencies
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description="Disk size, ingest rate and range-query latency per storage mode")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=365, help="Catalog time span")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=30, help="Random windows per window size")
+    parser.add_argument("--modes", default="standard,timeseries")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    print(f"Generating {args.events} synthetic events over {args.days} days...")
+    events = SyntheticCatalog(seed=args.seed).generate(args.events, duration_days=args.days)
+
+    results = []
+    print(f"{'mode':>10} {'ingest/s':>9} {'data_mb':>8} {'index_mb':>9} {'raw_mb':>7} "
+          + " ".join(f"{label + '_ms':>7}" for label in WINDOWS))
+    try:
+        for mode in args.modes.split(","):
+            r = await bench_mode(mode, events, args)
+            results.append(r)
+            print(f"{r['mode']:>10} {r['ingest_per_sec']:>9} {r['data_mb']:>8} {r['index_mb']:>9} {r['raw_mb']:>7} "
+                  + " ".join(f"{r['range_ms'][label]:>7}" for label in WINDOWS))
+    finally:
+        mongo_handler.close()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+import sys
+import os
+import time
+import random
+import asyncio
+import argparse
+import redis.asyncio as aioredis
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_mongo import mongo_handler, IndexManager, DataTransformer, EarthquakeRepository, AggregationPipelines, QueryBuilder
+from cache import TimeBucketCache
+from config import REDIS_URL
+import partial_aggregates
+from synthetic_catalog import SyntheticCatalog, DAY_MS
+
+BENCH_COLLECTION = "earthquakes_slider_bench"
+REGIONS = ["Alaska", "California", "Japan", "Indonesia", "Chile", "Mexico", "Turkey", "Fiji", "Tonga", "Peru"]
+HOUR_MS = DAY_MS // 24
+
+def slider_moves(end_ms, days, count, seed=3):
+    """Time-slider drags: windows of 1-30 days whose ends move by a few hours each step"""
+    rng = random.Random(seed)
+    width = rng.randint(1, 30) * DAY_MS
+    end = end_ms - rng.randint(0, days // 2) * DAY_MS
+    moves = []
+    for _ in range(count):
+        end = min(end_ms, max(end_ms - days * DAY_MS + width, end + rng.randint(-12, 12) * HOUR_MS + rng.randint(0, HOUR_MS)))
+        if rng.random() < 0.1:
+            width = rng.randint(1, 30) * DAY_MS
+        moves.append((end - width, end))
+    return moves
+
+async def main():
+    parser = argparse.ArgumentParser(description="Time-slider moves: direct aggregation vs composed partials")
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--moves", type=int, default=50)
+    args = parser.parse_args()
+
+    collection = mongo_handler.db_connection.get_database()[BENCH_COLLECTION]
+    await collection.drop()
+    now_ms = int(time.time() * 1000)
+    events = SyntheticCatalog(seed=44).generate(args.events, duration_days=args.days, end_ms=now_ms)
+    for i in range(0, len(events), 10000):
+        docs = []
+        for j, event in enumerate(events[i:i + 10000], start=i):
+            event["place"] = f"{j % 90 + 1} km NNE of Somewhere, {REGIONS[j % len(REGIONS)]}"
+            docs.append(DataTransformer.prepare_earthquake_data(event))
+        await collection.insert_many(docs, ordered=False)
+    await IndexManager.setup_indexes(collection)
+    repo = EarthquakeRepository(collection)
+
+    redis_client = aioredis.from_url(REDIS_URL, decode_responses=True)
+    partial_cache = TimeBucketCache(redis_client)
+    thirty_days_ago, forty_eight_hours_ago = now_ms - 30 * DAY_MS, now_ms - 48 * HOUR_MS
+
+    async def heatmap_partials(range_start, range_end, bucket_ms):
+        match = QueryBuilder.build_heatmap_query(range_start, range_end)
+        bucket = AggregationPipelines.time_bucket(range_start, bucket_ms)
+        rows = await repo.aggregate(AggregationPipelines.heatmap_partial_pipeline(match, bucket), limit=None)
+        return partial_aggregates.heatmap_partials(rows)
+
+    async def dashboard_partials(range_start, range_end, bucket_ms):
+        match = QueryBuilder.build_earthquake_query(start_time=range_start, end_time=range_end)
+        bucket = AggregationPipelines.time_bucket(range_start, bucket_ms)
+        rows = await repo.aggregate(AggregationPipelines.dashboard_partial_pipeline(match, bucket, 1000), limit=1)
+        return partial_aggregates.dashboard_partials(rows[0])
+
+    async def direct(kind, start, end):
+        if kind == "heatmap":
+            segments = [(start, end, (await heatmap_partials(start, end, None)).get(start, []))]
+            partial_aggregates.merge_heatmap(segments, "magnitude")
+        else:
+            partials = await dashboard_partials(start, end, None)
+            segments = [(start, end, partials[start])] if start in partials else []
+            partial_aggregates.merge_dashboard(segments, thirty_days_ago, forty_eight_hours_ago, now_ms, 10, 10, 1000)
+
+    async def composed(kind, start, end):
+        if kind == "heatmap":
+            segments = await partial_cache.compose(f"bench_{kind}", start, end, heatmap_partials, now_ms=now_ms)
+            partial_aggregates.merge_heatmap(segments, "magnitude")
+        else:
+            segments = await partial_cache.compose(
+                f"bench_{kind}", start, end, dashboard_partials,
+                cuts=(thirty_days_ago, forty_eight_hours_ago), now_ms=now_ms
+            )
+            partial_aggregates.merge_dashboard(segments, thirty_days_ago, forty_eight_hours_ago, now_ms, 10, 10, 1000)
+
+    moves = slider_moves(now_ms, args.days, args.moves)
+    print(f"{args.events} events over {args.days} days, {len(moves)} slider moves (ms per request)")
+    print(f"{'query':>10} {'direct p50':>11} {'direct p95':>11} {'composed p50':>13} {'composed p95':>13} {'first move':>11}")
+    try:
+        for kind in ("heatmap", "dashboard"):
+            timings = {"direct": [], "composed": []}
+            for start, end in moves:
+                for mode, run in (("direct", direct), ("composed", composed)):
+                    started = time.perf_counter()
+                    await run(kind, start, end)
+                    timings[mode].append((time.perf_counter() - started) * 1000)
+            direct_ms, composed_ms = sorted(timings["direct"]), sorted(timings["composed"])
+            p = lambda values, q: values[min(len(values) - 1, int(q * len(values)))]
+            print(f"{kind:>10} {p(direct_ms, 0.5):>11.1f} {p(direct_ms, 0.95):>11.1f} "
+                  f"{p(composed_ms, 0.5):>13.1f} {p(composed_ms, 0.95):>13.1f} {timings['composed'][0]:>11.1f}")
+        print(f"partial cache: {partial_cache.stats}")
+    finally:
+        stale = [key async for key in redis_client.scan_iter(match="partial:*:bench_*")]
+        if stale:
+            await redis_client.delete(*stale)
+        await redis_client.aclose()
+        await collection.drop()
+        mongo_handler.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
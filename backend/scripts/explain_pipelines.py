@@ -0,0 +1,112 @@
+import sys
+import os
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_mongo import mongo_handler, AggregationPipelines
+
+# Pre-migration variants, kept here only to compare plans
+LEGACY_PIPELINES = {
+    "magnitude_distribution": [
+        {"$project": {"magnitude": {"$toDouble": "$magnitude"}}},
+        {"$bucket": {"groupBy": "$magnitude", "boundaries": [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+                     "default": "Other", "output": {"count": {"$sum": 1}}}}
+    ],
+    "daily_trends": [
+        {"$project": {"date": {"$dateToString": {"format": "%Y-%m-%d", "date": {"$toDate": {"$toLong": "$time"}}}}}},
+        {"$group": {"_id": "$date", "count": {"$sum": 1}}},
+        {"$sort": {"_id": 1}}
+    ],
+    "top_regions": [
+        {"$project": {"region": {"$trim": {"input": {"$arrayElemAt": [{"$split": ["$place", ","]}, -1]}}}}},
+        {"$match": {"region": {"$ne": ""}}},
+        {"$group": {"_id": "$region", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": 10}
+    ],
+    "risk_scores": [
+        {"$project": {"magnitude": {"$toDouble": "$magnitude"}, "time": {"$toLong": "$time"},
+                      "region": {"$trim": {"input": {"$last": {"$split": ["$place", ","]}}}}}},
+        {"$group": {"_id": "$region", "avg_mag": {"$avg": "$magnitude"}, "total_count": {"$sum": 1}}}
+    ]
+}
+
+def current_pipelines():
+    now = datetime.now()
+    day_ago = int((now - timedelta(days=1)).timestamp() * 1000)
+    return {
+        "magnitude_distribution": AggregationPipelines.magnitude_distribution_pipeline(),
+        "daily_trends": AggregationPipelines.daily_trends_pipeline(),
+        "top_regions": AggregationPipelines.top_regions_pipeline(10),
+        "risk_scores": AggregationPipelines.risk_scores_pipeline(
+            int((now - timedelta(days=30)).timestamp() * 1000), 10
+        ),
+        "heatmap_24h": AggregationPipelines.heatmap_partial_pipeline(
+            {"time": {"$gte": day_ago}}, AggregationPipelines.time_bucket(day_ago, None)
+        ),
+    }
+
+def find_stages(plan, found=None):
+    """Flatten the stage names of a winning plan tree"""
+    found = [] if found is None else found
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            found.append(plan["stage"])
+        for key in ("inputStage", "queryPlan"):
+            if key in plan:
+                find_stages(plan[key], found)
+        for child in plan.get("inputStages", []):
+            find_stages(child, found)
+    return found
+
+def summarize(explain):
+    """Winning plan stages and docs/keys examined, for both classic and SBE explain output"""
+    cursor_stage = explain
+    if "stages" in explain:
+        cursor_stage = explain["stages"][0]["$cursor"]
+    planner = cursor_stage.get("queryPlanner", {})
+    stats = cursor_stage.get("executionStats", {})
+    stages = find_stages(planner.get("winningPlan", {}))
+    return {
+        "plan": " <- ".join(stages) or "?",
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "millis": stats.get("executionTimeMillis")
+    }
+
+async def explain(database, pipeline):
+    return await database.command(
+        "explain",
+        {"aggregate": "earthquakes", "pipeline": pipeline, "cursor": {}},
+        verbosity="executionStats"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description="Print winning plans of the analytics pipelines")
+    parser.add_argument("--legacy", action="store_true", help="Also explain the pre-migration pipelines")
+    args = parser.parse_args()
+
+    database = mongo_handler.db_connection.get_database()
+    total = await database["earthquakes"].count_documents({})
+    print(f"earthquakes: {total} documents\n")
+
+    variants = [("current", current_pipelines())]
+    if args.legacy:
+        variants.insert(0, ("legacy", LEGACY_PIPELINES))
+
+    for label, pipelines in variants:
+        print(f"=== {label} ===")
+        for name, pipeline in pipelines.items():
+            s = summarize(await explain(database, pipeline))
+            print(f"{name:<24} {s['plan']}")
+            print(f"{'':<24} docs={s['docs_examined']} keys={s['keys_examined']} ms={s['millis']}")
+        print()
+
+    mongo_handler.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
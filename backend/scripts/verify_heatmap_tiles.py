@@ -0,0 +1,77 @@
+import sys
+import os
+import time
+import asyncio
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_mongo import (
+    MongoHandler, IndexManager, EarthquakeRepository, HeatmapTileRepository, RollupRepository
+)
+from config import HEATMAP_CELL_SIZES_DEG
+from synthetic_catalog import SyntheticCatalog
+
+PREFIX = "heatmap_check_"
+DAY_MS = 24 * 3600 * 1000
+
+# (zoom, north, south, east, west) views, including one across the antimeridian
+VIEWS = [
+    (2, None, None, None, None),
+    (5, 60, 20, 40, -20),
+    (7, 10, -30, -170, 170),
+]
+
+def comparable(cells):
+    return sorted((c["lat"], c["lon"], c["count"], round(c["weight"], 6)) for c in cells)
+
+async def verify_heatmap_tiles():
+    handler = MongoHandler()
+    database = handler.db_connection.get_database()
+    scratch = [database[PREFIX + name] for name in ("earthquakes", "tiles", "config", "hourly", "daily")]
+    raw, tiles_collection, config, hourly, daily = scratch
+    for collection in scratch:
+        await collection.drop()
+    await IndexManager.setup_indexes(raw)
+    await IndexManager.setup_heatmap_tile_index(tiles_collection)
+
+    handler.earthquake_repo = EarthquakeRepository(raw)
+    handler.heatmap_tile_repo = HeatmapTileRepository(tiles_collection, config, HEATMAP_CELL_SIZES_DEG)
+    handler.rollup_repo = RollupRepository(hourly, daily, config, 45)
+
+    events = SyntheticCatalog(seed=21).generate(5000, duration_days=10)
+    try:
+        # Incremental maintenance through the ingestion path
+        for event in events:
+            await handler.insert_earthquake(event)
+        await config.replace_one({"_id": "heatmap_tiles"}, {"_id": "heatmap_tiles"}, upsert=True)
+
+        end = max(e["time"] for e in events)
+        ranges = [(None, None), (end - 5 * DAY_MS + 12345, end - DAY_MS // 3)]
+        for zoom, north, south, east, west in VIEWS:
+            for start_time, end_time in ranges:
+                box = dict(north=north, south=south, east=east, west=west)
+                started = time.perf_counter()
+                cell_deg, from_tiles = await handler.get_heatmap_cells(
+                    zoom, start_time=start_time, end_time=end_time, weight_by="energy", **box
+                )
+                tiles_ms = (time.perf_counter() - started) * 1000
+
+                # A magnitude filter that matches everything forces the raw aggregation
+                started = time.perf_counter()
+                _, from_raw = await handler.get_heatmap_cells(
+                    zoom, start_time=start_time, end_time=end_time, weight_by="energy", mag_min=-10, **box
+                )
+                raw_ms = (time.perf_counter() - started) * 1000
+
+                assert comparable(from_tiles) == comparable(from_raw), f"zoom {zoom} {box} differs"
+                print(f"zoom {zoom} ({cell_deg} deg) {len(from_tiles):>5} cells: tiles {tiles_ms:6.1f} ms, raw {raw_ms:6.1f} ms")
+    finally:
+        for collection in scratch:
+            await collection.drop()
+        handler.close()
+
+    print("Tile pyramid matches raw aggregation!")
+
+if __name__ == "__main__":
+    asyncio.run(verify_heatmap_tiles())
@@ -0,0 +1,81 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_neo4j import neo4j_handler, GraphSchemaManager
+
+AFTERSHOCK, CASCADE = neo4j_handler._rule_set("aftershock_rules"), neo4j_handler._rule_set("cascade_rules")
+SAMPLE_ROW = neo4j_handler._ingest_row(
+    {"id": "check", "time": 0, "latitude": 35.0, "longitude": -120.0, "magnitude": 5.0, "place": "Check"},
+    AFTERSHOCK, CASCADE
+)
+
+# Lookups the schema must serve from an index or constraint (EXPLAIN only, nothing is written)
+INDEXED_QUERIES = {
+    "merge earthquake": ("MERGE (e:Earthquake {id: $id}) RETURN e", {"id": "check"}),
+    "merge region": ("MERGE (r:Region {name: $name}) RETURN r", {"name": "check"}),
+    "merge city": ("MERGE (c:City {name: $name}) RETURN c", {"name": "check"}),
+    "merge fault zone": ("MERGE (fz:FaultZone {name: $name}) RETURN fz", {"name": "check"}),
+    "node neighbors": (neo4j_handler.NODE_NEIGHBORS_QUERY, {"node_id": "check"}),
+    "time range": (
+        "MATCH (e:Earthquake) WHERE e.time >= $start AND e.time <= $end RETURN e",
+        {"start": 0, "end": 1}
+    ),
+    "magnitude range": ("MATCH (e:Earthquake) WHERE e.mag >= $min_mag RETURN e", {"min_mag": 5.0}),
+    "earthquakes near point": (
+        "MATCH (e:Earthquake) WHERE point.distance(e.location, point({latitude: $lat, longitude: $lon})) < $meters RETURN e",
+        {"lat": 35.0, "lon": -120.0, "meters": 50000}
+    ),
+    "batch insert": (neo4j_handler.INSERT_EARTHQUAKES_QUERY, {"rows": [SAMPLE_ROW]}),
+    "fault links": (neo4j_handler.LINK_FAULTS_QUERY, {"rows": [SAMPLE_ROW], "fault_limit": 200000}),
+    "affected cities": (neo4j_handler.LINK_AFFECTED_CITIES_QUERY, {"rows": [SAMPLE_ROW]}),
+    "cluster links": (neo4j_handler.LINK_CLUSTERS_QUERY, {"rows": [SAMPLE_ROW]}),
+    "aftershock linking": (neo4j_handler.LINK_RELATED_EVENTS_QUERY, {"rows": [SAMPLE_ROW], "positions": {"check": 0}, "rules": AFTERSHOCK}),
+    "cascade detection": (neo4j_handler.DETECT_CASCADES_QUERY, {"rows": [SAMPLE_ROW], "positions": {"check": 0}, "rules": CASCADE}),
+    "near window": (neo4j_handler.NEAR_WINDOW_QUERY, {"start_time": 0, "end_time": 1}),
+    "near prune": (neo4j_handler.PRUNE_EXPIRED_NEAR_QUERY, {"start_time": 0}),
+    "cities near point": (
+        "MATCH (c:City) WHERE point.distance(c.location, point({latitude: $lat, longitude: $lon})) < $meters RETURN c",
+        {"lat": 35.0, "lon": -120.0, "meters": 500000}
+    ),
+}
+
+def verify_schema():
+    schema = neo4j_handler.schema
+    print("=== Neo4j Schema Verification ===")
+
+    # 1. Startup applied every migration, and re-running is a no-op
+    version = schema.current_version()
+    assert version == GraphSchemaManager.VERSION, f"Schema at version {version}, expected {GraphSchemaManager.VERSION}"
+    with neo4j_handler.driver.session() as session:
+        before = session.run("SHOW INDEXES YIELD name, state RETURN name, state ORDER BY name").data()
+    assert schema.ensure() == version
+    # Forced re-run of every statement, as after a lost version node
+    with neo4j_handler.driver.session() as session:
+        for _, _, statements in GraphSchemaManager.MIGRATIONS:
+            for statement in statements:
+                session.run(statement).consume()
+    with neo4j_handler.driver.session() as session:
+        after = session.run("SHOW INDEXES YIELD name, state RETURN name, state ORDER BY name").data()
+    assert before == after, "Re-applying the schema changed the index set"
+    offline = [row["name"] for row in after if row["state"] != "ONLINE"]
+    assert not offline, f"Indexes not online: {offline}"
+    print(f"Schema version {version}, {len(after)} indexes online, re-apply is a no-op")
+
+    # 2. Hot lookups are planned as index seeks, not label scans
+    for name, (query, params) in INDEXED_QUERIES.items():
+        operators = schema.plan_operators(query, **params)
+        scans = [operator for operator in operators if operator[0] in GraphSchemaManager.SCAN_OPERATORS]
+        assert not scans, f"{name}: {scans}"
+        seeks = sorted({operator for operator, _ in operators if "Index" in operator})
+        print(f"  {name:<24} {', '.join(seeks)}")
+
+    print("\nVerification Complete.")
+
+if __name__ == "__main__":
+    try:
+        verify_schema()
+    finally:
+        neo4j_handler.close()
@@ -0,0 +1,94 @@
+import sys
+import os
+import asyncio
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_mongo import mongo_handler, IndexManager, DataTransformer, QueryBuilder
+from synthetic_catalog import SyntheticCatalog
+
+CHECK_COLLECTION = "earthquakes_plan_check"
+
+# (description, build_earthquake_query kwargs) for every filter shape /earthquakes supports
+FILTER_SHAPES = [
+    ("no filter", {}),
+    ("time range", {"start_time": "window_start"}),
+    ("magnitude", {"mag_min": 4.0}),
+    ("time + magnitude", {"start_time": "window_start", "mag_min": 3.0, "mag_max": 6.0}),
+    ("cluster", {"cluster_id": "cl_syn00000001"}),
+    ("cluster + time", {"cluster_id": "cl_syn00000001", "start_time": "window_start"}),
+    ("bbox", {"north": 40, "south": 30, "east": -115, "west": -125}),
+    ("bbox crossing 180", {"north": 10, "south": -30, "east": -170, "west": 170}),
+    ("latitude band only", {"north": 10, "south": -10}),
+    ("bbox + time + magnitude", {"north": 60, "south": -60, "east": 60, "west": -60,
+                                 "start_time": "window_start", "mag_min": 2.5}),
+]
+
+def plan_stages(plan, found=None):
+    found = [] if found is None else found
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            found.append(plan["stage"])
+        for key in ("inputStage", "queryPlan"):
+            if key in plan:
+                plan_stages(plan[key], found)
+        for child in plan.get("inputStages", []):
+            plan_stages(child, found)
+    return found
+
+def matches(doc, kwargs):
+    """Reference semantics of the filters, evaluated in Python"""
+    if "start_time" in kwargs and doc["time"] < kwargs["start_time"]:
+        return False
+    if "mag_min" in kwargs and doc["magnitude"] < kwargs["mag_min"]:
+        return False
+    if "mag_max" in kwargs and doc["magnitude"] > kwargs["mag_max"]:
+        return False
+    if "cluster_id" in kwargs and doc.get("cluster_id") != kwargs["cluster_id"]:
+        return False
+    if "north" in kwargs and not kwargs["south"] <= doc["latitude"] <= kwargs["north"]:
+        return False
+    if "east" in kwargs:
+        west, east, lon = kwargs["west"], kwargs["east"], doc["longitude"]
+        inside = west <= lon <= east if west <= east else (lon >= west or lon <= east)
+        if not inside:
+            return False
+    return True
+
+async def verify_query_plans():
+    database = mongo_handler.db_connection.get_database()
+    collection = database[CHECK_COLLECTION]
+    await collection.drop()
+
+    events = SyntheticCatalog(seed=3).generate(20000, duration_days=30)
+    for i, event in enumerate(events):
+        event["cluster_id"] = "cl_syn00000001" if i % 50 == 0 else None
+    docs = [DataTransformer.prepare_earthquake_data(e) for e in events]
+    await collection.insert_many(docs)
+    await IndexManager.setup_indexes(collection)
+
+    window_start = max(e["time"] for e in events) - 3 * 24 * 3600 * 1000
+    failures = 0
+    try:
+        for name, kwargs in FILTER_SHAPES:
+            kwargs = {k: (window_start if v == "window_start" else v) for k, v in kwargs.items()}
+            query = QueryBuilder.build_earthquake_query(**kwargs)
+            cursor = collection.find(query).sort("time", -1).limit(100)
+            explain = await cursor.explain()
+            stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+
+            found = await collection.count_documents(query)
+            expected = sum(1 for e in events if matches(e, kwargs))
+            ok = "IXSCAN" in stages and "COLLSCAN" not in stages and found == expected
+            failures += not ok
+            print(f"{'OK ' if ok else 'FAIL'} {name:<26} {' <- '.join(stages):<40} {found}/{expected} rows")
+    finally:
+        await collection.drop()
+        mongo_handler.close()
+
+    assert failures == 0, f"{failures} filter shapes without an index scan or with wrong results"
+    print("All filter shapes use an index scan and return the expected rows!")
+
+if __name__ == "__main__":
+    asyncio.run(verify_query_plans())
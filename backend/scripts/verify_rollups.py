@@ -0,0 +1,92 @@
+import sys
+import os
+import time
+import asyncio
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_mongo import (
+    mongo_handler, IndexManager, DataTransformer, EarthquakeRepository, RollupRepository, AggregationPipelines
+)
+from synthetic_catalog import SyntheticCatalog
+
+PREFIX = "rollup_check_"
+REGIONS = ["Alaska", "CA", "Japan", "Chile", "Tonga"]
+
+async def cells(collection):
+    docs = await collection.find({"count": {"$ne": 0}}, projection={"_id": 0, "expires_at": 0}).to_list(None)
+    return sorted(
+        ((d["bucket"], d["region"], d["mag_bin"], d["depth_bin"], d["count"], d["mag_count"], round(d["mag_sum"], 6))
+         for d in docs)
+    )
+
+async def verify_rollups():
+    database = mongo_handler.db_connection.get_database()
+    raw = database[PREFIX + "earthquakes"]
+    hourly, daily, config = database[PREFIX + "hourly"], database[PREFIX + "daily"], database[PREFIX + "config"]
+    for collection in (raw, hourly, daily, config):
+        await collection.drop()
+    await IndexManager.setup_rollup_indexes(hourly, expiring=True)
+    await IndexManager.setup_rollup_indexes(daily)
+    repo = RollupRepository(hourly, daily, config, 45)
+
+    events = SyntheticCatalog(seed=11).generate(5000, duration_days=20)
+    try:
+        # Incremental path, including re-ingestion of revised events
+        for i, event in enumerate(events):
+            event["place"] = f"10 km N of Somewhere, {REGIONS[i % len(REGIONS)]}"
+            doc = DataTransformer.prepare_earthquake_data(event)
+            await raw.insert_one(dict(doc))
+            await repo.record(None, doc)
+        for event in events[:200]:
+            previous = await raw.find_one({"id": event["id"]}, projection=EarthquakeRepository.TRACKED_FIELDS)
+            event["magnitude"] = round(event["magnitude"] + 0.7, 2)
+            doc = DataTransformer.prepare_earthquake_data(event)
+            await raw.update_one({"id": doc["id"]}, {"$set": doc})
+            await repo.record(previous, doc)
+
+        incremental = (await cells(hourly), await cells(daily))
+        await repo.rebuild(raw)
+        rebuilt = (await cells(hourly), await cells(daily))
+        assert incremental == rebuilt, "Incremental rollups differ from a rebuild"
+        print(f"Incremental rollups match rebuild ({len(rebuilt[0])} hourly, {len(rebuilt[1])} daily cells)")
+
+        # Analytics answers from rollups vs raw pipelines
+        checks = [
+            ("magnitude distribution", AggregationPipelines.magnitude_distribution_pipeline(),
+             AggregationPipelines.rollup_magnitude_distribution_pipeline()),
+            ("daily trends", AggregationPipelines.daily_trends_pipeline(),
+             AggregationPipelines.rollup_daily_trends_pipeline()),
+            ("top regions", AggregationPipelines.top_regions_pipeline(10),
+             AggregationPipelines.rollup_top_regions_pipeline(10)),
+        ]
+        for name, raw_pipeline, rollup_pipeline in checks:
+            start = time.perf_counter()
+            expected = await raw.aggregate(raw_pipeline).to_list(None)
+            raw_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            found = await daily.aggregate(rollup_pipeline).to_list(None)
+            rollup_ms = (time.perf_counter() - start) * 1000
+            # Ties (e.g. equal region counts) may come back in any order
+            assert sorted(map(str, found)) == sorted(map(str, expected)), f"{name}: {found} != {expected}"
+            print(f"{name:<24} raw {raw_ms:7.1f} ms, rollup {rollup_ms:7.1f} ms")
+
+        # Risk scores use hour granularity for the recent window, so compare at an hour boundary
+        hour_ms = RollupRepository.HOUR_MS
+        since = (int((datetime.now() - timedelta(days=30)).timestamp() * 1000) // hour_ms + 1) * hour_ms
+        expected = await raw.aggregate(AggregationPipelines.risk_scores_pipeline(since, 10)).to_list(None)
+        found = await daily.aggregate(AggregationPipelines.rollup_risk_scores_pipeline(hourly.name, since, 10)).to_list(None)
+        assert sorted((r["region"], round(r["risk_score"], 6)) for r in found) == \
+               sorted((r["region"], round(r["risk_score"], 6)) for r in expected), "risk scores differ"
+        print("risk scores match")
+    finally:
+        for collection in (raw, hourly, daily, config):
+            await collection.drop()
+        mongo_handler.close()
+
+    print("Rollups verified!")
+
+if __name__ == "__main__":
+    asyncio.run(verify_rollups())
@@ -0,0 +1,89 @@
+import sys
+import os
+import asyncio
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_mongo import (
+    mongo_handler, IndexManager, DataTransformer, EarthquakeRepository,
+    DistributionSketchRepository, ScatterSampleRepository
+)
+from sketches import FixedBins
+from config import SKETCH_MAGNITUDE_BINS, SKETCH_DEPTH_BINS_KM
+from synthetic_catalog import SyntheticCatalog
+
+PREFIX = "sketch_check_"
+REGIONS = ["Alaska", "CA", "Japan", "Chile", "Tonga"]
+
+async def snapshot(sketches, sample):
+    histograms = {
+        d["_id"]: (d["count"], {k: v for k, v in d.get("magnitude", {}).items() if v},
+                   {k: v for k, v in d.get("depth", {}).items() if v})
+        for d in await sketches.find({}).to_list(None)
+    }
+    members = sorted(d["id"] for d in await sample.find({}, projection={"id": 1}).to_list(None))
+    return histograms, members
+
+async def verify_sketches():
+    database = mongo_handler.db_connection.get_database()
+    raw, sketches, sample, config = (database[PREFIX + name] for name in ("earthquakes", "sketches", "sample", "config"))
+    for collection in (raw, sketches, sample, config):
+        await collection.drop()
+    await IndexManager.setup_scatter_sample_indexes(sample)
+    magnitude_bins, depth_bins = FixedBins(*SKETCH_MAGNITUDE_BINS), FixedBins(*SKETCH_DEPTH_BINS_KM)
+    sketch_repo = DistributionSketchRepository(sketches, config, magnitude_bins, depth_bins)
+    sample_repo = ScatterSampleRepository(sample, config, raw, 50)
+
+    events = SyntheticCatalog(seed=17).generate(6000, duration_days=20)
+    events, late_events = events[:5000], events[5000:]
+
+    async def ingest(batch, offset):
+        for i, event in enumerate(batch, offset):
+            event["place"] = f"10 km N of Somewhere, {REGIONS[i % len(REGIONS)]}"
+            doc = DataTransformer.prepare_earthquake_data(event)
+            await raw.insert_one(dict(doc))
+            await sketch_repo.record(None, doc)
+            await sample_repo.record(None, doc)
+
+    try:
+        # Incremental path: new events, revisions (members leave their stratum), then more new events
+        await ingest(events, 0)
+        for event in events[:300]:
+            previous = await raw.find_one({"id": event["id"]}, projection=EarthquakeRepository.TRACKED_FIELDS)
+            event["magnitude"] = round(event["magnitude"] + 1.3, 2)
+            event["depth"] = round(event["depth"] + 20, 2)
+            doc = DataTransformer.prepare_earthquake_data(event)
+            await raw.update_one({"id": doc["id"]}, {"$set": doc})
+            await sketch_repo.record(previous, doc)
+            await sample_repo.record(previous, doc)
+        await ingest(late_events, len(events))
+
+        incremental = await snapshot(sketches, sample)
+        await sketch_repo.rebuild(raw)
+        await sample_repo.rebuild(raw)
+        rebuilt = await snapshot(sketches, sample)
+        assert incremental[0] == rebuilt[0], "Incremental histograms differ from a rebuild"
+        print(f"Incremental histograms match rebuild ({len(rebuilt[0]) - 1} regions)")
+
+        assert incremental[1] == rebuilt[1], "Incremental scatter sample differs from a rebuild"
+        print(f"Incremental scatter sample matches rebuild ({len(rebuilt[1])} events)")
+
+        # Quantiles within one bin width of the exact values
+        stored = await raw.find({}, projection={"magnitude": 1, "depth": 1}).to_list(None)
+        doc = await sketch_repo.get()
+        for field, bins in (("magnitude", magnitude_bins), ("depth", depth_bins)):
+            values = np.array([d[field] for d in stored])
+            estimate = bins.quantiles(doc[field], [0.1, 0.5, 0.9, 0.99])
+            exact = dict(zip(estimate, np.quantile(values, [0.1, 0.5, 0.9, 0.99])))
+            for label, value in estimate.items():
+                assert abs(value - exact[label]) <= bins.width, f"{field} {label}: {value} vs {exact[label]}"
+            print(f"{field:<9} quantiles {estimate} (exact {({k: round(v, 3) for k, v in exact.items()})})")
+    finally:
+        for collection in (raw, sketches, sample, config):
+            await collection.drop()
+        mongo_handler.close()
+
+if __name__ == "__main__":
+    asyncio.run(verify_sketches())
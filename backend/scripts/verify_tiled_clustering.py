@@ -0,0 +1,59 @@
+import sys
+import os
+import time
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clustering import ClusteringEngine
+
+def make_catalog(n_background=6000, n_swarms=40, swarm_size=150, seed=7):
+    """Random background seismicity plus dense swarms, some near tile borders."""
+    rng = np.random.default_rng(seed)
+    now_ms = int(time.time() * 1000)
+    week_ms = 7 * 24 * 3600 * 1000
+
+    lats = [rng.uniform(-70, 70, n_background)]
+    lons = [rng.uniform(-180, 180, n_background)]
+    times = [rng.integers(now_ms - week_ms, now_ms, n_background)]
+    for _ in range(n_swarms):
+        lat0, lon0 = rng.uniform(-60, 60), rng.uniform(-175, 175)
+        t0 = rng.integers(now_ms - week_ms, now_ms)
+        lats.append(rng.normal(lat0, 0.3, swarm_size))
+        lons.append(rng.normal(lon0, 0.3, swarm_size))
+        times.append(np.clip(t0 + rng.exponential(12 * 3600 * 1000, swarm_size).astype(np.int64), None, now_ms))
+
+    lats, lons, times = np.concatenate(lats), np.concatenate(lons), np.concatenate(times)
+    return [
+        {"id": f"synthetic{i}", "latitude": lat, "longitude": lon, "time": int(t),
+         "magnitude": 2.5, "depth": 10.0, "place": "Synthetic"}
+        for i, (lat, lon, t) in enumerate(zip(lats, lons, times))
+    ]
+
+def verify_tiled_matches_global():
+    engine = ClusteringEngine()
+    quakes = make_catalog()
+    df, coords = engine._prepare_data(quakes)
+    print(f"Catalog: {len(df)} events")
+
+    for eps_km, time_window_hours, min_samples in [(10, 24, 3), (25, 48, 3), (50, 48, 5), (100, 72, 4)]:
+        config = {"eps_km": eps_km, "time_window_hours": time_window_hours, "min_samples": min_samples}
+
+        engine.mode = "global"
+        start = time.time()
+        expected = engine._dbscan_labels(coords, config)
+        global_secs = time.time() - start
+
+        engine.mode = "tiled"
+        start = time.time()
+        labels = engine._dbscan_labels(coords, config)
+        tiled_secs = time.time() - start
+
+        print(f"{config}: {expected.max() + 1} clusters, global {global_secs:.2f}s, tiled {tiled_secs:.2f}s")
+        assert np.array_equal(labels, expected), f"Tiled labels differ from global run for {config}"
+
+    print("Tiled clustering matches global DBSCAN exactly!")
+
+if __name__ == "__main__":
+    verify_tiled_matches_global()
@@ -0,0 +1,69 @@
+import hashlib
+import math
+from typing import Dict, List, Optional
+
+# Fixed-bin histograms are sparse {bin index (str): count} maps, so they can be
+# $inc-maintained in MongoDB and merged by adding counts bin by bin.
+
+
+class FixedBins:
+    """Equal-width bins over [lower, upper); values outside are clamped into the end bins"""
+
+    def __init__(self, lower: float, upper: float, width: float):
+        self.lower = lower
+        self.width = width
+        self.count = int(round((upper - lower) / width))
+
+    def index(self, value: Optional[float]) -> Optional[int]:
+        if value is None:
+            return None
+        return min(self.count - 1, max(0, int(math.floor((value - self.lower) / self.width + 1e-9))))
+
+    def bin_lower(self, index: int) -> float:
+        return round(self.lower + index * self.width, 6)
+
+    def quantiles(self, histogram: Dict[str, int], qs: List[float]) -> Dict[str, Optional[float]]:
+        """Quantiles by linear interpolation inside the bin that crosses each rank"""
+        bins = sorted((int(i), c) for i, c in histogram.items() if c > 0)
+        total = sum(c for _, c in bins)
+        result = {}
+        for q in qs:
+            label = f"p{round(q * 100):g}"
+            if not total:
+                result[label] = None
+                continue
+            rank, seen = q * total, 0
+            for index, count in bins:
+                if seen + count >= rank:
+                    result[label] = round(self.bin_lower(index) + self.width * (rank - seen) / count, 3)
+                    break
+                seen += count
+        return result
+
+    def rows(self, histogram: Dict[str, int]) -> List[Dict]:
+        """Non-empty bins as [{lower, upper, count}] in ascending order"""
+        return [
+            {"lower": self.bin_lower(int(i)), "upper": self.bin_lower(int(i) + 1), "count": c}
+            for i, c in sorted(histogram.items(), key=lambda item: int(item[0])) if c > 0
+        ]
+
+
+def merge_histograms(*histograms: Dict[str, int]) -> Dict[str, int]:
+    merged = {}
+    for histogram in histograms:
+        for index, count in (histogram or {}).items():
+            merged[index] = merged.get(index, 0) + count
+    return merged
+
+
+def magnitude_stratum(magnitude: Optional[float]) -> int:
+    """Integer magnitude band of the scatter sample (-1 outside 0..10, like the rollup mag_bin)"""
+    if magnitude is None or not 0 <= magnitude < 10:
+        return -1
+    return int(math.floor(magnitude))
+
+
+def sample_priority(event_id: str) -> float:
+    """Uniform pseudo-random priority in [0, 1) fixed per event id (bottom-k sampling)"""
+    digest = hashlib.blake2b(str(event_id).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
@@ -0,0 +1,224 @@
+import numpy as np
+from datetime import datetime
+
+EARTH_KM_PER_DEG = 111.32
+DAY_MS = 24 * 3600 * 1000
+
+
+class SyntheticCatalog:
+    """
+    Reproducible synthetic seismicity for offline benchmarks.
+
+    - Background: homogeneous Poisson process in time, uniform over the sphere
+      between +/-70 degrees latitude.
+    - Sequences: ETAS-like branching. Mainshock and aftershock magnitudes follow
+      Gutenberg-Richter, each event triggers 10^(alpha * (M - Mc)) * K children
+      on average, delays follow Omori-Utsu and distances scale with rupture length.
+    - A share of sequences is centered next to the antimeridian, so they
+      straddle +/-180 degrees longitude.
+
+    Every event carries `sequence_id` (-1 for background) as ground truth.
+    """
+
+    def __init__(
+        self, seed=42, b_value=1.0, mc=2.0, mainshock_min_mag=4.5,
+        mainshock_max_mag=8.5, productivity_k=0.08, alpha=0.8, omori_c_days=0.01, omori_p=1.2,
+        max_generations=3, antimeridian_fraction=0.15
+    ):
+        self.rng = np.random.default_rng(seed)
+        self.b_value = b_value
+        self.mc = mc
+        self.mainshock_min_mag = mainshock_min_mag
+        self.mainshock_max_mag = mainshock_max_mag
+        self.productivity_k = productivity_k
+        self.alpha = alpha
+        self.omori_c_days = omori_c_days
+        self.omori_p = omori_p
+        self.max_generations = max_generations
+        self.antimeridian_fraction = antimeridian_fraction
+
+    def _gr_magnitudes(self, size, m_min):
+        # Gutenberg-Richter: P(M > m) = 10^(-b (m - m_min))
+        return m_min - np.log10(self.rng.uniform(size=size)) / self.b_value
+
+    def _uniform_sphere(self, size, max_lat=70.0):
+        z = self.rng.uniform(np.sin(np.deg2rad(-max_lat)), np.sin(np.deg2rad(max_lat)), size)
+        return np.rad2deg(np.arcsin(z)), self.rng.uniform(-180, 180, size)
+
+    def _omori_delays_days(self, size, max_days):
+        # Inverse CDF of the Omori-Utsu law, truncated at max_days
+        c, p = self.omori_c_days, self.omori_p
+        cdf_max = 1 - (1 + max_days / c) ** (1 - p)
+        u = self.rng.uniform(0, cdf_max, size)
+        return c * ((1 - u) ** (1 / (1 - p)) - 1)
+
+    def _offsets(self, parent_lat, parent_mag, size):
+        # Half a rupture length (Wells & Coppersmith-like scaling), heavy-tailed spread
+        scale_km = 0.5 * 10 ** (0.5 * parent_mag - 1.8) + 2.0
+        dist_km = scale_km * self.rng.pareto(2.5, size)
+        bearing = self.rng.uniform(0, 2 * np.pi, size)
+        dlat = dist_km * np.cos(bearing) / EARTH_KM_PER_DEG
+        dlon = dist_km * np.sin(bearing) / (EARTH_KM_PER_DEG * max(np.cos(np.deg2rad(parent_lat)), 0.05))
+        return dlat, dlon
+
+    def _sequence(self, lat, lon, mag, depth, t_ms, end_ms):
+        """ETAS-like cascade below one mainshock as (lat, lon, mag, depth, time) tuples."""
+        events = [(lat, lon, mag, depth, t_ms)]
+        generation = [(lat, lon, mag, depth, t_ms)]
+        for _ in range(self.max_generations):
+            children = []
+            for p_lat, p_lon, p_mag, p_depth, p_time in generation:
+                expected = self.productivity_k * 10 ** (self.alpha * (p_mag - self.mc))
+                count = self.rng.poisson(expected)
+                if not count:
+                    continue
+                delays_ms = (self._omori_delays_days(count, (end_ms - p_time) / DAY_MS) * DAY_MS).astype(np.int64)
+                dlat, dlon = self._offsets(p_lat, p_mag, count)
+                mags = np.minimum(self._gr_magnitudes(count, self.mc), p_mag + 0.5)
+                depths = np.clip(p_depth + self.rng.normal(0, 3, count), 0, 700)
+                for i in range(count):
+                    children.append((
+                        float(np.clip(p_lat + dlat[i], -89.9, 89.9)),
+                        float((p_lon + dlon[i] + 180) % 360 - 180),
+                        float(mags[i]), float(depths[i]), int(p_time + delays_ms[i])
+                    ))
+            if not children:
+                break
+            events.extend(children)
+            generation = children
+        return events
+
+    def generate(self, n_events, background_fraction=0.5, duration_days=7, end_ms=None):
+        """Generate about n_events events (exactly n_events, truncated) ending at end_ms."""
+        end_ms = end_ms or int(datetime.now().timestamp() * 1000)
+        start_ms = end_ms - int(duration_days * DAY_MS)
+
+        n_background = int(n_events * background_fraction)
+        lat, lon = self._uniform_sphere(n_background)
+        rows = {
+            "latitude": list(lat), "longitude": list(lon),
+            "magnitude": list(self._gr_magnitudes(n_background, self.mc)),
+            "depth": list(np.clip(self.rng.gamma(1.5, 15, n_background), 0, 700)),
+            "time": list(self.rng.integers(start_ms, end_ms, n_background)),
+            "sequence_id": [-1] * n_background
+        }
+
+        sequence_id = 0
+        while len(rows["time"]) < n_events:
+            if self.rng.uniform() < self.antimeridian_fraction:
+                m_lat, m_lon = self.rng.uniform(-60, 60), float(self.rng.choice([-179.8, 179.8]))
+            else:
+                (m_lat,), (m_lon,) = self._uniform_sphere(1, max_lat=60.0)
+            m_mag = float(min(self._gr_magnitudes(1, self.mainshock_min_mag)[0], self.mainshock_max_mag))
+            m_depth = float(self.rng.gamma(1.5, 15))
+            # Leave room for the sequence to develop inside the window
+            m_time = int(self.rng.integers(start_ms, end_ms - DAY_MS // 4))
+
+            for e_lat, e_lon, e_mag, e_depth, e_time in self._sequence(m_lat, m_lon, m_mag, m_depth, m_time, end_ms):
+                rows["latitude"].append(e_lat)
+                rows["longitude"].append(e_lon)
+                rows["magnitude"].append(e_mag)
+                rows["depth"].append(e_depth)
+                rows["time"].append(e_time)
+                rows["sequence_id"].append(sequence_id)
+            sequence_id += 1
+
+        order = self.rng.permutation(len(rows["time"]))[:n_events]
+        return [
+            {
+                "id": f"syn{i:08d}",
+                "latitude": float(rows["latitude"][j]),
+                "longitude": float(rows["longitude"][j]),
+                "magnitude": round(float(rows["magnitude"][j]), 2),
+                "depth": round(float(rows["depth"][j]), 2),
+                "time": int(rows["time"][j]),
+                "place": "Synthetic",
+                "sequence_id": int(rows["sequence_id"][j])
+            }
+            for i, j in enumerate(order)
+        ]
+
+
+def usgs_feature(event):
+    """USGS-like GeoJSON feature, so raw_json has a realistic size"""
+    return {
+        "type": "Feature",
+        "id": event["id"],
+        "properties": {
+            "mag": event["magnitude"], "place": event["place"], "time": event["time"],
+            "updated": event["time"] + 60000, "tz": None,
+            "url": f"https://earthquake.usgs.gov/earthquakes/eventpage/{event['id']}",
+            "detail": f"https://earthquake.usgs.gov/earthquakes/feed/v1.0/detail/{event['id']}.geojson",
+            "felt": None, "cdi": None, "mmi": None, "alert": None, "status": "automatic",
+            "tsunami": 0, "sig": int(event["magnitude"] * 40), "net": "us", "code": event["id"][3:],
+            "ids": f",us{event['id']},", "sources": ",us,", "types": ",origin,phase-data,",
+            "nst": 42, "dmin": 1.234, "rms": 0.56, "gap": 78, "magType": "mb",
+            "type": "earthquake", "title": f"M {event['magnitude']} - {event['place']}"
+        },
+        "geometry": {"type": "Point", "coordinates": [event["longitude"], event["latitude"], event["depth"]]}
+    }
+
+
+class InMemoryEarthquakeSource:
+    """
+    Stand-in for MongoHandler with the subset ClusteringEngine uses,
+    backed by a list of event dicts. Caching and hierarchy storage are no-ops.
+    """
+
+    def __init__(self, events, clustering_config=None):
+        self.events = sorted(events, key=lambda e: e["time"], reverse=True)
+        self.clustering_config = clustering_config or {}
+
+    def _matches(self, e, start_time, end_time, north, south, east, west):
+        if start_time is not None and e["time"] < start_time:
+            return False
+        if end_time is not None and e["time"] > end_time:
+            return False
+        if north is not None and e["latitude"] > north:
+            return False
+        if south is not None and e["latitude"] < south:
+            return False
+        if east is not None and west is not None and west > east:
+            # Antimeridian crossing box
+            return e["longitude"] >= west or e["longitude"] <= east
+        if east is not None and e["longitude"] > east:
+            return False
+        if west is not None and e["longitude"] < west:
+            return False
+        return True
+
+    async def get_clustering_config(self):
+        return self.clustering_config
+
+    async def get_latest_event_time(self):
+        return self.events[0]["time"] if self.events else None
+
+    async def get_catalog_watermark(self):
+        return {"latest_time": self.events[0]["time"], "version": 0} if self.events else None
+
+    async def get_earthquakes(
+        self, start_time=None, end_time=None, north=None, south=None,
+        east=None, west=None, limit=100, **_
+    ):
+        matched = (e for e in self.events if self._matches(e, start_time, end_time, north, south, east, west))
+        return [e for _, e in zip(range(limit), matched)]
+
+    async def iter_earthquakes(
+        self, projection=None, batch_size=1000, start_time=None, end_time=None,
+        north=None, south=None, east=None, west=None, **_
+    ):
+        for e in self.events:
+            if self._matches(e, start_time, end_time, north, south, east, west):
+                yield e
+
+    async def get_cached_clustering(self, key):
+        return None
+
+    async def set_cached_clustering(self, key, entry):
+        return None
+
+    async def get_clustering_hierarchy(self):
+        return None
+
+    async def set_clustering_hierarchy(self, document):
+        return None
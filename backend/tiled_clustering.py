@@ -0,0 +1,212 @@
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.neighbors import KDTree
+
+
+class UnionFind:
+    """
+    Array-backed union-find. Unions are applied in vectorized rounds that hook
+    the higher root under the lower one, so every root is the lowest index of
+    its set.
+    """
+
+    def __init__(self, size):
+        self.parent = np.arange(size, dtype=np.int64)
+
+    def find_many(self, x):
+        # Full path compression by pointer jumping
+        parent = self.parent
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        self.parent = parent
+        return parent[x]
+
+    def union_pairs(self, a, b):
+        a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+        while len(a):
+            root_a, root_b = self.find_many(a), self.find_many(b)
+            pending = root_a != root_b
+            if not pending.any():
+                break
+            low = np.minimum(root_a[pending], root_b[pending])
+            high = np.maximum(root_a[pending], root_b[pending])
+            np.minimum.at(self.parent, high, low)
+            a, b = a[pending], b[pending]
+
+
+class TiledDBSCAN:
+    """
+    Chebyshev DBSCAN over scaled features (see ClusteringEngine), computed per
+    spatial tile and stitched with a union-find merge.
+
+    The first two feature columns (lat/lon in eps units) are cut into square
+    tiles of `tile_size` eps. Each tile owns the points inside it and sees a
+    halo of width eps around it, which is exactly the neighborhood needed to
+    decide core status, core-core links and border labels for its own points.
+    Tiles run in a thread pool with at most `max_workers` in flight, each
+    querying its points `query_chunk` at a time, and every finished tile is
+    folded into the global union-find right away; no pass keeps neighbor
+    lists beyond one chunk.
+
+    Labels are numbered like sklearn's DBSCAN (clusters ordered by their
+    lowest-index core point, border points joining the earliest such cluster),
+    so results are identical to a single global DBSCAN run.
+    """
+
+    def __init__(self, min_samples, tile_size=32.0, max_workers=4, eps=1.0, query_chunk=256):
+        if tile_size <= 2 * eps:
+            raise ValueError("tile_size must be larger than twice eps")
+        self.min_samples = int(min_samples)
+        self.tile_size = float(tile_size)
+        self.max_workers = max_workers
+        self.eps = float(eps)
+        self.query_chunk = int(query_chunk)
+
+    def _tiles(self, X):
+        """Yield (owned point indices, owned + halo point indices) per non-empty tile, both sorted."""
+        n = len(X)
+        cells = np.floor(X[:, :2] / self.tile_size).astype(np.int64)
+        offset = X[:, :2] - cells * self.tile_size
+
+        # Every point belongs to its own tile and to the halo of each adjacent tile it is within eps of
+        member_cells, member_idx = [cells], [np.arange(n)]
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if dx == 0 and dy == 0:
+                    continue
+                near = np.ones(n, dtype=bool)
+                for axis, step in ((0, dx), (1, dy)):
+                    if step == -1:
+                        near &= offset[:, axis] <= self.eps
+                    elif step == 1:
+                        near &= offset[:, axis] >= self.tile_size - self.eps
+                idx = np.flatnonzero(near)
+                member_cells.append(cells[idx] + (dx, dy))
+                member_idx.append(idx)
+
+        member_cells = np.concatenate(member_cells)
+        member_idx = np.concatenate(member_idx)
+        owned_flag = np.arange(len(member_idx)) < n
+
+        order = np.lexsort((member_idx, member_cells[:, 1], member_cells[:, 0]))
+        member_cells, member_idx, owned_flag = member_cells[order], member_idx[order], owned_flag[order]
+        boundaries = np.flatnonzero(np.any(np.diff(member_cells, axis=0) != 0, axis=1)) + 1
+
+        for members, owned in zip(np.split(member_idx, boundaries), np.split(owned_flag, boundaries)):
+            if owned.any():
+                yield members[owned], members
+
+    def _chunked_neighbors(self, tree, X, points):
+        """Yield (chunk, neighbor count per point, concatenated neighbor tree indices) per query chunk."""
+        for start in range(0, len(points), self.query_chunk):
+            chunk = points[start:start + self.query_chunk]
+            local = tree.query_radius(X[chunk], self.eps)
+            counts = np.fromiter((len(nb) for nb in local), dtype=np.int64, count=len(local))
+            yield chunk, counts, np.concatenate(local)
+
+    def _core_pass(self, X, owned, members):
+        tree = KDTree(X[members], metric="chebyshev")
+        counts = tree.query_radius(X[owned], self.eps, count_only=True)
+        return owned, counts >= self.min_samples
+
+    def _link_pass(self, X, is_core, owned, members):
+        """
+        Union links for the tile's core components: every core point reached from an
+        owned core point is linked to the lowest core of its tile-local component.
+        Each query chunk is reduced to its components before the next one is queried;
+        halo points carry the links across tiles.
+        """
+        cores = members[is_core[members]]
+        owned_cores = owned[is_core[owned]]
+        if not len(owned_cores):
+            return np.empty((0, 2), dtype=np.int64)
+
+        local = UnionFind(len(cores))
+        touched = np.zeros(len(cores), dtype=bool)
+        tree = KDTree(X[cores], metric="chebyshev")
+        for chunk, counts, neighbors in self._chunked_neighbors(tree, X, owned_cores):
+            # Chunk rows are sorted, so the neighbor lists are already in CSR order
+            row_counts = np.zeros(len(cores), dtype=np.int64)
+            row_counts[np.searchsorted(cores, chunk)] = counts
+            indptr = np.concatenate(([0], np.cumsum(row_counts)))
+            graph = csr_matrix((np.ones(len(neighbors)), neighbors, indptr), shape=(len(cores), len(cores)))
+            _, component = connected_components(graph, directed=False)
+            # Link every core the chunk touches to the lowest such core of its component
+            reached = np.zeros(len(cores), dtype=bool)
+            reached[neighbors] = True
+            idx = np.flatnonzero(reached)
+            comps = component[idx]
+            representative = np.empty(component.max() + 1, dtype=np.int64)
+            representative[comps[::-1]] = idx[::-1]
+            local.union_pairs(representative[comps], idx)
+            touched |= reached
+
+        idx = np.flatnonzero(touched)
+        return np.column_stack((cores[local.find_many(idx)], cores[idx]))
+
+    def _border_pass(self, X, is_core, labels, owned, members):
+        """Lowest cluster label among the core neighbors of each owned non-core point (-1 if none)."""
+        cores = members[is_core[members]]
+        border = owned[~is_core[owned]]
+        best = np.full(len(border), -1, dtype=np.int64)
+        if not len(cores) or not len(border):
+            return border, best
+
+        tree = KDTree(X[cores], metric="chebyshev")
+        core_labels = labels[cores]
+        position = 0
+        for chunk, counts, neighbors in self._chunked_neighbors(tree, X, border):
+            found = counts > 0
+            if found.any():
+                starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[found]
+                best[position + np.flatnonzero(found)] = np.minimum.reduceat(core_labels[neighbors], starts)
+            position += len(chunk)
+        return border, best
+
+    def _map_tiles(self, fn, X, *args):
+        """Yield fn's result per tile in tile order, with at most max_workers tiles in flight."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = deque()
+            for owned, members in self._tiles(X):
+                pending.append(pool.submit(fn, X, *args, owned, members))
+                if len(pending) >= self.max_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def fit_predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        n = len(X)
+        labels = np.full(n, -1, dtype=np.int64)
+        if n == 0:
+            return labels
+
+        # Pass 1: exact core flags (each tile decides for the points it owns)
+        is_core = np.zeros(n, dtype=bool)
+        for owned, core in self._map_tiles(self._core_pass, X):
+            is_core[owned] = core
+
+        core_idx = np.flatnonzero(is_core)
+        if not len(core_idx):
+            return labels
+
+        # Pass 2: tile-local components, merged into the global union-find as tiles finish
+        uf = UnionFind(n)
+        for links in self._map_tiles(self._link_pass, X, is_core):
+            uf.union_pairs(links[:, 0], links[:, 1])
+        roots = uf.find_many(core_idx)
+
+        # Roots are the lowest-index core point of each cluster, which is also sklearn's numbering order
+        labels[core_idx] = np.searchsorted(np.unique(roots), roots)
+
+        # Pass 3: border points join the earliest-numbered cluster among their core neighbors
+        for border, best in self._map_tiles(self._border_pass, X, is_core, labels):
+            labels[border] = best
+
+        return labels
@@ -1,4 +1,6 @@
 import asyncio
+import redis.asyncio as redis
+from config import REDIS_URL, EVENT_CACHE_CHANNEL
 from clustering import ClusteringEngine
 from db_mongo import mongo_handler
 
@@ -12,6 +14,11 @@ async def main():
     # Run clustering (this will now clear old clusters first)
     count = await engine.run_clustering()
     print(f"Clustering complete. Active clusters: {count}")
+    
+    # Cached event details carry the old cluster_id
+    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+    await redis_client.publish(EVENT_CACHE_CHANNEL, "*")
+    await redis_client.aclose()
 
 if __name__ == "__main__":
     asyncio.run(main())
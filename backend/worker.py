@@ -1,13 +1,21 @@
 import asyncio
 import redis.asyncio as redis
 import json
-from config import REDIS_URL, STREAM_KEY
+import time
+from config import (
+    REDIS_URL, STREAM_KEY, EVENT_CACHE_CHANNEL, ANALYTICS_CACHE_CHANNEL, ANALYTICS_INVALIDATION_DEBOUNCE_SECONDS,
+    ANOMALY_CHANNEL, ANOMALY_STATE_KEY, ANOMALY_CURRENT_KEY, ANOMALY_TICK_SECONDS,
+    ANOMALY_SHORT_TAU_HOURS, ANOMALY_LONG_TAU_DAYS, ANOMALY_Z_ENTER, ANOMALY_Z_EXIT, ANOMALY_MIN_EVENTS
+)
 from db_mongo import mongo_handler
 from db_neo4j import neo4j_handler
 from geocoder import geocoder
 from utils import format_timestamp
 from producer import main as run_producer_loop
 from clustering import ClusteringEngine
+from cache_invalidation import affected_cache_keys, delete_cache_keys, CATALOG_KEYS
+from anomaly_detector import ActivityAnomalyDetector
+from region_normalizer import UNKNOWN_REGION
 
 CONSUMER_GROUP = "analytics_group"
 CONSUMER_NAME = "worker_1"
@@ -15,6 +23,13 @@ CONSUMER_NAME = "worker_1"
 MAX_RETRIES = 5
 DEAD_LETTER_STREAM = "earthquake_dlq"
 
+anomaly_detector = ActivityAnomalyDetector(
+    ANOMALY_SHORT_TAU_HOURS, ANOMALY_LONG_TAU_DAYS, ANOMALY_Z_ENTER, ANOMALY_Z_EXIT, ANOMALY_MIN_EVENTS
+)
+
+def now_ms():
+    return int(time.time() * 1000)
+
 async def process_message(redis_client, message_id, data):
     """Encapsulates the enrichment and storage logic for a single message."""
     print(f"Processing event: {message_id}")
@@ -32,7 +47,7 @@ async def process_message(redis_client, message_id, data):
             data["readable_time"] = format_timestamp(ts)
 
         # Pass data directly to Mongo handler
-        await mongo_handler.insert_earthquake(data)
+        result = await mongo_handler.insert_earthquake(data)
         print(f"[Worker] Live Ingestion: Synced to MongoDB (Enriched: {bool(exact_address)})")
         
         # Ingest into Neo4j
@@ -42,6 +57,16 @@ async def process_message(redis_client, message_id, data):
         except Exception as e:
             print(f"[Neo4j] Error during live ingestion: {e}")
         
+        # Drop the cached detail response of this event in every API process
+        await redis_client.publish(EVENT_CACHE_CHANNEL, data["id"])
+        
+        # Score new events (not revisions) against their region's baseline
+        if result and result[0] is None:
+            stored = result[1]
+            transition = anomaly_detector.observe(stored.get("region") or UNKNOWN_REGION, int(stored["time"]), now_ms())
+            if transition:
+                await publish_anomaly(redis_client, transition)
+        
         # Acknowledge SUCCESS
         await redis_client.xack(STREAM_KEY, CONSUMER_GROUP, message_id)
         return True
@@ -116,12 +141,15 @@ async def run_clustering_watcher():
     
     # Run once on startup to ensure clusters are fresh
     await clustering_engine.run_clustering()
+    await redis_client.publish(EVENT_CACHE_CHANNEL, "*")
     
     async def on_config_change():
         config = await clustering_engine.get_config()
         print(f"[Worker] CONFIG CHANGE triggering re-clustering. Using Config: {config}")
         count = await clustering_engine.run_clustering()
         print(f"[Worker] Re-clustering complete. Found {count} clusters.")
+        # cluster_id changed on many events, drop every cached detail response
+        await redis_client.publish(EVENT_CACHE_CHANNEL, "*")
         
         # Notify UI via Redis Pub/Sub (which main.py listens to)
         notification = {
@@ -140,15 +168,103 @@ async def run_clustering_watcher():
     finally:
         await redis_client.aclose()
 
+async def publish_anomaly(redis_client, transition):
+    print(f"[Anomaly] {transition['type']}: {transition['region']} (score {transition['score']})")
+    await redis_client.publish(ANOMALY_CHANNEL, json.dumps(transition))
+    await redis_client.set(ANOMALY_CURRENT_KEY, json.dumps(anomaly_detector.current(now_ms())), ex=5 * ANOMALY_TICK_SECONDS)
+
+async def restore_anomaly_detector():
+    """Loads the Redis checkpoint, or seeds every region's baseline from the last 30 days"""
+    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+    try:
+        checkpoint = await redis_client.get(ANOMALY_STATE_KEY)
+        if checkpoint:
+            anomaly_detector.load_dict(json.loads(checkpoint))
+            print(f"[Anomaly] Restored detector state ({len(anomaly_detector.regions)} regions)")
+            return
+        days = 30
+        now = now_ms()
+        for row in await mongo_handler.get_region_counts(now - days * 24 * 3600 * 1000):
+            anomaly_detector.seed_baseline(row["_id"], row["count"] / (days * 24), now)
+        print(f"[Anomaly] Seeded baselines for {len(anomaly_detector.regions)} regions")
+    finally:
+        await redis_client.aclose()
+
+async def run_anomaly_ticker():
+    print("Starting Anomaly Detector Ticker...")
+    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+    try:
+        while True:
+            try:
+                for transition in anomaly_detector.tick(now_ms()):
+                    await publish_anomaly(redis_client, transition)
+                await redis_client.set(
+                    ANOMALY_CURRENT_KEY, json.dumps(anomaly_detector.current(now_ms())), ex=5 * ANOMALY_TICK_SECONDS
+                )
+                await redis_client.set(ANOMALY_STATE_KEY, json.dumps(anomaly_detector.to_dict()))
+            except Exception as e:
+                print(f"[Anomaly] Tick error: {e}")
+            await asyncio.sleep(ANOMALY_TICK_SECONDS)
+    finally:
+        await redis_client.aclose()
+
+async def run_cache_invalidator():
+    print("Starting Analytics Cache Invalidator...")
+    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+    stale_keys = set()
+    
+    async def on_catalog_change(change):
+        stale_keys.update(affected_cache_keys(change))
+    
+    async def flush_stale_keys():
+        # Debounced, so a burst of inserts during an active sequence costs one round of deletes
+        while True:
+            await asyncio.sleep(ANALYTICS_INVALIDATION_DEBOUNCE_SECONDS)
+            if not stale_keys:
+                continue
+            keys = list(stale_keys)
+            stale_keys.clear()
+            try:
+                deleted = await delete_cache_keys(redis_client, keys)
+                # API processes drop their in-process copies too
+                await redis_client.publish(ANALYTICS_CACHE_CHANNEL, json.dumps(keys))
+                print(f"[Worker] Invalidated {deleted} cached responses ({', '.join(sorted(keys))})")
+            except Exception as e:
+                stale_keys.update(keys)
+                print(f"[Worker] Cache invalidation error: {e}")
+    
+    flusher = asyncio.create_task(flush_stale_keys())
+    retry_seconds = 1
+    try:
+        while True:
+            watched_from = time.monotonic()
+            try:
+                await mongo_handler.watch_catalog_changes(on_catalog_change)
+            except Exception as e:
+                print(f"Cache invalidator error: {e}")
+            # Back off while the stream keeps failing right away
+            retry_seconds = 1 if time.monotonic() - watched_from > 60 else min(retry_seconds * 2, 60)
+            print(f"[Worker] Catalog change stream closed, reconnecting in {retry_seconds}s")
+            await asyncio.sleep(retry_seconds)
+            # Writes while the stream was down went unseen: drop every catalog-derived key
+            stale_keys.update(CATALOG_KEYS)
+    finally:
+        flusher.cancel()
+        await redis_client.aclose()
+
 async def main():
     # Initialize Databases
     await mongo_handler.initialize()
+    await mongo_handler.ensure_rollups()
+    await restore_anomaly_detector()
     
     # Run both Producer and Consumer concurrently
     await asyncio.gather(
         run_producer_loop(),
         run_consumer_loop(),
-        run_clustering_watcher()
+        run_clustering_watcher(),
+        run_cache_invalidator(),
+        run_anomaly_ticker()
     )
 
 if __name__ == "__main__":
@@ -17,17 +17,12 @@ export default function AnalyticsPage() {
   useEffect(() => {
     const load = async () => {
       try {
-        const [mag, trend, depth, region] = await Promise.all([
-          fetchAnalytics('magnitude-distribution'),
-          fetchAnalytics('trends'),
-          fetchAnalytics('depth-magnitude'),
-          fetchAnalytics('top-regions'),
-        ])
+        const dashboard = await fetchAnalytics('dashboard')
 
-        setMagnitudeBuckets(mag?.buckets || mag || [])
-        setTrends(trend?.points || trend || [])
-        setDepthMagnitude(depth?.points || depth || [])
-        setRegions(region?.regions || region || [])
+        setMagnitudeBuckets(dashboard?.magnitude_distribution || [])
+        setTrends(dashboard?.trends || [])
+        setDepthMagnitude(dashboard?.depth_vs_magnitude || [])
+        setRegions(dashboard?.top_regions || [])
       } catch (e) {
         console.error('Failed to load analytics', e)
       } finally {
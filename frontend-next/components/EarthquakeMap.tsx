@@ -378,7 +378,7 @@ export default function EarthquakeMap({ filters, onEventSelect, onStatsUpdate, s
         else if (magnitudeMode === 'exact') { mag_min = magnitudeExact - 0.1; mag_max = magnitudeExact + 0.1 }
 
         const [earthquakeData, clusterData] = await Promise.all([
-          fetchEarthquakes({ limit: 500, mag_min: mag_min, mag_max: mag_max, start_time: startTime }),
+          fetchEarthquakes({ limit: 500, mag_min: mag_min, mag_max: mag_max, start_time: startTime, fields: 'summary' }),
           fetchClusters()
         ])
 
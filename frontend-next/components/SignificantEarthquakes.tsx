@@ -28,7 +28,7 @@ export default function SignificantEarthquakes() {
   useEffect(() => {
     const load = async () => {
       try {
-        const data = await fetchEarthquakes({ limit: 200, mag_min: 5 })
+        const data = await fetchEarthquakes({ limit: 200, mag_min: 5, fields: 'summary' })
         const list = Array.isArray(data) ? data : []
         setEvents(list)
       } catch (e) {
@@ -8,6 +8,7 @@ export async function fetchEarthquakes(params?: {
   start_time?: number
   end_time?: number
   limit?: number
+  fields?: 'map' | 'summary' | 'full' | string
 }) {
   const searchParams = new URLSearchParams()
   if (params?.mag_min) searchParams.append('mag_min', String(params.mag_min))
@@ -17,6 +18,7 @@ export async function fetchEarthquakes(params?: {
   if (params?.start_time) searchParams.append('start_time', String(params.start_time))
   if (params?.end_time) searchParams.append('end_time', String(params.end_time))
   if (params?.limit) searchParams.append('limit', String(params.limit))
+  if (params?.fields) searchParams.append('fields', params.fields)
 
   const res = await fetch(`${API_BASE}/earthquakes?${searchParams.toString()}`)
   if (!res.ok) throw new Error(`Failed to fetch earthquakes: ${res.statusText}`)